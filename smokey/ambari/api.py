@@ -3,13 +3,45 @@ import logging
 import os
 import random
 import requests
-import signal
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from requests.packages.urllib3.util.retry import Retry
+
+from ambari.cache import TtlCache
+from ambari.session_cache import SessionCache
+from ambari.streaming import iter_json_array
+from ambari.snapshot import ClusterSnapshot
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 
+# Maximum number of characters of a response body written to the debug log
+MAX_LOGGED_RESPONSE_LENGTH = 2048
+
+
+def _master_ha_state(is_active_master):
+    return 'active' if str(is_active_master).lower() == 'true' else 'standby'
+
+
+# Where Ambari exposes the HA state of a component and how to translate it to 'active'/'standby'
+HA_STATE_FIELDS = {
+    'NAMENODE': ('metrics/dfs/FSNamesystem/HAState', str.lower),
+    'HBASE_MASTER': ('metrics/hbase/master/IsActiveMaster', _master_ha_state),
+    'RESOURCEMANAGER': ('HostRoles/ha_state', str.lower),
+}
+
+# Seconds Ambari responses are cached. Topology (where components run) hardly changes during a smoketest,
+# state information is only reused for a short while and dropped on every state change made through this Api.
+DEFAULT_CACHE_TTLS = {
+    'topology': 300,
+    'ha_state': 10,
+    'state': 2,
+}
+
+
 class AmbariWaitForCompletionTimeoutError(Exception):
     pass
 
@@ -18,8 +50,177 @@ class AmbariRequestError(Exception):
     pass
 
 
+class RequestPoller:
+    """
+    Waits for the completion of Ambari requests
+
+    All outstanding requests are polled from one background thread, so waiting for several requests at once costs
+    one polling loop. Every request gets a Future that is resolved when the request completed, failed or timed out.
+    The polling interval starts small and backs off while a request does not make progress.
+    """
+
+    FAILED_STATES = ('FAILED', 'ABORTED', 'TIMEDOUT', 'SKIPPED_FAILED')
+
+    def __init__(self, fetch_status, logger=logging, initial_interval=0.5, max_interval=5, backoff=1.5,
+                 clock=time.monotonic):
+        """
+        :param fetch_status: Function returning the 'Requests' info (request_status and progress_percent) of a href
+        :param logger: logger instance
+        :param initial_interval: Seconds between the first polls of a request
+        :param max_interval: Maximum number of seconds between two polls of a request
+        :param backoff: Factor the interval grows with when a request does not make progress
+        :param clock: Monotonic function returning the current time in seconds
+        """
+        self.fetch_status = fetch_status
+        self.logger = logger
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, href, timeout, on_done=None):
+        """
+        Start waiting for the completion of an Ambari request
+
+        :param href: The href of the Ambari request
+        :param timeout: Seconds to wait for the completion
+        :param on_done: Optional function called when the request ended, before the Future is resolved. Unlike a done
+        callback of the Future it has run when a waiter of the Future wakes up
+        :return: A Future with the final 'Requests' info as result. It fails with an AmbariRequestError when the
+        request failed or with an AmbariWaitForCompletionTimeoutError when it did not complete in time
+        """
+        future = Future()
+        now = self.clock()
+        with self._condition:
+            self._pending.append({'href': href, 'future': future, 'deadline': now + timeout, 'next_poll': now,
+                                  'interval': self.initial_interval, 'progress': None, 'on_done': on_done})
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ambari-request-poller', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._pending) == 0:
+                    self._thread = None
+                    return
+                now = self.clock()
+                due = [request for request in self._pending if request['next_poll'] <= now]
+                if len(due) == 0:
+                    wake_up = min(min(request['next_poll'], request['deadline']) for request in self._pending)
+                    self._condition.wait(max(wake_up - now, 0))
+                    continue
+
+            for request in due:
+                self._poll(request)
+
+            with self._condition:
+                self._pending = [request for request in self._pending if not request['future'].done()]
+
+    @staticmethod
+    def _resolve(request, result=None, exception=None):
+        if request['on_done'] is not None:
+            request['on_done']()
+        if exception is not None:
+            request['future'].set_exception(exception)
+        else:
+            request['future'].set_result(result)
+
+    def _poll(self, request):
+        href = request['href']
+        try:
+            status = self.fetch_status(href)
+        except requests.RequestException as e:
+            self.logger.warning("Polling {0} failed, retrying: {1}".format(href, e))
+            status = None
+        except Exception as e:
+            self._resolve(request, exception=e)
+            return
+
+        now = self.clock()
+        if status is not None and status['request_status'] == 'COMPLETED':
+            self.logger.info("Finished waiting for completion of {0}.".format(href))
+            self._resolve(request, result=status)
+        elif status is not None and status['request_status'] in self.FAILED_STATES:
+            self.logger.error("Request {0} ended with status {1}".format(href, status['request_status']))
+            self._resolve(request, exception=AmbariRequestError(
+                "Request {0} ended with status {1}".format(href, status['request_status'])))
+        elif now >= request['deadline']:
+            self.logger.error("Timeout occurred during waiting for request completion of {path}".format(path=href))
+            self._resolve(request, exception=AmbariWaitForCompletionTimeoutError(
+                "Timeout occurred during waiting for completion of " + href))
+        else:
+            if status is not None:
+                self.logger.warning("Waiting for completion. Progress = {progress}, status = {status}".format(
+                    progress=status['progress_percent'], status=status['request_status']))
+                if status['progress_percent'] != request['progress']:
+                    request['progress'] = status['progress_percent']
+                    request['interval'] = self.initial_interval
+                else:
+                    request['interval'] = min(request['interval'] * self.backoff, self.max_interval)
+            request['next_poll'] = min(now + request['interval'], request['deadline'])
+
+
+class AmbariRequest:
+    """
+    Handle to track an Ambari request that changes the state of one or more host components
+    """
+
+    def __init__(self, api, href, future):
+        """
+        :param api: The Api the request was made with
+        :param href: The href of the Ambari request, None if Ambari had nothing to change
+        :param future: The Future of the RequestPoller waiting for the request
+        """
+        self.api = api
+        self.href = href
+        self.future = future
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """
+        Wait for the completion of the request
+
+        :param timeout: Seconds to block, None blocks until the polling timeout of the request
+        :return: The final 'Requests' info, None if Ambari had nothing to change
+        """
+        return self.future.result(timeout=timeout)
+
+    def get_tasks(self):
+        """
+        :return: A list with the 'Tasks' info (host_name, role, command, status) per host component
+        """
+        if self.href is None:
+            return []
+        return self.api.get_request_tasks(self.href)
+
+
 class Api:
-    def __init__(self, request_timeout=10, polling_timeout=60, logger=logging):
+    def __init__(self, request_timeout=10, polling_timeout=60, logger=logging, pool_size=10, max_retries=3,
+                 retry_backoff_factor=0.5, pool_block=False, cache_ttls=None, cache_size=256, session_cache_dir=None,
+                 session_cache_max_age=1800):
+        """
+        :param request_timeout: Timeout in seconds for a single Ambari call
+        :param polling_timeout: Default timeout in seconds when waiting for an Ambari request to complete
+        :param logger: logger instance
+        :param pool_size: Number of keep-alive connections kept open to the Ambari server
+        :param max_retries: Number of retries on connection errors and 502/503/504 responses
+        :param retry_backoff_factor: Backoff factor between retries (0.5 gives 0.5s, 1s, 2s, ...)
+        :param pool_block: Block when all pooled connections are in use instead of opening extra ones
+        :param cache_ttls: Dict overriding the DEFAULT_CACHE_TTLS per kind ('topology', 'ha_state', 'state'),
+        a ttl of 0 disables caching of that kind
+        :param cache_size: Maximum number of cached Ambari responses
+        :param session_cache_dir: Directory to share Ambari session ids between processes (default from the
+        AMBARI_SESSION_CACHE_DIR environment variable). Without a directory every Api authenticates itself
+        :param session_cache_max_age: Seconds a session id from the session cache is used
+        """
         self.timeout = request_timeout
         self.polling_timeout = polling_timeout
         self.ambari_schema = os.environ.get('AMBARI_SCHEMA', 'http')
@@ -34,18 +235,44 @@ class Api:
             "Content-Type": "application/json",
             "X-Requested-By": "smoketest"
         }
+        self.pool_size = pool_size
+        self.session = self._create_http_session(pool_size, max_retries, retry_backoff_factor, pool_block)
+        self._session_lock = threading.Lock()
+        self.cache = TtlCache({**DEFAULT_CACHE_TTLS, **(cache_ttls or {})}, max_size=cache_size)
+        if session_cache_dir is None:
+            session_cache_dir = os.environ.get('AMBARI_SESSION_CACHE_DIR')
+        self.session_cache = None if session_cache_dir is None else SessionCache(session_cache_dir,
+                                                                                 max_age=session_cache_max_age)
+        self._session_from_cache = False
 
         self.logger = logger
+        self.poller = RequestPoller(self._fetch_request_status, logger=self.logger)
 
     @staticmethod
-    def _encode_escaped_json_string_for_ambari(data):
-        return json.dumps(json.dumps(data))
+    def _create_http_session(pool_size, max_retries, retry_backoff_factor, pool_block):
+        """
+        Create the pooled http session shared by all calls to Ambari
+
+        requests.Session keeps the connections alive, so consecutive calls (like the completion polling) reuse the
+        same TCP (and TLS) connection instead of setting up a new one for every call.
+        """
+        retries = Retry(total=max_retries, connect=max_retries, read=max_retries,
+                        backoff_factor=retry_backoff_factor, status_forcelist=(502, 503, 504), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries, pool_block=pool_block)
+        session = requests.Session()
+        session.verify = False
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     @staticmethod
-    def _sig_alarm(signum, frame):
-        raise AmbariWaitForCompletionTimeoutError("Timeout occurred!")
+    def _encode_escaped_json_string_for_ambari(data):
+        return json.dumps(json.dumps(data))
 
     def _request_ambari(self, path, method='GET', headers=None, **kwargs):
+        return self._check_response_status(self._send_ambari_request(path, method, headers, **kwargs))
+
+    def _send_ambari_request(self, path, method='GET', headers=None, **kwargs):
         if headers is None:
             headers = dict()
 
@@ -57,18 +284,52 @@ class Api:
         self.logger.debug(ambari_url)
         ambari_headers = {**self.default_ambari_headers, **headers}
         self.logger.debug(ambari_headers)
-        r = requests.request(method, ambari_url, headers=ambari_headers, timeout=self.timeout, verify=False, **kwargs)
-        return self._check_response_status(r)
-
-    def _init_session(self):
-        r = self._request_ambari('', auth=(self.ambari_user, self.ambari_pwd))
-        self.logger.debug(r.cookies['AMBARISESSIONID'])
-        self.ambari_session = r.cookies['AMBARISESSIONID']
+        return self.session.request(method, ambari_url, headers=ambari_headers, timeout=self.timeout, verify=False,
+                                    **kwargs)
+
+    def _init_session(self, use_session_cache=True):
+        session_id = None
+        if self.session_cache is not None and use_session_cache:
+            session_id = self.session_cache.get(self.ambari_host, self.ambari_port, self.ambari_user)
+        self._session_from_cache = session_id is not None
+        if session_id is None:
+            r = self._request_ambari('', auth=(self.ambari_user, self.ambari_pwd))
+            self.logger.debug(r.cookies['AMBARISESSIONID'])
+            session_id = r.cookies['AMBARISESSIONID']
+            if self.session_cache is not None:
+                self.session_cache.put(self.ambari_host, self.ambari_port, self.ambari_user, session_id)
+        else:
+            self.logger.debug("Using Ambari session from the session cache")
         self.default_ambari_headers = {**self.default_ambari_headers,
-                                       "Cookie": "AMBARISESSIONID=" + self.ambari_session}
-
-    def _check_response_status(self, response):
-        self.logger.debug(response.text)
+                                       "Cookie": "AMBARISESSIONID=" + session_id}
+        # Set last, other threads only skip the session initialization once the session header is in place
+        self.ambari_session = session_id
+
+    def _renew_session(self, refused_session):
+        with self._session_lock:
+            # Another thread might have renewed the session already
+            if self.ambari_session == refused_session:
+                self.logger.info("Ambari session from the session cache was refused, authenticating again")
+                self.session_cache.invalidate(self.ambari_host, self.ambari_port, self.ambari_user, refused_session)
+                self._init_session(use_session_cache=False)
+
+    def _debug_enabled(self):
+        # The logger can be the logging module itself, which has no isEnabledFor
+        return getattr(self.logger, 'isEnabledFor', logging.getLogger().isEnabledFor)(logging.DEBUG)
+
+    def _debug_truncated(self, value):
+        """
+        Log (a possibly large) value at debug level, truncated. The value is only formatted when debug is enabled
+        """
+        if self._debug_enabled():
+            text = str(value)
+            if len(text) > MAX_LOGGED_RESPONSE_LENGTH:
+                text = "{0}... ({1} characters)".format(text[:MAX_LOGGED_RESPONSE_LENGTH], len(text))
+            self.logger.debug(text)
+
+    def _check_response_status(self, response, stream=False):
+        if not stream:
+            self._debug_truncated(response.text)
         if response.status_code >= 400:
             self.logger.error(
                 "AmbariResponse returned with error status [{0}], response was: {1}".format(response.status_code,
@@ -76,26 +337,14 @@ class Api:
             raise AmbariRequestError("AmbariResponse returned with error status [{0}]".format(response.status_code))
         return response
 
+    def _fetch_request_status(self, path):
+        response = self.request_ambari(
+            "{0}?fields=Requests/request_status,Requests/progress_percent".format(path)).json()
+        return response['Requests']
+
     def _wait_for_request_completion(self, path, polling_timeout=None):
         polling_timeout = self.polling_timeout if polling_timeout is None else polling_timeout
-        signal.signal(signal.SIGALRM, self._sig_alarm)
-        waiting_for_completion = True
-        try:
-            signal.alarm(polling_timeout)
-            while waiting_for_completion:
-                completion_result = self.request_ambari(path).json()
-                if completion_result['Requests']['request_status'] != 'COMPLETED':
-                    self.logger.warning("Waiting for completion. Progress = {progress}, status = {status}".format(
-                        progress=completion_result['Requests']['progress_percent'],
-                        status=completion_result['Requests']['request_status']))
-                    time.sleep(2)
-                else:
-                    self.logger.info("Finished waiting for completion.")
-                    waiting_for_completion = False
-                    signal.alarm(0)
-        except AmbariWaitForCompletionTimeoutError:
-            self.logger.error("Timeout occurred during waiting for request completion of {path}".format(path=path))
-            raise AmbariWaitForCompletionTimeoutError
+        return self.poller.submit(path, polling_timeout).result()
 
     def _change_host_component_state(self, path, state='STARTED'):
         self.logger.debug(path)
@@ -116,68 +365,142 @@ class Api:
     def request_ambari(self, path, method='GET', headers=None, **kwargs):
         self.logger.info("Calling Ambari API ({0})".format(path))
         if self.ambari_session is None:
-            self._init_session()
+            with self._session_lock:
+                if self.ambari_session is None:
+                    self._init_session()
         if 'data' in kwargs:
             if isinstance(kwargs['data'], dict):
                 kwargs['data'] = self._encode_escaped_json_string_for_ambari(kwargs['data'])
-        return self._request_ambari(path, method, headers, **kwargs)
+        session_id, session_from_cache = self.ambari_session, self._session_from_cache
+        response = self._send_ambari_request(path, method, headers, **kwargs)
+        if response.status_code == 403 and session_from_cache:
+            self._renew_session(session_id)
+            response = self._send_ambari_request(path, method, headers, **kwargs)
+        return self._check_response_status(response, stream=kwargs.get('stream', False))
 
     def get_service_components(self, service):
         self.logger.info("Getting component components from Ambari API {0}".format(service))
-        r = self.request_ambari('{0}/services/{1}/components'.format(self.clustername, service))
-        return r.json()
+        url = '{0}/services/{1}/components'.format(self.clustername, service)
+        return self._get_cached_json('topology', url)
+
+    def _get_cached_json(self, kind, path):
+        return self.cache.get(kind, path, lambda: self.request_ambari(path).json())
+
+    def invalidate_cache(self, *kinds):
+        """
+        Drop cached Ambari responses, for example after the cluster was changed outside of this Api
+
+        :param kinds: Kinds to drop ('topology', 'ha_state', 'state'). Without kinds everything is dropped
+        """
+        self.cache.invalidate(*kinds)
+
+    def _iter_json_array(self, path, key, chunk_size=65536):
+        """
+        Yield the items of an array of an Ambari response while the response is received (see
+        ambari.streaming.iter_json_array), the response text is never held or logged completely
+        """
+        response = self.request_ambari(path, stream=True)
+        try:
+            for item in iter_json_array(response.iter_content(chunk_size=chunk_size), key):
+                yield item
+        finally:
+            response.close()
 
     def get_component_info(self, service, component_name):
+        """
+        The host components are parsed one at a time while the response is received (see iter_host_components),
+        which keeps the peak memory of components running on every node (DATANODE, NODEMANAGER) of a large cluster low
+
+        :return: A dict {'host_components': [{'HostRoles': {...}, 'href': ...}, ...]}
+        """
         self.logger.info("Getting component info from Ambari API {0}/{1}".format(service, component_name))
         url = '{0}/services/{1}/components/{2}?fields=host_components'.format(self.clustername, service, component_name)
-        response = self.request_ambari(url).json()
-        self.logger.debug(response)
+        response = self.cache.get('topology', url, lambda: {
+            'host_components': list(self.iter_host_components(service, component_name))})
+        self._debug_truncated(response)
         return response
 
+    def iter_host_components(self, service, component_name, chunk_size=65536):
+        """
+        Yield the host components of a component while the Ambari response is received, without caching them
+
+        :return: Generator of {'HostRoles': {...}, 'href': ...} dicts
+        """
+        url = '{0}/services/{1}/components/{2}?fields=host_components'.format(self.clustername, service, component_name)
+        return self._iter_json_array(url, 'host_components', chunk_size=chunk_size)
+
     def get_component_processes_info(self, path):
         self.logger.info("Getting component process info from Ambari API {0}".format(path))
         response = self.request_ambari("{0}/processes".format(path)).json()
-        self.logger.debug(response)
+        self._debug_truncated(response)
         return response
 
     def get_component_host_hastate(self, service, component_name):
-        # TODO: Works for YARN resourcemanager, but the hastate is not a generic API.
-        # TODO: For Namenode we implemented get_specific_nn_host method.
-        # TODO: For HBASE Master we implemented get_specific_hbase_master.
-        # TODO: We might need to do that for other ha components too
         """
-        :return: A dict {host: ha_state, host: ha_state, ...}
+        :return: A dict {host: ha_state, host: ha_state, ...} with the ha_state like Ambari reports it ('ACTIVE')
         """
-        url = '{0}/services/{1}/components/{2}?fields=' \
-              'host_components/HostRoles/ha_state'.format(self.clustername, service, component_name)
-        response = self.request_ambari(url).json()
-        result = {}
-        for host in response['host_components']:
-            result[host['HostRoles']['host_name']] = host['HostRoles']['ha_state']
-        return result
+        return {host: None if ha_state is None else ha_state.upper()
+                for host, ha_state in self.get_host_ha_states(service, component_name).items()}
+
+    def _get_host_ha_state(self, component_name, host_component):
+        field, to_ha_state = HA_STATE_FIELDS[component_name]
+        state_info = self.request_ambari("{0}?fields={1}".format(host_component['href'], field)).json()
+        value = self._get_field(state_info, field)
+        return host_component['HostRoles']['host_name'], None if value is None else to_ha_state(value)
+
+    @staticmethod
+    def _get_field(info, field):
+        for key in field.split('/'):
+            if not isinstance(info, dict) or key not in info:
+                return None
+            info = info[key]
+        return info
+
+    def get_host_ha_states(self, service, component_name):
+        """
+        Resolve the HA state of all hosts running a component in a single pass
+
+        Components that only expose their HA state through metrics (NAMENODE, HBASE_MASTER) are queried per host
+        component, concurrently. Other components are resolved with one call on HostRoles/ha_state.
+
+        :return: A dict {host: 'active'/'standby', ...}. The state is None if it is unknown (component stopped)
+        """
+        return self.cache.get('ha_state', (service, component_name),
+                              lambda: self._resolve_host_ha_states(service, component_name))
+
+    def _resolve_host_ha_states(self, service, component_name):
+        if component_name not in HA_STATE_FIELDS or HA_STATE_FIELDS[component_name][0].startswith('HostRoles/'):
+            url = '{0}/services/{1}/components/{2}?fields=' \
+                  'host_components/HostRoles/ha_state'.format(self.clustername, service, component_name)
+            response = self.request_ambari(url).json()
+            return {host['HostRoles']['host_name']: None if host['HostRoles'].get('ha_state') is None
+                    else host['HostRoles']['ha_state'].lower() for host in response['host_components']}
+
+        host_components = self.get_component_info(service, component_name)['host_components']
+        if len(host_components) == 0:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(host_components))) as executor:
+            return dict(executor.map(lambda host: self._get_host_ha_state(component_name, host), host_components))
+
+    def get_host_with_ha_state(self, service, component_name, state='active'):
+        """
+        :return: Hostname of the component with the requested HA state (active or standby), None if there is none
+        """
+        for host, ha_state in self.get_host_ha_states(service, component_name).items():
+            if ha_state == state:
+                return host
 
     def get_specific_nn_host(self, state='active'):
         """
         :return: Hostname of the requested namenode (active or standby)
         """
-        nn_info = self.get_component_info('HDFS', 'NAMENODE')
-
-        for host in nn_info['host_components']:
-            state_info = self.request_ambari("{0}?fields=metrics/dfs/FSNamesystem/HAState".format(host['href'])).json()
-            if state_info['metrics']['dfs']['FSNamesystem']['HAState'] == state:
-                return state_info['HostRoles']['host_name']
+        return self.get_host_with_ha_state('HDFS', 'NAMENODE', state=state)
 
     def get_specific_hbase_master(self, state='active'):
-        isActiveMaster = 'true'
-        if state is not 'active':
-            isActiveMaster = 'false'
-        master_info = self.get_component_info('HBASE', 'HBASE_MASTER')
-
-        for host in master_info['host_components']:
-            state_info = self.request_ambari(
-                "{0}?fields=metrics/hbase/master/IsActiveMaster".format(host['href'])).json()
-            if state_info['metrics']['hbase']['master']['IsActiveMaster'] == isActiveMaster:
-                return state_info['HostRoles']['host_name']
+        """
+        :return: Hostname of the requested HBase master (active or standby)
+        """
+        return self.get_host_with_ha_state('HBASE', 'HBASE_MASTER', state=state)
 
     def get_component_state(self, service, component_name):
         self.logger.info("Getting component state from Ambari API {0}/{1}".format(service, component_name))
@@ -185,10 +508,34 @@ class Api:
               'ServiceComponentInfo/total_count,' \
               'ServiceComponentInfo/started_count,' \
               'ServiceComponentInfo/state'.format(self.clustername, service, component_name)
-        response = self.request_ambari(url).json()
-        self.logger.debug(response)
+        response = self._get_cached_json('state', url)
+        self._debug_truncated(response)
         return response
 
+    def get_cluster_snapshot(self):
+        """
+        Get the state of all services, components and host components of the cluster with a single call
+
+        :return: A ClusterSnapshot
+        """
+        self.logger.info("Getting cluster snapshot from Ambari API")
+        url = '{0}/services?fields={1}'.format(self.clustername, ','.join(ClusterSnapshot.FIELDS))
+        # The services are parsed one at a time while the response of the whole cluster is received
+        return ClusterSnapshot(self.clustername, self.cache.get('state', url, lambda: {
+            'items': list(self._iter_json_array(url, 'items'))}))
+
+    def get_host_addresses(self):
+        """
+        Get the addresses of all hosts of the cluster with a single call, to resolve DataNode addresses without
+        reverse DNS lookups (see hdfs.resolver.HostResolver.preload)
+
+        :return: A dict {host name: ip address}
+        """
+        self.logger.info("Getting host addresses from Ambari API")
+        url = '{0}/hosts?fields=Hosts/host_name,Hosts/ip'.format(self.clustername)
+        return {item['Hosts']['host_name']: item['Hosts']['ip']
+                for item in self._get_cached_json('topology', url).get('items', [])}
+
     def check_if_all_components_started(self, service, component_name):
         state_info = self.get_component_state(service, component_name)
         return self._check_if_all_components_started(state_info)
@@ -197,25 +544,88 @@ class Api:
         host_component_info = random.choice(info['host_components'])
         return host_component_info['HostRoles']['host_name'], host_component_info['href']
 
-    def change_host_component_state_and_wait(self, path, state='STARTED', polling_timeout=None):
-        polling_timeout = self.polling_timeout if polling_timeout is None else polling_timeout
-        self.logger.info("Change state for {path} to state {state}".format(path=path, state=state))
-        response = self._change_host_component_state(path, state)
+    def _track_request(self, response, polling_timeout):
+        # States cached before or during the change are outdated once it is done. The cache is invalidated before the
+        # Future is resolved, so a caller reading the state right after result() returned never gets the old state
+        def invalidate():
+            self.invalidate_cache('state', 'ha_state')
+
         try:
-            response_json = response.json()
-            return self._wait_for_request_completion(response_json['href'], polling_timeout=polling_timeout)
+            href = response.json()['href']
+            future = self.poller.submit(href, polling_timeout, on_done=invalidate)
         except json.decoder.JSONDecodeError:
             # If component wasn't in stopped state response returned is empty but still 200 OK
             self.logger.warning("Component wasn't in stopped state response returned is empty but still 200 OK")
-            pass
+            href = None
+            invalidate()
+            future = Future()
+            future.set_result(None)
+        return href, future
+
+    def change_host_component_state(self, path, state='STARTED', polling_timeout=None):
+        """
+        Request a state change of a host component without waiting for it
+
+        :param path: The full AMBARI API path for the host component
+        :param state: The requested state ('STARTED', 'INSTALLED')
+        :param polling_timeout: Seconds to wait for the completion of the state change
+        :return: A Future that is resolved when the state change completed (see RequestPoller.submit)
+        """
+        polling_timeout = self.polling_timeout if polling_timeout is None else polling_timeout
+        self.logger.info("Change state for {path} to state {state}".format(path=path, state=state))
+        response = self._change_host_component_state(path, state)
+        return self._track_request(response, polling_timeout)[1]
+
+    def change_host_component_state_and_wait(self, path, state='STARTED', polling_timeout=None):
+        self.change_host_component_state(path, state=state, polling_timeout=polling_timeout).result()
+
+    def change_host_components_state(self, component_names, host_names, state='STARTED', polling_timeout=None):
+        """
+        Request a state change of many host components with a single Ambari request
+
+        All host components of the given components on the given hosts are selected with one predicate, so a rolling
+        restart or stopping several victims costs one round-trip instead of one per host component.
+
+        :param component_names: List of component names ('DATANODE', 'NODEMANAGER', ...)
+        :param host_names: List of host names
+        :param state: The requested state ('STARTED', 'INSTALLED')
+        :param polling_timeout: Seconds to wait for the completion of the state change
+        :return: An AmbariRequest to track the state change
+        """
+        polling_timeout = self.polling_timeout if polling_timeout is None else polling_timeout
+        predicate = 'HostRoles/component_name.in({0})&HostRoles/host_name.in({1})'.format(
+            ','.join(component_names), ','.join(host_names))
+        path = '{0}/host_components?{1}'.format(self.clustername, predicate)
+        self.logger.info("Change state for {path} to state {state}".format(path=path, state=state))
+        response = self._change_host_component_state(path, state)
+        href, future = self._track_request(response, polling_timeout)
+        return AmbariRequest(self, href, future)
+
+    def change_host_components_state_and_wait(self, component_names, host_names, state='STARTED',
+                                              polling_timeout=None):
+        self.change_host_components_state(component_names, host_names, state=state,
+                                          polling_timeout=polling_timeout).result()
+
+    def get_request_tasks(self, href):
+        """
+        :return: A list with the 'Tasks' info (host_name, role, command, status) of all tasks of an Ambari request
+        """
+        url = '{0}?fields=tasks/Tasks/host_name,tasks/Tasks/role,tasks/Tasks/command,tasks/Tasks/status'.format(href)
+        return [task['Tasks'] for task in self.request_ambari(url).json()['tasks']]
 
     def get_service_info(self, service):
         self.logger.info("Getting component info from Ambari API {0}".format(service))
         url = '{0}/services/{1}'.format(self.clustername, service)
         response = self.request_ambari(url).json()
-        self.logger.debug(response)
+        self._debug_truncated(response)
         return response
 
+    def close(self):
+        """
+        Close the pooled connections to Ambari
+        """
+        self.session.close()
+
     def get_sample_hosts(self, info, k=10):
         host_component_info = random.sample(info['host_components'], k)
         hosts = []
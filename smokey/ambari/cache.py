@@ -0,0 +1,77 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class TtlCache:
+    """
+    Size bounded LRU cache where entries expire after the ttl configured for their kind
+
+    Every entry belongs to a kind ('topology', 'state', ...) so slowly changing data can be kept long while state
+    information stays fresh. A ttl of 0 (or a kind without a ttl) disables caching for that kind. Values are deep
+    copied on the way out, so callers can modify what they get without corrupting the cache.
+    """
+
+    def __init__(self, ttls, max_size=256, clock=time.monotonic):
+        """
+        :param ttls: A dict {kind: ttl in seconds, ...}
+        :param max_size: Maximum number of entries, the least recently used entry is evicted first
+        :param clock: Function returning the current time in seconds
+        """
+        self.ttls = dict(ttls)
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind, key, loader):
+        """
+        Get the cached value for the key or load (and cache) it with the loader
+
+        :param kind: The kind of the entry, determines the ttl
+        :param key: The key of the entry
+        :param loader: Function without arguments returning the value when it is not cached
+        :return: The (copied) value
+        """
+        ttl = self.ttls.get(kind, 0)
+        if ttl <= 0:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end((kind, key))
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[(kind, key)] = (self.clock() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *kinds):
+        """
+        Remove entries from the cache
+
+        :param kinds: The kinds of the entries to remove. Without kinds the whole cache is cleared
+        """
+        with self._lock:
+            if len(kinds) == 0:
+                self._entries.clear()
+            else:
+                for kind, key in [entry_key for entry_key in self._entries if entry_key[0] in kinds]:
+                    del self._entries[(kind, key)]
+
+    def stats(self):
+        """
+        :return: A dict with the number of hits, misses and cached entries
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class SessionCache:
+    """
+    Keeps Ambari session ids on disk, so smoketests started after each other can skip the authentication
+
+    There is one file per Ambari host, port and user. Files are replaced atomically, so processes reading and writing
+    the cache at the same time always see a complete entry. Entries expire after max_age seconds; Ambari expires
+    idle sessions itself too, the Api authenticates again when a cached session is refused.
+    """
+
+    def __init__(self, directory, max_age=1800, clock=time.time):
+        """
+        :param directory: Directory for the cache files, created when missing
+        :param max_age: Seconds a cached session is used
+        :param clock: Function returning the current (wall clock) time in seconds
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.clock = clock
+
+    def _path(self, host, port, user):
+        key = hashlib.sha256('{0}:{1}:{2}'.format(host, port, user).encode()).hexdigest()
+        return os.path.join(self.directory, 'ambari-session-{0}.json'.format(key))
+
+    def get(self, host, port, user):
+        """
+        :return: The cached session id, None if there is no valid entry
+        """
+        try:
+            with open(self._path(host, port, user)) as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('expires', 0) <= self.clock():
+            return None
+        return entry.get('session_id')
+
+    def put(self, host, port, user, session_id):
+        """
+        Store a session id, readable for the current user only
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.ambari-session-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump({'session_id': session_id, 'expires': self.clock() + self.max_age}, tmp_file)
+            os.replace(tmp_path, self._path(host, port, user))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def invalidate(self, host, port, user, session_id):
+        """
+        Remove the entry if it still holds the given session id (another process might have stored a newer one)
+        """
+        if self.get(host, port, user) == session_id:
+            try:
+                os.remove(self._path(host, port, user))
+            except OSError:
+                pass
@@ -0,0 +1,87 @@
+class ClusterSnapshot:
+    """
+    State of all services, components and host components of a cluster, taken with a single Ambari call
+
+    The snapshot answers the questions the smoketests ask Ambari per component (are all components started, where do
+    they run) without further calls. The component and state info is returned in the same format as the per component
+    calls of the Api.
+    """
+
+    FIELDS = ['ServiceInfo/service_name',
+              'components/ServiceComponentInfo/state',
+              'components/ServiceComponentInfo/started_count',
+              'components/ServiceComponentInfo/total_count',
+              'components/host_components/HostRoles/state',
+              'components/host_components/HostRoles/ha_state']
+
+    def __init__(self, clustername, services_info):
+        """
+        :param clustername: Name of the cluster
+        :param services_info: The response of the Ambari services call with the FIELDS
+        """
+        self.clustername = clustername
+        self.components = {}
+        for service_info in services_info['items']:
+            service = service_info['ServiceInfo']['service_name']
+            for component_info in service_info.get('components', []):
+                component = component_info['ServiceComponentInfo']['component_name']
+                self.components[(service, component)] = component_info
+
+    def _get_component(self, service, component_name):
+        if (service, component_name) not in self.components:
+            raise KeyError("Component {0}/{1} not found in cluster {2}".format(service, component_name,
+                                                                               self.clustername))
+        return self.components[(service, component_name)]
+
+    def get_services(self):
+        """
+        :return: Sorted list of the services of the cluster
+        """
+        return sorted(set(service for service, component in self.components))
+
+    def get_service_components(self, service):
+        """
+        :return: Sorted list of the component names of a service
+        """
+        return sorted(component for component_service, component in self.components if component_service == service)
+
+    def get_component_state(self, service, component_name):
+        """
+        :return: A dict {'ServiceComponentInfo': {'state': ..., 'started_count': ..., 'total_count': ...}}
+        """
+        return {'ServiceComponentInfo': self._get_component(service, component_name)['ServiceComponentInfo']}
+
+    def all_started(self, service, component_name):
+        """
+        :return: True if the component has the STARTED state on all its hosts
+        """
+        state_info = self.get_component_state(service, component_name)['ServiceComponentInfo']
+        return state_info['state'] == 'STARTED' and state_info['total_count'] == state_info['started_count']
+
+    def get_component_info(self, service, component_name):
+        """
+        :return: A dict {'ServiceComponentInfo': {...}, 'host_components': [{'HostRoles': {...}, 'href': ...}, ...]}
+        """
+        component_info = self._get_component(service, component_name)
+        host_components = []
+        for host_component in component_info.get('host_components', []):
+            host_roles = dict(host_component['HostRoles'])
+            href = host_component.get('href', '{0}/hosts/{1}/host_components/{2}'.format(
+                self.clustername, host_roles['host_name'], component_name))
+            host_components.append({'HostRoles': host_roles, 'href': href})
+        return {'ServiceComponentInfo': dict(component_info['ServiceComponentInfo']),
+                'host_components': host_components}
+
+    def get_host_states(self, service, component_name):
+        """
+        :return: A dict {host: state, ...} for all hosts running the component
+        """
+        return {host_component['HostRoles']['host_name']: host_component['HostRoles'].get('state')
+                for host_component in self._get_component(service, component_name).get('host_components', [])}
+
+    def get_host_ha_states(self, service, component_name):
+        """
+        :return: A dict {host: ha_state, ...} with the ha_state like Ambari reports it ('ACTIVE'), None if it has none
+        """
+        return {host_component['HostRoles']['host_name']: host_component['HostRoles'].get('ha_state')
+                for host_component in self._get_component(service, component_name).get('host_components', [])}
@@ -0,0 +1,72 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'\s*')
+
+
+class StreamingJsonError(Exception):
+    pass
+
+
+def iter_json_array(chunks, key, encoding='utf-8'):
+    """
+    Yield the items of the array with the given key of a JSON document while the document arrives
+
+    Only the item that is being parsed is kept in memory, so the first items are available before the whole
+    document is received and a response with thousands of items never has to be held completely.
+
+    :param chunks: Iterable of bytes, the JSON document in pieces (e.g. response.iter_content())
+    :param key: The key of the array ('host_components' for example)
+    :param encoding: Encoding of the document
+    :return: Generator of the decoded array items
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    start_of_array = re.compile(r'"{0}"\s*:\s*\['.format(re.escape(key)))
+    buffer = ''
+    in_array = False
+    chunks = iter(chunks)
+    end_of_document = False
+
+    while True:
+        if not in_array:
+            match = start_of_array.search(buffer)
+            if match is not None:
+                in_array = True
+                buffer = buffer[match.end():]
+            else:
+                # Keep a tail in case the key is split over two chunks
+                buffer = buffer[-(len(key) + 64):]
+        if in_array:
+            position = WHITESPACE.match(buffer).end()
+            if position < len(buffer) and buffer[position] == ',':
+                position = WHITESPACE.match(buffer, position + 1).end()
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            if position < len(buffer):
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if end_of_document:
+                        raise StreamingJsonError("Invalid JSON in array {0}".format(key))
+                else:
+                    # A number (or literal) may continue in the next chunk ('12' of '1234', '5' of '5.25'), it is only
+                    # complete when a delimiter follows. Objects, arrays and strings end with their own delimiter
+                    if end_of_document or buffer[position] in '{["' or \
+                            (end < len(buffer) and (buffer[end] in ',]' or buffer[end].isspace())):
+                        buffer = buffer[end:]
+                        yield item
+                        continue
+            else:
+                buffer = ''
+
+        if end_of_document:
+            if in_array:
+                raise StreamingJsonError("JSON document ended inside array {0}".format(key))
+            return
+        try:
+            buffer += text_decoder.decode(next(chunks))
+        except StopIteration:
+            buffer += text_decoder.decode(b'', final=True)
+            end_of_document = True
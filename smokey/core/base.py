@@ -46,14 +46,18 @@ class SmokeTest(BaseSmokeTest):
         self.kill_realization_timeout = kill_realization_timeout
         self.filter_component_state = filter_component_state
         self.ambari = api.Api(logger=self.logger)
+        self.snapshot = None
 
     def _all_started(self):
         """
         Check in AMBARI if all components have the STARTED state
 
+        Takes a snapshot of the whole cluster, which is reused to pick the component to stop
+
         :return: True if all components are started
         """
-        return self.ambari.check_if_all_components_started(self.service, self.component)
+        self.snapshot = self.ambari.get_cluster_snapshot()
+        return self.snapshot.all_started(self.service, self.component)
 
     def _get_component_info(self):
         """
@@ -61,7 +65,9 @@ class SmokeTest(BaseSmokeTest):
 
         :return: List of locations
         """
-        return self.ambari.get_component_info(self.service, self.component)
+        if self.snapshot is None:
+            self.snapshot = self.ambari.get_cluster_snapshot()
+        return self.snapshot.get_component_info(self.service, self.component)
 
     def _get_random_component(self, components):
         """
@@ -71,7 +77,9 @@ class SmokeTest(BaseSmokeTest):
         """
         if self.filter_component_state is not None:
             info = {}
-            host_hastate = self.ambari.get_component_host_hastate(self.service, self.component)
+            if self.snapshot is None:
+                self.snapshot = self.ambari.get_cluster_snapshot()
+            host_hastate = self.snapshot.get_host_ha_states(self.service, self.component)
             filter_hosts = [host for host, hastate in host_hastate.items() if hastate == self.filter_component_state]
             info['host_components'] = [host for host in components['host_components'] if
                                        host['HostRoles']['host_name'] not in filter_hosts]
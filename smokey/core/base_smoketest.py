@@ -1,10 +1,12 @@
 import logging
+import os
 import sys
 import time
 import random
 
 import command.command
-from core.verification import Verifier, VerificationError
+from core.schedule import VerificationScheduler, run_sequentially
+from core.verification import Verifier, VerificationError, run_verifiers
 
 
 class KillError(Exception):
@@ -49,6 +51,17 @@ class BaseSmokeTest:
         self.verify_loop_sleep_time = verify_loop_sleep_time
         self.verification_count = verification_count
         self.verifiers = Verifier(logger=self.logger)
+        # Run the verifiers one after another unless SMOKETEST_VERIFIER_PARALLELISM is larger than 1
+        self.verifier_parallelism = int(os.environ.get('SMOKETEST_VERIFIER_PARALLELISM', 1))
+        verifier_timeout = os.environ.get('SMOKETEST_VERIFIER_TIMEOUT')
+        self.verifier_timeout = None if verifier_timeout is None else float(verifier_timeout)
+        # Schedule the verifications while the component is stopped in a window of SMOKETEST_VERIFICATION_WINDOW
+        # seconds by the tier of the verifiers, instead of verification_count rounds of all verifiers
+        verification_window = os.environ.get('SMOKETEST_VERIFICATION_WINDOW')
+        self.verification_window = None if verification_window is None else float(verification_window)
+        self.verifier_durations = {}
+        # Verifiers that timed out and may still be running, they are not run again until they have finished
+        self.abandoned_verifiers = {}
 
         if self.stop_type == 'KILL':
             if self.process_user is None or self.process_indicator is None:
@@ -159,6 +172,24 @@ class BaseSmokeTest:
             verifiers = [verifiers]
         return verifiers
 
+    def _verify(self, verifiers=None, durations=None):
+        """
+        Run the verifiers one after another, stopping at the first error. With verifier_parallelism larger than 1 or a
+        verifier_timeout they run with core.verification.run_verifiers instead, also when there is only one:
+        concurrently up to verifier_parallelism, failing when they time out and skipping the ones that are still
+        running after they timed out earlier (see abandoned_verifiers), raising one error for all verifiers that failed
+
+        :param verifiers: The verifiers to run, default all verifiers
+        :param durations: Dict that is updated with the seconds every verifier took, default verifier_durations
+        """
+        verifiers = self._get_verifiers() if verifiers is None else verifiers
+        durations = self.verifier_durations if durations is None else durations
+        if self.verifier_parallelism > 1 or self.verifier_timeout is not None:
+            run_verifiers(verifiers, parallelism=self.verifier_parallelism, timeout=self.verifier_timeout,
+                          logger=self.logger, durations=durations, abandoned=self.abandoned_verifiers)
+        else:
+            run_sequentially(verifiers, durations)
+
     def get_verifiers(self):
         """
         What verifier should be used
@@ -167,6 +198,13 @@ class BaseSmokeTest:
         """
         return self.verifiers
 
+    def _close_verifiers(self):
+        for verifier in self._get_verifiers():
+            try:
+                verifier.close()
+            except Exception as e:
+                self.logger.warning("Unable to close {0}: {1}".format(verifier.__class__.__name__, e))
+
     def run(self):
         """
         Run method to execute the smoketest steps
@@ -177,8 +215,7 @@ class BaseSmokeTest:
         try:
             if self._all_started():
                 self.logger.info("All {0} services in normal state.".format(self.component))
-                for verifier in self._get_verifiers():
-                    verifier.verify()
+                self._verify()
                 self.logger.info("Verifier OK too. Starting smoke test now!")
                 rnd_host, rnd_component_location = self._get_random_component(self._get_component_info())
                 self.logger.info("Stopping the {0} on {1}".format(self.component, rnd_host))
@@ -204,15 +241,22 @@ class BaseSmokeTest:
             if type(e) is KillError:
                 self.logger.error("Error stopping process with kill!!")
             sys.exit(1)
+        finally:
+            self._close_verifiers()
 
     def do_verifications(self, rnd_component_location, rnd_host):
         # loop
         counter = self.verification_count
         time.sleep(self.stop_realization_timeout)  # wait for other components to realize the component
         # is stopped to prevent the verifier from returning error
+        if self.verification_window is not None:
+            scheduler = VerificationScheduler(self._get_verifiers(), self.verification_window, run=self._verify,
+                                              durations=self.verifier_durations, logger=self.logger)
+            for verifier, count in scheduler.run().items():
+                self.logger.info("Verified {0} times with {1}".format(count, verifier.__class__.__name__))
+            counter = 0
         while counter > 0:
-            for verifier in self._get_verifiers():
-                verifier.verify()
+            self._verify()
             counter -= 1
             time.sleep(self.verify_loop_sleep_time)
 
@@ -223,5 +267,4 @@ class BaseSmokeTest:
         self.logger.info(
             "All {0} components in normal state? {1}".format(self.component, self._all_started()))
         self.logger.info("Final check of {0} with the verifier".format(self.component))
-        for verifier in self._get_verifiers():
-            verifier.verify()
+        self._verify()
@@ -0,0 +1,99 @@
+import logging
+import time
+
+from core.verification import TIER_INTERVALS
+
+
+def run_sequentially(verifiers, durations):
+    """
+    Verify the verifiers one after another, stopping at the first error
+
+    :param durations: Dict that is updated with the seconds every verifier took
+    """
+    for verifier in verifiers:
+        start = time.monotonic()
+        verifier.verify()
+        durations[verifier] = time.monotonic() - start
+
+
+def get_interval(verifier):
+    """
+    :return: Seconds between the verifications of the verifier, None when it is verified once
+    """
+    return (verifier.schedule_interval if verifier.schedule_interval is not None
+            else TIER_INTERVALS.get(verifier.tier))
+
+
+class VerificationScheduler:
+    """
+    Schedule the verifications of verifiers in a time window (the time a component is stopped), each verifier at its
+    own interval (see core.verification.Verifier)
+
+    All verifiers are verified at the start of the window, then cheap verifiers again and again at short intervals and
+    expensive ones rarely or not at all, so the health of the services is sampled densely without submitting a job
+    every time. The verifiers that are due at the same moment are verified together. A verifier is not started when
+    the window ends before its last verification would have finished (only verifiers that have not run yet are always
+    started), so the window is not overrun by jobs.
+    """
+
+    def __init__(self, verifiers, window, run=run_sequentially, durations=None, clock=time.monotonic,
+                 sleep=time.sleep, logger=logging):
+        """
+        :param verifiers: List of Verifiers
+        :param window: Seconds to schedule verifications in
+        :param run: Function verifying a list of verifiers and updating a dict with their durations, raising a
+        VerificationError when a verification fails (see run_sequentially and core.verification.run_verifiers)
+        :param durations: Known seconds per verifier, like the durations of an earlier verification
+        :param clock: Function returning the current time in seconds
+        :param sleep: Function sleeping a number of seconds
+        :param logger: logger instance
+        :raises ValueError: When the interval of a verifier is not positive
+        """
+        for verifier in verifiers:
+            interval = get_interval(verifier)
+            if interval is not None and interval <= 0:
+                raise ValueError("Interval {0} of {1} is not positive".format(interval, verifier.__class__.__name__))
+        self.verifiers = list(verifiers)
+        self.window = window
+        self.run_verifiers = run
+        self.durations = {} if durations is None else dict(durations)
+        self.clock = clock
+        self.sleep = sleep
+        self.logger = logger
+        self.verifications = {verifier: 0 for verifier in self.verifiers}
+
+    def _fits(self, verifier, remaining):
+        return self.verifications[verifier] == 0 or self.durations.get(verifier, 0.0) <= remaining
+
+    def run(self):
+        """
+        Verify until the end of the window
+
+        :return: A dict {verifier: number of verifications}
+        """
+        start = self.clock()
+        end = start + self.window
+        due = {verifier: start for verifier in self.verifiers}
+        while len(due) > 0:
+            now = self.clock()
+            for verifier in [verifier for verifier in due if not self._fits(verifier, end - now)]:
+                self.logger.info("No time left for another verification with {0}".format(verifier.__class__.__name__))
+                del due[verifier]
+            batch = [verifier for verifier in self.verifiers if verifier in due and due[verifier] <= now]
+            if len(batch) > 0:
+                self.logger.info("Verifying with {0}".format(
+                    ', '.join(verifier.__class__.__name__ for verifier in batch)))
+                self.run_verifiers(batch, self.durations)
+                for verifier in batch:
+                    self.verifications[verifier] += 1
+                    interval = get_interval(verifier)
+                    if interval is None:
+                        del due[verifier]
+                    else:
+                        # Skip the moments missed while verifying instead of catching up with a burst
+                        due[verifier] += interval * (int((self.clock() - due[verifier]) // interval) + 1)
+                continue
+            due = {verifier: moment for verifier, moment in due.items() if moment < end}
+            if len(due) > 0:
+                self.sleep(max(0.0, min(min(due.values()), end) - now))
+        return self.verifications
@@ -1,15 +1,53 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+
+# Cost tiers of verifiers: REST/RPC probes, HDFS reads and writes, and jobs (YARN applications, beeline queries) that
+# cost a JVM and containers
+TIER_PROBE = 'probe'
+TIER_IO = 'io'
+TIER_JOB = 'job'
+# Default seconds between the verifications of a tier while the component is stopped, None verifies once
+TIER_INTERVALS = {TIER_PROBE: 1, TIER_IO: 30, TIER_JOB: None}
+
+
 class VerificationError(Exception):
     pass
 
 
+class AggregateVerificationError(VerificationError):
+    """
+    The errors of verifiers that ran concurrently, errors is a list of (verifier, exception)
+    """
+
+    def __init__(self, errors):
+        super().__init__("{0} verifier(s) failed: {1}".format(len(errors), '; '.join(
+            "{0}: {1}".format(verifier.__class__.__name__, error) for verifier, error in errors)))
+        self.errors = errors
+
+
 class Verifier:
     """
     Verifier can be extended to accommodate specific verifying of components under test
 
     The SmokeTest class uses the verify() method to check if the functionality of the component under test is still
     functioning ok. The verify method should raise a VerificationError if something is wrong.
+
+    When the verifiers run concurrently (see run_verifiers) verifiers sharing one of their exclusive_tags (an HDFS path
+    or the output of a job, for example) never run at the same time, and a verifier taking longer than its timeout (in
+    seconds) fails.
+
+    When the verifications are scheduled in a time window (see core.schedule.VerificationScheduler) a verifier is
+    verified every schedule_interval seconds, by default the interval of its cost tier (see TIER_INTERVALS).
     """
 
+    exclusive_tags = frozenset()
+    timeout = None
+    tier = TIER_IO
+    schedule_interval = None
+
     def __init__(self, logger):
         self.logger = logger
 
@@ -21,3 +59,112 @@ class Verifier:
         """
         self.logger.info("Verify functionality")
         raise VerificationError("Error verifying functionality")
+
+    def close(self):
+        """
+        Remove what the verifier keeps between verifications (files, threads), called when the smoketest ends
+        """
+        pass
+
+
+def _start(verifier):
+    """
+    Verify on a new (daemon) thread, a verifier that hangs does not take the place of other verifiers or block the exit
+
+    :return: The Future of the verification
+    """
+    future = Future()
+
+    def verify():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(verifier.verify())
+            except BaseException as e:
+                future.set_exception(e)
+
+    threading.Thread(target=verify, name='verifier-{0}'.format(verifier.__class__.__name__), daemon=True).start()
+    return future
+
+
+def run_verifiers(verifiers, parallelism=4, timeout=None, logger=logging, durations=None, abandoned=None):
+    """
+    Run verifiers concurrently, each on its own thread, in the given order as far as their exclusive tags allow
+
+    A verifier that times out is abandoned: it keeps running on its thread (threads cannot be stopped) and keeps its
+    tags, but no longer counts against the parallelism. Until it has finished it is not run again and the verifiers
+    that share a tag with it are not run and fail too, also in later runs with the same abandoned dict.
+
+    :param verifiers: List of Verifiers
+    :param parallelism: Maximum number of verifiers running at the same time, abandoned verifiers not included
+    :param timeout: Seconds a verifier may take when it has no timeout of its own, None waits forever
+    :param logger: logger instance
+    :param durations: Optional dict that is updated with the seconds every finished verifier took
+    :param abandoned: Optional dict {verifier: future} of the verifiers that timed out in earlier runs, updated with the
+    verifiers that time out and finish
+    :raises AggregateVerificationError: With the errors of all verifiers that failed, timed out or were not run
+    """
+    abandoned = {} if abandoned is None else abandoned
+    pending = list(verifiers)
+    running = {}
+    errors = []
+    held_tags = set()
+
+    def release_abandoned():
+        for verifier, future in list(abandoned.items()):
+            if future.done():
+                del abandoned[verifier]
+                logger.info("{0} finished after it timed out".format(verifier.__class__.__name__))
+
+    def fail_blocked():
+        for verifier in list(pending):
+            if verifier in abandoned:
+                pending.remove(verifier)
+                errors.append((verifier, VerificationError("not run, {0} still runs after it timed out".format(
+                    verifier.__class__.__name__))))
+                continue
+            for other in abandoned:
+                if not other.exclusive_tags.isdisjoint(verifier.exclusive_tags):
+                    pending.remove(verifier)
+                    errors.append((verifier, VerificationError("not run, {0} with the same exclusive tags timed out"
+                                                               .format(other.__class__.__name__))))
+                    break
+
+    release_abandoned()
+    for verifier in abandoned:
+        held_tags.update(verifier.exclusive_tags)
+    fail_blocked()
+    while len(pending) > 0 or len(running) > 0:
+        for verifier in list(pending):
+            if len(running) >= parallelism:
+                break
+            if held_tags.isdisjoint(verifier.exclusive_tags):
+                pending.remove(verifier)
+                held_tags.update(verifier.exclusive_tags)
+                verifier_timeout = timeout if verifier.timeout is None else verifier.timeout
+                started = time.monotonic()
+                deadline = None if verifier_timeout is None else started + verifier_timeout
+                running[_start(verifier)] = (verifier, deadline, started)
+        deadlines = [deadline for verifier, deadline, started in running.values() if deadline is not None]
+        wait_time = None if len(deadlines) == 0 else max(0.0, min(deadlines) - time.monotonic())
+        done, _ = wait(list(running), timeout=wait_time, return_when=FIRST_COMPLETED)
+        for future in done:
+            verifier, deadline, started = running.pop(future)
+            held_tags.difference_update(verifier.exclusive_tags)
+            if durations is not None:
+                durations[verifier] = time.monotonic() - started
+            if future.exception() is not None:
+                logger.error("{0} failed: {1}".format(verifier.__class__.__name__, future.exception()))
+                errors.append((verifier, future.exception()))
+        now = time.monotonic()
+        for future, (verifier, deadline, started) in list(running.items()):
+            if future not in done and deadline is not None and deadline <= now:
+                del running[future]
+                abandoned[verifier] = future
+                if durations is not None:
+                    durations[verifier] = now - started
+                error = VerificationError("{0} timed out".format(verifier.__class__.__name__))
+                logger.error(str(error))
+                errors.append((verifier, error))
+                fail_blocked()
+    if len(errors) > 0:
+        raise AggregateVerificationError(errors)
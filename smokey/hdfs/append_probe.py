@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+
+from hdfs.statistics import summarize_phase
+
+# Every append is one record: a zero padded sequence number and a newline
+RECORD_FORMAT = "{0:015d}\n"
+
+
+class AppendProbeError(Exception):
+    pass
+
+
+class AppendProbe:
+    """
+    Append records to an HDFS file at a steady rate in a background thread, measuring the latency of every append and
+    how long appends stall
+
+    Every append goes through a new write pipeline (see HdfsApi.append_to_hdfs), so when a DataNode of the pipeline
+    dies the append fails or hangs until the pipeline is recovered or the NameNode stops choosing the DataNode. A stall
+    starts with the first append that fails or takes longer than stall_threshold seconds and ends when an append
+    succeeds again; its duration is how long a writer would have hung.
+    """
+
+    def __init__(self, hdfs, path, interval=1.0, stall_threshold=5.0, logger=logging):
+        """
+        :param hdfs: The HdfsApi appending to the file
+        :param path: Path of the file in HDFS, overwritten when the probe starts
+        :param interval: Seconds between the starts of consecutive appends
+        :param stall_threshold: Seconds after which a successful append counts as stalled
+        :param logger: logger instance
+        """
+        self.hdfs = hdfs
+        self.path = path
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.logger = logger
+        self.latencies = []
+        self.failures = 0
+        self.stalls = []
+        self.acknowledged = []
+        self._sequence = 0
+        self._stall_start = None
+        self._started = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Create the (empty) file and start appending
+        """
+        self.hdfs.stream_to_hdfs(self.path, [])
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='append-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop appending, waiting for the running append to finish
+
+        :return: The summary (see summary)
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.summary()
+
+    def _run(self):
+        next_append = time.monotonic()
+        while not self._stopped.wait(max(0.0, next_append - time.monotonic())):
+            next_append += self.interval
+            self.append()
+
+    def append(self):
+        """
+        Append the next record and record its latency, or the failure
+        """
+        sequence = self._sequence
+        self._sequence += 1
+        start = time.monotonic()
+        try:
+            self.hdfs.append_to_hdfs(self.path, RECORD_FORMAT.format(sequence).encode())
+        except Exception as e:
+            self.logger.warning("Append {0} to {1} failed: {2}".format(sequence, self.path, e))
+            with self._lock:
+                self.failures += 1
+                if self._stall_start is None:
+                    self._stall_start = start
+            return
+        end = time.monotonic()
+        with self._lock:
+            self.latencies.append(end - start)
+            self.acknowledged.append(sequence)
+            if end - start > self.stall_threshold and self._stall_start is None:
+                self._stall_start = start
+            if self._stall_start is not None:
+                self.stalls.append(end - self._stall_start)
+                self.logger.warning("Appends to {0} stalled for {1:.1f}s".format(self.path, self.stalls[-1]))
+                self._stall_start = None
+
+    def longest_stall(self):
+        """
+        :return: Seconds of the longest stall, including a stall that has not ended yet
+        """
+        with self._lock:
+            stalls = list(self.stalls)
+            if self._stall_start is not None:
+                stalls.append(time.monotonic() - self._stall_start)
+        return max(stalls) if len(stalls) > 0 else 0.0
+
+    def summary(self):
+        """
+        :return: The append statistics (see statistics.summarize_phase) with the list of 'stalls' in seconds and
+        the 'longest_stall'
+        """
+        with self._lock:
+            latencies = list(self.latencies)
+            failures = self.failures
+            stalls = list(self.stalls)
+        seconds = 0.0 if self._started is None else time.monotonic() - self._started
+        summary = summarize_phase(latencies, len(latencies) * len(RECORD_FORMAT.format(0)), seconds, failures)
+        summary['stalls'] = stalls
+        summary['longest_stall'] = self.longest_stall()
+        return summary
+
+    def verify_content(self):
+        """
+        Check that the file holds every acknowledged record, in order. A failed append may have been written anyway
+        (the response was lost), so records that were not acknowledged are allowed
+
+        :raises AppendProbeError: when a record is missing, out of order or corrupted
+        """
+        with self._lock:
+            acknowledged = list(self.acknowledged)
+        lines = self.hdfs.get_remote_file(self.path).decode(errors='replace').split('\n')
+        try:
+            # The last line is incomplete while an append is running
+            sequences = [int(line) for line in lines[:-1]]
+        except ValueError as e:
+            raise AppendProbeError("File {0} holds a corrupted record: {1}".format(self.path, e))
+        if sequences != sorted(set(sequences)):
+            raise AppendProbeError("The records in {0} are not in order".format(self.path))
+        missing = sorted(set(acknowledged) - set(sequences))
+        if len(missing) > 0:
+            raise AppendProbeError("{0} acknowledged records are missing from {1}, the first is {2}".format(
+                len(missing), self.path, missing[0]))
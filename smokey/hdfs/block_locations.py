@@ -0,0 +1,160 @@
+import logging
+import re
+import threading
+
+# fsck output lines of a file and of a block of that file, like 'hdfs fsck <path> -files -blocks -locations' prints
+# them. Hadoop 2.7+ prints the locations as DatanodeInfoWithStorage[ip:port,storage,type], older versions (and -racks)
+# as /rack/ip:port
+FSCK_FILE_REGEX = re.compile(r"^(/\S*) (\d+) bytes,.* (\d+) block\(s\)")
+# The block header up to the location list, which is captured whole: every replica is in it, with nested brackets
+FSCK_BLOCK_REGEX = re.compile(r"^\d+\. \S+ len=(\d+) [^\[]*\[(.*)\]\s*$")
+FSCK_LOCATION_REGEX = re.compile(r"(?<![\-\d.])(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):\d+")
+
+
+class BlockLocationError(Exception):
+    pass
+
+
+def parse_fsck_lines(lines):
+    """
+    Parse fsck output line by line, so the output of directories with many files and blocks is never held in memory
+
+    :param lines: Iterable of the lines of 'hdfs fsck <path> -files -blocks -locations' output
+    :return: Generator of (path, length, blocks) per file, blocks is a list of dicts with the 'offset', 'length' and
+    'ips' (the addresses of the DataNodes storing the block)
+    """
+    path = None
+    length = 0
+    blocks = []
+    for line in lines:
+        file_match = FSCK_FILE_REGEX.match(line)
+        if file_match is not None:
+            if path is not None:
+                yield path, length, blocks
+            path, length, blocks = file_match.group(1), int(file_match.group(2)), []
+            continue
+        block_match = FSCK_BLOCK_REGEX.match(line)
+        if block_match is not None and path is not None:
+            offset = blocks[-1]['offset'] + blocks[-1]['length'] if len(blocks) > 0 else 0
+            blocks.append({'offset': offset, 'length': int(block_match.group(1)),
+                           'ips': FSCK_LOCATION_REGEX.findall(block_match.group(2))})
+    if path is not None:
+        yield path, length, blocks
+
+
+class BlockLocationIndex:
+    """
+    Index of the DataNode hosts storing every block of files in HDFS
+
+    The locations come from WebHDFS GETFILEBLOCKLOCATIONS, which reports the host names of the DataNodes. NameNodes
+    without that operation (Hadoop 2) are asked for fsck output instead, which is parsed while it is received and
+    reports addresses that are resolved to host names by the resolver of the HdfsApi (see resolver.HostResolver).
+    Addresses without a host name are kept as they are.
+
+    The blocks of a file are cached with the modification time and length of the file, so a file that is rewritten
+    is looked up again. HdfsApi invalidates the files it writes or deletes itself.
+    """
+
+    def __init__(self, hdfs, logger=logging):
+        """
+        :param hdfs: The HdfsApi used to ask the NameNode
+        :param logger: logger instance
+        """
+        self.hdfs = hdfs
+        self.logger = logger
+        self.use_block_locations_api = True
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, path=None):
+        """
+        Forget the blocks of a file, or of all files in a directory
+
+        :param path: Path of the file or directory, None forgets all files
+        """
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                return
+            prefix = path.rstrip('/') + '/'
+            for cached_path in [cached_path for cached_path in self._files
+                                if cached_path == path or cached_path.startswith(prefix)]:
+                del self._files[cached_path]
+
+    def get_blocks(self, path, status=None):
+        """
+        :param path: Path of a file
+        :param status: The FileStatus of the file if it is known already
+        :return: List of the blocks of the file, dicts with the 'offset', 'length' and 'hosts' storing the block
+        """
+        if status is None:
+            status = self.hdfs.get_file_status(path)
+        version = (status['modificationTime'], status['length'])
+        with self._lock:
+            cached = self._files.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        blocks = self._fetch_blocks(path)
+        with self._lock:
+            self._files[path] = (version, blocks)
+        return blocks
+
+    def index_directory(self, path):
+        """
+        Index the blocks of the files directly in a directory
+
+        :return: A dict {path: blocks} (see get_blocks)
+        """
+        statuses = [status for status in self.hdfs.list_status(path) if status['type'] == 'FILE']
+        if not self.use_block_locations_api:
+            self._index_with_fsck(path, statuses)
+        prefix = path.rstrip('/') + '/'
+        return {prefix + status['pathSuffix']: self.get_blocks(prefix + status['pathSuffix'], status=status)
+                for status in statuses}
+
+    def get_hosts(self, path):
+        """
+        :param path: Path of a file or a directory of files
+        :return: A dict {host: number of blocks stored on the host}
+        """
+        status = self.hdfs.get_file_status(path)
+        if status['type'] == 'DIRECTORY':
+            files = self.index_directory(path).values()
+        else:
+            files = [self.get_blocks(path, status=status)]
+        hosts = {}
+        for blocks in files:
+            for block in blocks:
+                for host in block['hosts']:
+                    hosts[host] = hosts.get(host, 0) + 1
+        return hosts
+
+    def _fetch_blocks(self, path):
+        if self.use_block_locations_api:
+            locations = self.hdfs.get_file_block_locations(path)
+            if locations is not None:
+                return [{'offset': location['offset'], 'length': location['length'],
+                         'hosts': list(location['hosts'])} for location in locations]
+            self.logger.warning("NameNode does not support GETFILEBLOCKLOCATIONS, falling back to fsck")
+            self.use_block_locations_api = False
+        blocks = dict(self._parse_fsck(path)).get(path)
+        if blocks is None:
+            raise BlockLocationError("No block information found for file {0} in the fsck output".format(path))
+        return blocks
+
+    def _index_with_fsck(self, path, statuses):
+        # One fsck call for all files in the directory instead of one per file
+        versions = {path.rstrip('/') + '/' + status['pathSuffix']: (status['modificationTime'], status['length'])
+                    for status in statuses}
+        for file_path, blocks in self._parse_fsck(path):
+            if file_path in versions:
+                with self._lock:
+                    self._files[file_path] = (versions[file_path], blocks)
+
+    def _parse_fsck(self, path):
+        files = [(file_path, blocks) for file_path, length, blocks in parse_fsck_lines(self.hdfs.iter_fsck_lines(path))]
+        hosts = self.hdfs.resolver.resolve_all(ip for file_path, blocks in files for block in blocks
+                                               for ip in block['ips'])
+        return [(file_path, [{'offset': block['offset'], 'length': block['length'],
+                              'hosts': [hosts.get(ip, ip) for ip in block['ips']]} for block in blocks])
+                for file_path, blocks in files]
@@ -0,0 +1,190 @@
+import hashlib
+import struct
+
+try:
+    import crc32c
+except ImportError:
+    crc32c = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# dfs.bytes-per-checksum, the number of bytes covered by one CRC
+BYTES_PER_CRC = 512
+CRC32C_POLYNOMIAL = 0x82F63B78
+MASK = 0xFFFFFFFF
+
+
+def _crc32c_tables():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ CRC32C_POLYNOMIAL if crc & 1 else crc >> 1
+        table.append(crc)
+    # Slicing by 4: tables[k][i] is the crc of byte i followed by k zero bytes
+    tables = [table]
+    for _ in range(3):
+        tables.append([(crc >> 8) ^ table[crc & 0xFF] for crc in tables[-1]])
+    return tables
+
+
+_TABLES = _crc32c_tables()
+_numpy_tables = None
+
+
+def crc32c_python(data, value=0):
+    """
+    :return: The crc32c of data, continuing from value (the crc32c of the preceding data)
+    """
+    table = _TABLES[0]
+    crc = value ^ MASK
+    for byte in bytes(data):
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ MASK
+
+
+def _chunk_crcs_numpy(data, bytes_per_crc):
+    global _numpy_tables
+    if _numpy_tables is None:
+        _numpy_tables = [numpy.array(table, dtype=numpy.uint32) for table in _TABLES]
+    t0, t1, t2, t3 = _numpy_tables
+    # One row of little endian 32 bit words per chunk, transposed so the words at the same offset of all chunks are
+    # contiguous and the crcs of all chunks are calculated at the same time
+    words = numpy.frombuffer(data, dtype='<u4').reshape(-1, bytes_per_crc // 4).T.astype(numpy.uint32)
+    crcs = numpy.full(words.shape[1], MASK, dtype=numpy.uint32)
+    for column in words:
+        crcs ^= column
+        crcs = t3[crcs & 0xFF] ^ t2[(crcs >> 8) & 0xFF] ^ t1[(crcs >> 16) & 0xFF] ^ t0[crcs >> 24]
+    return (crcs ^ numpy.uint32(MASK)).astype('>u4').tobytes()
+
+
+def chunk_crcs(data, bytes_per_crc=BYTES_PER_CRC):
+    """
+    Calculate the crc32c of every chunk of bytes_per_crc bytes of data, like a DataNode stores them in the block
+    metadata file
+
+    Uses the crc32c package if it is installed, otherwise numpy for the complete chunks, otherwise pure python.
+
+    :param data: bytes like object, the last chunk may be shorter than bytes_per_crc
+    :param bytes_per_crc: Number of bytes per crc
+    :return: The big endian 4 byte crcs of the chunks, concatenated
+    """
+    view = memoryview(data).cast('B')
+    if crc32c is not None:
+        return b''.join(struct.pack('>I', crc32c.crc32c(view[offset:offset + bytes_per_crc]))
+                        for offset in range(0, len(view), bytes_per_crc))
+    full = len(view) - len(view) % bytes_per_crc
+    if numpy is not None and bytes_per_crc % 4 == 0 and full > 0:
+        crcs = _chunk_crcs_numpy(view[:full], bytes_per_crc)
+    else:
+        crcs = b''.join(struct.pack('>I', crc32c_python(view[offset:offset + bytes_per_crc]))
+                        for offset in range(0, full, bytes_per_crc))
+    if full < len(view):
+        crcs += struct.pack('>I', crc32c_python(view[full:]))
+    return crcs
+
+
+def _java_buffer_size(length):
+    # Size of the array of a java ByteArrayOutputStream (32 bytes, doubled when full) holding length bytes
+    size = 32
+    while size < length:
+        size *= 2
+    return size
+
+
+def file_checksum(bytes_per_crc, crc_per_block, block_md5s):
+    """
+    :param bytes_per_crc: Bytes per crc of the blocks, 0 for a file without blocks
+    :param crc_per_block: Number of crcs of a complete block, 0 for a file with a single block
+    :param block_md5s: The md5s of the crcs of the blocks of the file
+    :return: The serialized MD5MD5CRC32FileChecksum (28 bytes) like WebHDFS returns it as hex string
+    """
+    md5s = b''.join(block_md5s)
+    # The NameNode client hashes the whole (zero padded) array of the buffer the block md5s were written to
+    md5s += bytes(_java_buffer_size(len(md5s)) - len(md5s))
+    return struct.pack('>iq', bytes_per_crc, crc_per_block) + hashlib.md5(md5s).digest()
+
+
+def checksum_algorithm(bytes_per_crc, crc_per_block):
+    """
+    :return: The name of the algorithm WebHDFS reports with the checksum
+    """
+    return "MD5-of-{0}MD5-of-{1}{2}".format(crc_per_block, bytes_per_crc, 'CRC32C' if bytes_per_crc > 0 else 'CRC32')
+
+
+class FileChecksum:
+    """
+    Hadoop's MD5-of-MD5-of-CRC32C file checksum, calculated locally from the content of a file
+
+    A DataNode stores the crc32c of every bytes_per_crc bytes of a block, the checksum of a block is the md5 of those
+    crcs and the checksum of the file is the md5 of the checksums of its blocks. The result only depends on the content,
+    the block size and the bytes per crc, so it can be compared with WebHDFS GETFILECHECKSUM without reading the file.
+    """
+
+    def __init__(self, block_size, bytes_per_crc=BYTES_PER_CRC):
+        """
+        :param block_size: Block size of the file in HDFS, a multiple of bytes_per_crc
+        :param bytes_per_crc: dfs.bytes-per-checksum of the cluster
+        """
+        if block_size % bytes_per_crc != 0:
+            raise ValueError("Block size {0} is not a multiple of {1} bytes per crc".format(block_size, bytes_per_crc))
+        self.block_size = block_size
+        self.bytes_per_crc = bytes_per_crc
+        self.block_md5s = []
+        self._block_md5 = hashlib.md5()
+        self._block_bytes = 0
+        self._buffer = bytearray()
+
+    def update(self, data):
+        view = memoryview(data).cast('B')
+        while len(view) > 0:
+            length = min(len(view), self.block_size - self._block_bytes)
+            self._add(view[:length])
+            view = view[length:]
+            if self._block_bytes == self.block_size:
+                self.block_md5s.append(self._block_md5.digest())
+                self._block_md5 = hashlib.md5()
+                self._block_bytes = 0
+
+    def _add(self, view):
+        # view does not cross a block boundary and the block size is a multiple of bytes_per_crc, so a complete
+        # buffer or the end of a block always ends a chunk
+        self._block_bytes += len(view)
+        if len(self._buffer) > 0:
+            length = min(len(view), self.bytes_per_crc - len(self._buffer))
+            self._buffer += view[:length]
+            view = view[length:]
+            if len(self._buffer) < self.bytes_per_crc and self._block_bytes < self.block_size:
+                return
+            self._block_md5.update(chunk_crcs(bytes(self._buffer), self.bytes_per_crc))
+            self._buffer = bytearray()
+        full = len(view) if self._block_bytes == self.block_size else len(view) - len(view) % self.bytes_per_crc
+        if full > 0:
+            self._block_md5.update(chunk_crcs(view[:full], self.bytes_per_crc))
+        self._buffer += view[full:]
+
+    def _block_count(self):
+        return len(self.block_md5s) + (1 if self._block_bytes > 0 else 0)
+
+    @property
+    def algorithm(self):
+        bytes_per_crc = self.bytes_per_crc if self._block_count() > 0 else 0
+        crc_per_block = self.block_size // self.bytes_per_crc if self._block_count() > 1 else 0
+        return checksum_algorithm(bytes_per_crc, crc_per_block)
+
+    def digest(self):
+        block_md5s = list(self.block_md5s)
+        if self._block_bytes > 0:
+            block_md5 = self._block_md5.copy()
+            if len(self._buffer) > 0:
+                block_md5.update(chunk_crcs(bytes(self._buffer), self.bytes_per_crc))
+            block_md5s.append(block_md5.digest())
+        bytes_per_crc = self.bytes_per_crc if len(block_md5s) > 0 else 0
+        crc_per_block = self.block_size // self.bytes_per_crc if len(block_md5s) > 1 else 0
+        return file_checksum(bytes_per_crc, crc_per_block, block_md5s)
+
+    def hexdigest(self):
+        return self.digest().hex()
@@ -1,3 +1,6 @@
+import os
+import random
+
 import core.base as base
 import hdfs.hdfs_api as hdfs_api
 import hdfs.hdfs_verifiers as hdfs_verifiers
@@ -9,18 +12,29 @@ class DatanodeSmokeTest(base.SmokeTest):
                          process_user='hdfs', process_indicator='SecureDataNodeStarter', stop_realization_timeout=15)
         active_nn = self.ambari.get_specific_nn_host(state='active')
         self.hdfs = hdfs_api.HdfsApi(logger=self.logger, active_nn_host=active_nn)
+        self.hdfs.resolver.preload(self.ambari.get_host_addresses())
         self.hdfs_filename = "/user/smoketest/hdfs_smoketest/hdfs_dn_test_file_with_known_md5.txt"
-        self.verifiers = hdfs_verifiers.HdfsDatanodeVerifier(logger=self.logger, active_nn_host=active_nn)
+        self.verifiers = [hdfs_verifiers.HdfsDatanodeVerifier(logger=self.logger, active_nn_host=active_nn)]
+        if os.environ.get('HDFS_LOAD_VERIFIER', 'false').lower() == 'true':
+            self.verifiers.append(hdfs_verifiers.HdfsLoadVerifier(logger=self.logger, ambari=self.ambari))
+        if os.environ.get('HDFS_APPEND_PROBE', 'false').lower() == 'true':
+            self.verifiers.append(hdfs_verifiers.HdfsAppendVerifier(logger=self.logger, ambari=self.ambari))
 
-    def _get_random_host_and_component_path(self):
+    def _get_random_component(self, components):
         """
-        Get a specific datanode host and path from AMBARI
+        Choose a random DataNode storing blocks of the test file, so the verification has to read those blocks from
+        other replicas
+
+        The locations of all blocks of the test file (or of all files if hdfs_filename is a directory) come from one
+        call to the block location index.
 
         :return: (hostname, component_path)
         """
-        info = self.ambari.get_component_info(self.service, self.component)
-        datanode_host = self.hdfs.get_host_location_of_first_block(self.hdfs_filename)
-        info['host_components'] = [host for host in info['host_components'] if
-                                   host['HostRoles']['host_name'] == datanode_host]
-
-        return self.ambari.get_random_host_and_component_path(info)
+        hosts = self.hdfs.block_locations.get_hosts(self.hdfs_filename)
+        host_components = [host_component for host_component in components['host_components']
+                           if host_component['HostRoles']['host_name'] in hosts]
+        if len(host_components) < 1:
+            raise hdfs_api.HdfsRequestError("No DataNode known to AMBARI stores blocks of {0}".format(
+                self.hdfs_filename))
+        host_component = random.choice(host_components)
+        return host_component['HostRoles']['host_name'], host_component['href']
@@ -0,0 +1,209 @@
+import hashlib
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import crc32c
+except ImportError:
+    crc32c = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_TREE_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class UnknownDigestError(Exception):
+    pass
+
+
+class Crc:
+    """
+    hashlib like wrapper around a crc function f(data, value) -> value, the digest is the big endian crc
+    """
+
+    digest_size = 4
+
+    def __init__(self, name, function, value=0):
+        self.name = name
+        self.function = function
+        self.value = value
+
+    def update(self, data):
+        self.value = self.function(data, self.value)
+
+    def digest(self):
+        return struct.pack('>I', self.value & 0xFFFFFFFF)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+    def copy(self):
+        return Crc(self.name, self.function, self.value)
+
+
+def _digests():
+    digests = {'md5': hashlib.md5,
+               'sha1': hashlib.sha1,
+               'sha256': hashlib.sha256,
+               'blake2b': hashlib.blake2b,
+               'crc32': lambda: Crc('crc32', zlib.crc32)}
+    if crc32c is not None:
+        digests['crc32c'] = lambda: Crc('crc32c', crc32c.crc32c)
+    if xxhash is not None:
+        digests['xxh64'] = xxhash.xxh64
+        if hasattr(xxhash, 'xxh3_64'):
+            digests['xxh3_64'] = xxhash.xxh3_64
+    return digests
+
+
+# Digest name -> function returning a new hashlib like object (update, digest, hexdigest). crc32c and the xxhash
+# digests are only available when the crc32c or xxhash packages are installed
+DIGESTS = _digests()
+
+
+def available_digests():
+    """
+    :return: Sorted list of the names of the available digests
+    """
+    return sorted(DIGESTS)
+
+
+def new_digest(name):
+    """
+    :param name: Name of the digest ('md5', 'blake2b', 'crc32c', ...)
+    :return: A new hashlib like object
+    """
+    if name not in DIGESTS:
+        raise UnknownDigestError("Digest {0} is not available, choose one of {1}".format(
+            name, ', '.join(available_digests())))
+    return DIGESTS[name]()
+
+
+class TreeDigest:
+    """
+    Digest of the digests of the consecutive blocks of block_size bytes of the content
+
+    With threads > 1 the blocks are hashed on a thread pool while the content is being added; hashlib and zlib release
+    the GIL while hashing, so the blocks are hashed in parallel. The digests of blocks can also be set directly
+    (set_leaf_digest), for content that is read in ranges of block_size. The result only depends on the content,
+    the digest and the block size, not on the number of threads.
+    """
+
+    def __init__(self, name='md5', block_size=DEFAULT_TREE_BLOCK_SIZE, threads=1):
+        """
+        :param name: Name of the digest of the blocks and of the root (see DIGESTS)
+        :param block_size: Size of the blocks in bytes
+        :param threads: Number of threads hashing blocks, 1 hashes the blocks in the calling thread
+        """
+        new_digest(name)
+        self.name = name
+        self.block_size = block_size
+        self.threads = threads
+        self.leaf_digests = {}
+        self._index = 0
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._executor = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+    def _hash_leaf(self, data):
+        hash_builder = new_digest(self.name)
+        hash_builder.update(data)
+        return hash_builder.digest()
+
+    def _add_leaf(self, data):
+        index = self._index
+        self._index += 1
+        if self._executor is None:
+            self.leaf_digests[index] = self._hash_leaf(data)
+            return
+        self._pending.append((index, self._executor.submit(self._hash_leaf, data)))
+        # Bound the memory held by blocks waiting for a thread
+        while len(self._pending) > 2 * self.threads:
+            self._collect_oldest()
+
+    def _collect_oldest(self):
+        index, future = self._pending.popleft()
+        self.leaf_digests[index] = future.result()
+
+    def update(self, data):
+        view = memoryview(data)
+        while len(view) > 0:
+            if len(self._buffer) == 0 and len(view) >= self.block_size and isinstance(data, bytes):
+                # Immutable data is hashed without copying
+                self._add_leaf(view[:self.block_size])
+                view = view[self.block_size:]
+            else:
+                length = min(len(view), self.block_size - len(self._buffer))
+                self._buffer += view[:length]
+                view = view[length:]
+                if len(self._buffer) == self.block_size:
+                    self._add_leaf(bytes(self._buffer))
+                    self._buffer = bytearray()
+
+    def set_leaf_digest(self, index, digest):
+        """
+        :param index: Index of the block (the block starts at index * block_size)
+        :param digest: The (binary) digest of the block
+        """
+        self.leaf_digests[index] = digest
+
+    def digest(self):
+        while len(self._pending) > 0:
+            self._collect_oldest()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        digests = dict(self.leaf_digests)
+        if len(self._buffer) > 0:
+            digests[self._index] = self._hash_leaf(bytes(self._buffer))
+        return self._hash_leaf(b''.join(digests[index] for index in sorted(digests)))
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+def new_hash_builder(name='md5', block_size=None, threads=1):
+    """
+    :param name: Name of the digest
+    :param block_size: Block size of a TreeDigest, None for the plain digest of the content
+    :param threads: Number of threads hashing the blocks of a TreeDigest
+    :return: A hashlib like object
+    """
+    if block_size is None:
+        return new_digest(name)
+    return TreeDigest(name, block_size=block_size, threads=threads)
+
+
+def benchmark(names=None, size=256 * 1024 * 1024, chunk_size=1024 * 1024, block_size=DEFAULT_TREE_BLOCK_SIZE,
+              threads=4, content=None):
+    """
+    Measure the hashing throughput of the digests, plain and as TreeDigest on a thread pool
+
+    :param names: Names of the digests, default all available digests
+    :param size: Number of bytes hashed
+    :param chunk_size: Size of the chunks the content is passed in
+    :param block_size: Block size of the TreeDigest
+    :param threads: Number of threads of the TreeDigest
+    :param content: Content to hash (default zeros), size is ignored when given
+    :return: A list of dicts with the 'digest', 'mode' ('plain' or 'tree') and 'mb_per_second'
+    """
+    content = bytes(size) if content is None else bytes(content)
+    chunks = [content[offset:offset + chunk_size] for offset in range(0, len(content), chunk_size)]
+    results = []
+    for name in available_digests() if names is None else names:
+        for mode in ('plain', 'tree'):
+            hash_builder = new_hash_builder(name, block_size=block_size if mode == 'tree' else None, threads=threads)
+            start = time.monotonic()
+            for chunk in chunks:
+                hash_builder.update(chunk)
+            hash_builder.digest()
+            elapsed = time.monotonic() - start
+            results.append({'digest': name, 'mode': mode,
+                            'mb_per_second': len(content) / (1024 * 1024) / max(elapsed, 1e-9)})
+    return results
@@ -1,34 +1,119 @@
-import hashlib
 import logging
 import os
-import re
-import socket
-import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
 
 import requests
-from pywebhdfs.webhdfs import PyWebHdfsClient
+from requests.adapters import HTTPAdapter
 from requests_kerberos import HTTPKerberosAuth, OPTIONAL
 
+from hdfs.block_locations import BlockLocationIndex
+from hdfs.checksum import BYTES_PER_CRC, FileChecksum
+from hdfs.digest import TreeDigest, new_digest, new_hash_builder
+from hdfs.payload import Payload
+from hdfs.resolver import HostResolver
+
+
+# Number of hosts (NameNodes and DataNodes) a shared session keeps connections to
+SESSION_HOST_POOLS = 64
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+# Last known active NameNode per set of NameNodes, shared by all HdfsApis
+_active_namenodes = {}
+_active_namenodes_lock = threading.Lock()
+
 
 class HdfsRequestError(Exception):
     pass
 
 
+def get_shared_session(schema, host, port, kerberos=False, pool_size=10):
+    """
+    Get the pooled http session shared by all HdfsApis of a NameNode (or of the NameNodes of an HA pair)
+
+    The session keeps the connections to the NameNode and the DataNodes it redirects to alive, so verifications that
+    run again and again reuse their TCP (and TLS) connections. With kerberos the session has one HTTPKerberosAuth,
+    which keeps the security context per host, and a cookie jar holding the hadoop.auth cookie the NameNode returns
+    after the first SPNEGO negotiation, so later calls are authenticated by the cookie instead of a new negotiation.
+
+    :param host: The NameNode host, or the comma separated NameNode hosts of an HA pair
+    :param pool_size: Number of keep-alive connections per host, only used when the session is created
+    :return: (session, auth), auth is None without kerberos
+    """
+    key = (schema, host, str(port), kerberos)
+    with _shared_sessions_lock:
+        if key not in _shared_sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=SESSION_HOST_POOLS, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            auth = HTTPKerberosAuth(mutual_authentication=OPTIONAL, sanitize_mutual_error_response=False,
+                                    force_preemptive=True) if kerberos else None
+            _shared_sessions[key] = (session, auth)
+        return _shared_sessions[key]
+
+
+def close_shared_sessions():
+    """
+    Close the connections of all shared sessions
+    """
+    with _shared_sessions_lock:
+        for session, auth in _shared_sessions.values():
+            session.close()
+        _shared_sessions.clear()
+
+
 class HdfsApi:
-    def __init__(self, request_timeout=10, logger=logging, active_nn_host='localhost', kerberos=False):
+    """
+    WebHDFS client of a NameNode or of the NameNodes of an HA pair
+
+    With several NameNodes the calls go to the last known active NameNode, which is remembered for all HdfsApis of the
+    same NameNodes. When that NameNode is not reachable or answers with a StandbyException the call is repeated on the
+    other NameNodes, and the NameNode that answers becomes the known active one. So the active NameNode only has to be
+    looked up (in Ambari) once, not before every call.
+    """
+
+    def __init__(self, request_timeout=10, logger=logging, active_nn_host='localhost', kerberos=False,
+                 chunk_size=1024 * 1024, pool_size=10, resolver=None, namenode_hosts=None, user_name=None):
+        """
+        :param request_timeout: Timeout in seconds for a single HDFS call
+        :param logger: logger instance
+        :param active_nn_host: Host of the (active) NameNode, the first NameNode called unless another NameNode of
+        namenode_hosts is known to be active
+        :param kerberos: Use kerberos (SPNEGO) authentication
+        :param chunk_size: Size in bytes of the chunks files are streamed in
+        :param pool_size: Number of keep-alive connections kept open per NameNode/DataNode, the maximum useful
+        parallelism of ranged reads. The session is shared by the HdfsApis of a NameNode (see get_shared_session), the
+        first one determines the pool size
+        :param resolver: The HostResolver resolving DataNode addresses, shared by HdfsApis to share its cache. A new
+        resolver when None
+        :param namenode_hosts: All NameNode hosts of an HA pair, default only active_nn_host
+        :param user_name: The user.name of the WebHDFS and fsck calls without kerberos (simple authentication),
+        default the HDFS_USER_NAME environment variable. Not sent when None
+        """
         self.timeout = request_timeout
+        self.chunk_size = chunk_size
+        self.last_read_stats = None
         self.hdfs_schema = os.environ.get('HDFS_NAMENODE_SCHEMA', 'http')
-        self.hdfs_host = active_nn_host
+        self.namenode_hosts = [active_nn_host] if namenode_hosts is None else list(namenode_hosts)
+        if active_nn_host not in self.namenode_hosts:
+            self.namenode_hosts.insert(0, active_nn_host)
+        self._namenodes_key = tuple(sorted(self.namenode_hosts))
+        with _active_namenodes_lock:
+            self.hdfs_host = _active_namenodes.get(self._namenodes_key, active_nn_host)
         self.hdfs_port = os.environ.get('HDFS_NAMENODE_PORT', 50070)
-        if kerberos:
-            extra_opts = {'auth': HTTPKerberosAuth(mutual_authentication=OPTIONAL,
-                                                   sanitize_mutual_error_response=False,
-                                                   force_preemptive=True)}
-        else:
-            extra_opts = {}
-        self.webhdfs = PyWebHdfsClient(host=self.hdfs_host, port=self.hdfs_port,
-                                       request_extra_opts=extra_opts)
+        self.session, auth = get_shared_session(self.hdfs_schema, ','.join(self._namenodes_key), self.hdfs_port,
+                                                kerberos=kerberos, pool_size=pool_size)
+        self.request_extra_opts = {} if auth is None else {'auth': auth}
+        user_name = os.environ.get('HDFS_USER_NAME') if user_name is None else user_name
+        self.user_params = {} if kerberos or user_name is None else {'user.name': user_name}
         self.logger = logger
+        self.resolver = HostResolver(logger=logger) if resolver is None else resolver
+        self.block_locations = BlockLocationIndex(self, logger=logger)
 
     def request_namenode(self, path, method='GET', headers=None, **kwargs):
         self.logger.info("Calling HDFS API ({0})".format(path))
@@ -36,16 +121,81 @@ class HdfsApi:
             headers = dict()
 
         if path.startswith('http'):
-            hdfs_url = path
+            r = self.session.request(method, path, headers=headers, timeout=self.timeout, verify=False,
+                                     **self.request_extra_opts, **kwargs)
         else:
-            hdfs_url = '{0}://{1}:{2}/{3}'.format(self.hdfs_schema, self.hdfs_host, self.hdfs_port, path)
-        self.logger.debug(hdfs_url)
-        r = requests.request(method, hdfs_url, headers=headers, timeout=self.timeout, verify=False,
-                             auth=HTTPKerberosAuth(), **kwargs)
+            kwargs['params'] = dict(self.user_params, **(kwargs.get('params') or {}))
+            r = self._call_namenode(lambda namenode: self.session.request(
+                method, '{0}://{1}:{2}/{3}'.format(self.hdfs_schema, namenode, self.hdfs_port, path), headers=headers,
+                timeout=self.timeout, verify=False, **self.request_extra_opts, **kwargs))
         return self._check_response_status(r)
 
+    def _webhdfs_url(self, path, op, namenode=None, **params):
+        params = dict(self.user_params, **params)
+        query = ''.join('&{0}={1}'.format(key, quote(str(value))) for key, value in sorted(params.items()))
+        return '{0}://{1}:{2}/webhdfs/v1/{3}?op={4}{5}'.format(
+            self.hdfs_schema, self.hdfs_host if namenode is None else namenode, self.hdfs_port,
+            quote(path.lstrip('/')), op, query)
+
+    @staticmethod
+    def _is_standby(response):
+        return response.status_code == 403 and 'StandbyException' in response.text
+
+    def _call_namenode(self, request):
+        """
+        Call the last known active NameNode, fail over to the other NameNodes when it is not reachable or standby
+
+        :param request: Function doing the call on the NameNode host it gets
+        :return: The response of the first NameNode that is reachable and not standby
+        """
+        first_namenode = self.hdfs_host
+        connection_error = None
+        for namenode in [first_namenode] + [host for host in self.namenode_hosts if host != first_namenode]:
+            try:
+                response = request(namenode)
+            except requests.ConnectionError as e:
+                self.logger.warning("NameNode {0} is not reachable: {1}".format(namenode, e))
+                connection_error = connection_error or e
+                continue
+            if len(self.namenode_hosts) > 1 and self._is_standby(response):
+                self.logger.info("NameNode {0} is standby".format(namenode))
+                response.close()
+                continue
+            if namenode != first_namenode:
+                self.logger.info("Failed over from NameNode {0} to {1}".format(first_namenode, namenode))
+                self.hdfs_host = namenode
+                with _active_namenodes_lock:
+                    _active_namenodes[self._namenodes_key] = namenode
+            return response
+        if connection_error is not None:
+            raise connection_error
+        raise HdfsRequestError("None of the NameNodes {0} is active".format(', '.join(self.namenode_hosts)))
+
+    def _request_webhdfs(self, method, path, op, params=None, **kwargs):
+        """
+        WebHDFS call on the active NameNode (see _call_namenode), the response is not checked
+
+        A redirect to a DataNode is followed outside of _call_namenode, errors of the DataNode do not fail over the
+        NameNode but raise a HdfsRequestError.
+        """
+        params = {} if params is None else params
+        allow_redirects = kwargs.pop('allow_redirects', True)
+        response = self._call_namenode(lambda namenode: self.session.request(
+            method, self._webhdfs_url(path, op, namenode=namenode, **params), timeout=self.timeout, verify=False,
+            allow_redirects=False, **self.request_extra_opts, **kwargs))
+        if not allow_redirects or not response.is_redirect:
+            return response
+
+        location = response.headers['location']
+        response.close()
+        try:
+            return self.session.request(method, location, timeout=self.timeout, verify=False,
+                                        **self.request_extra_opts, **kwargs)
+        except requests.ConnectionError as e:
+            raise HdfsRequestError("DataNode {0} is not reachable: {1}".format(urlsplit(location).netloc, e)) from e
+
     def request_webhdfs_status(self, path):
-        return self.webhdfs.get_file_dir_status(path)
+        return self._check_response_status(self._request_webhdfs('GET', path, 'GETFILESTATUS')).json()
 
     def _check_response_status(self, response):
         self.logger.debug(response.text)
@@ -56,86 +206,322 @@ class HdfsApi:
             raise HdfsRequestError("HdfsResponse returned with error status [{0}]".format(response.status_code))
         return response
 
-    def get_block_info_for_file(self, file_path):
-        path = "fsck"
-        params = {'files': 0, 'racks': 1, 'blocks': 0, 'path': file_path}
+    def get_host_by_ip(self, ip):
+        """
+        :return: The host name of a (DataNode) address, cached by the resolver
+        """
+        host = self.resolver.resolve(ip)
+        if host is None:
+            raise HdfsRequestError("Unable to get hostname from ip {0}".format(ip))
+        return host
 
-        response = self.request_namenode(path, params=params)
-        return response
+    def generate_payload_of_size_in_mb(self, size):
+        """
+        Generate the content of a file of exactly size MB (zeros), in chunks of chunk_size
+        """
+        zeros = bytes(self.chunk_size)
+        remaining = size * 1024 * 1024
+        while remaining > 0:
+            chunk = zeros if remaining >= self.chunk_size else zeros[:remaining]
+            remaining -= len(chunk)
+            yield chunk
 
-    @staticmethod
-    def get_first_block_info(filename, block_info):
-        regex = r"^{0}.*\n(.*)\n".format(filename)
-        info_of_first_block = re.findall(regex, block_info, re.MULTILINE)
-        if len(info_of_first_block) < 1:
-            raise HdfsRequestError("No block information found for file {0} in {1}".format(filename, block_info))
-        return info_of_first_block[0]
+    def stream_to_hdfs(self, remote_path, chunks, hash_builder=None, overwrite=True, block_size=None):
+        """
+        Create a remote file from chunks without buffering the content
 
-    @staticmethod
-    def get_location_of_first_block(block_info):
-        ip_regex = r"(?<!\-)(\d{2,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})(?=:)"
-        block_locations = re.findall(ip_regex, block_info)
-        if len(block_locations) < 1:
-            raise HdfsRequestError("No block location information found in {0}".format(block_info))
-        return block_locations[0]
+        The NameNode redirects the CREATE to a DataNode, the chunks are sent to the DataNode with chunked transfer
+        encoding while they are generated.
 
-    @staticmethod
-    def get_host_by_ip(ip):
-        host_info = socket.gethostbyaddr(ip)
-        if len(host_info) < 1:
-            raise HdfsRequestError("Unable to get hostname form ip {0}".format(ip))
-        return host_info[0]
+        :param remote_path: The path of the file in HDFS
+        :param chunks: Iterable of bytes, the content of the file
+        :param hash_builder: Optional hashlib object that is updated with the chunks while they are sent
+        :param overwrite: Overwrite an existing file
+        :param block_size: Block size of the file in bytes, default the block size of the cluster
+        :return: Number of bytes sent
+        """
+        self.block_locations.invalidate(remote_path)
+        params = {'overwrite': str(overwrite).lower()}
+        if block_size is not None:
+            params['blocksize'] = block_size
+        response = self._request_webhdfs('PUT', remote_path, 'CREATE', params=params, allow_redirects=False)
+        self._check_response_status(response)
+        if response.status_code != 307 or 'location' not in response.headers:
+            raise HdfsRequestError("NameNode did not redirect the creation of {0} to a DataNode, status [{1}]".format(
+                remote_path, response.status_code))
 
-    @staticmethod
-    def calculate_md5(file, block_size=65536):
-        hash_builder = hashlib.md5()
-        for block in iter(lambda: file.read(block_size), b""):
-            hash_builder.update(block)
-        md5 = hash_builder.hexdigest()
-        file.seek(0)
-        return md5
+        sent = [0]
 
-    @staticmethod
-    def create_temp_file():
-        return tempfile.NamedTemporaryFile(suffix='.temporary', prefix='hdfs-smoketest-api-')
+        def hashed_chunks():
+            for chunk in chunks:
+                if hash_builder is not None:
+                    hash_builder.update(chunk)
+                sent[0] += len(chunk)
+                yield chunk
+
+        start = time.monotonic()
+        response = self.session.put(response.headers['location'], data=hashed_chunks(), timeout=self.timeout,
+                                    verify=False, headers={'Content-Type': 'application/octet-stream'},
+                                    **self.request_extra_opts)
+        self._check_response_status(response)
+        elapsed = time.monotonic() - start
+        self.logger.info("Wrote {0} bytes to {1} in {2:.2f}s ({3:.1f} MB/s)".format(
+            sent[0], remote_path, elapsed, sent[0] / (1024 * 1024) / max(elapsed, 1e-9)))
+        return sent[0]
+
+    def append_to_hdfs(self, remote_path, data):
+        """
+        Append data to a remote file
+
+        WebHDFS has no open output stream: the NameNode redirects the APPEND to a DataNode, which opens the file for
+        append, writes the data through a new write pipeline and closes the file again.
 
-    def create_temp_file_of_size(self, temp_file_size):
-        tmp = self.create_temp_file()
-        tmp.seek(temp_file_size * 1024 * 1024)
-        tmp.write(b'1')
-        tmp.seek(0)
+        :param data: bytes to append
+        """
+        self.block_locations.invalidate(remote_path)
+        response = self._request_webhdfs('POST', remote_path, 'APPEND', allow_redirects=False)
+        self._check_response_status(response)
+        if response.status_code != 307 or 'location' not in response.headers:
+            raise HdfsRequestError("NameNode did not redirect the append to {0} to a DataNode, status [{1}]".format(
+                remote_path, response.status_code))
+        response = self.session.post(response.headers['location'], data=data, timeout=self.timeout, verify=False,
+                                     headers={'Content-Type': 'application/octet-stream'}, **self.request_extra_opts)
+        self._check_response_status(response)
+
+    def create_hdfs_file_of_size_in_mb(self, path, size=300, range_size=None, seed=None, digest='md5', hash_threads=1):
+        """
+        Create a file of size MB in HDFS, the content is generated and hashed while it is uploaded
+
+        :param range_size: Calculate the TreeDigest of ranges of this size instead of the plain digest
+        :param seed: Seed of the pseudo random content (see payload.Payload). Without a seed the content is zeros.
+        Both are exactly size MB
+        :param digest: Name of the digest (see digest.DIGESTS)
+        :param hash_threads: Number of threads hashing the ranges of the TreeDigest
+        :return: The hex digest of the content
+        """
+        if seed is None:
+            chunks = self.generate_payload_of_size_in_mb(size)
+        else:
+            chunks = Payload(seed, size * 1024 * 1024, chunk_size=self.chunk_size).chunks()
+        hash_builder = new_hash_builder(digest, block_size=range_size, threads=hash_threads)
+        self.stream_to_hdfs(path, chunks, hash_builder=hash_builder)
+        return hash_builder.hexdigest()
 
-        return tmp
+    def create_hdfs_file_with_checksum(self, path, size=300, seed=None, block_size=128 * 1024 * 1024,
+                                       bytes_per_crc=BYTES_PER_CRC):
+        """
+        Create a file of size MB in HDFS and calculate its HDFS file checksum (MD5-of-MD5-of-CRC32C) while it is
+        uploaded, to compare with get_file_checksum without reading the file back
 
-    def copy_to_hdfs(self, remote_path, tmpfile):
-        self.webhdfs.create_file(remote_path, file_data=tmpfile, overwrite=True)
+        :param seed: Seed of the pseudo random content (see payload.Payload). Without a seed the content is zeros.
+        Both are exactly size MB
+        :param block_size: Block size the file is created with, the checksum depends on it
+        :param bytes_per_crc: dfs.bytes-per-checksum of the cluster
+        :return: The hex checksum, like the 'bytes' of get_file_checksum
+        """
+        if seed is None:
+            chunks = self.generate_payload_of_size_in_mb(size)
+        else:
+            chunks = Payload(seed, size * 1024 * 1024, chunk_size=self.chunk_size).chunks()
+        checksum = FileChecksum(block_size, bytes_per_crc=bytes_per_crc)
+        self.stream_to_hdfs(path, chunks, hash_builder=checksum, block_size=block_size)
+        return checksum.hexdigest()
 
-    def create_hdfs_file_of_size_in_mb(self, path, size=300):
-        with self.create_temp_file_of_size(size) as tmp_file:
-            md5_of_tmp_file = self.calculate_md5(tmp_file)
-            self.copy_to_hdfs(path, tmp_file)
+    def get_file_checksum(self, remote_path):
+        """
+        The NameNode redirects GETFILECHECKSUM to a DataNode, which combines the checksums of the blocks stored by the
+        DataNodes. Only the block checksums are transferred, not the content.
 
-        return md5_of_tmp_file
+        :return: The WebHDFS FileChecksum dict ('algorithm', 'bytes' as hex string and 'length')
+        """
+        response = self._request_webhdfs('GET', remote_path, 'GETFILECHECKSUM')
+        return self._check_response_status(response).json()['FileChecksum']
 
     def get_remote_file(self, path):
-        return self.webhdfs.read_file(path)
+        response = self._request_webhdfs('GET', path, 'OPEN')
+        return self._check_response_status(response).content
+
+    def stream_from_hdfs(self, remote_path, hash_builder=None, offset=None, length=None):
+        """
+        Read a remote file in chunks of chunk_size without buffering the content
+
+        The NameNode redirects the OPEN to a DataNode, the chunks are passed to the hash builder as they arrive.
+
+        :param remote_path: The path of the file in HDFS
+        :param hash_builder: Optional hashlib object that is updated with the received chunks
+        :param offset: Byte offset to start reading at (default the start of the file)
+        :param length: Number of bytes to read (default up to the end of the file)
+        :return: A dict with the 'bytes' read, the 'seconds' it took, the 'time_to_first_byte' in seconds and the
+        'bytes_per_second'
+        """
+        params = {}
+        if offset is not None:
+            params['offset'] = offset
+        if length is not None:
+            params['length'] = length
+        start = time.monotonic()
+        response = self._request_webhdfs('GET', remote_path, 'OPEN', params=params, stream=True)
+        try:
+            if response.status_code >= 400:
+                self._check_response_status(response)
+            received = 0
+            time_to_first_byte = None
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if time_to_first_byte is None:
+                    time_to_first_byte = time.monotonic() - start
+                if hash_builder is not None:
+                    hash_builder.update(chunk)
+                received += len(chunk)
+        finally:
+            response.close()
+        elapsed = time.monotonic() - start
+        stats = {'bytes': received, 'seconds': elapsed,
+                 'time_to_first_byte': elapsed if time_to_first_byte is None else time_to_first_byte,
+                 'bytes_per_second': received / max(elapsed, 1e-9)}
+        self.logger.info("Read {0} bytes from {1} in {2:.2f}s ({3:.1f} MB/s, first byte after {4:.3f}s)".format(
+            received, remote_path, elapsed, stats['bytes_per_second'] / (1024 * 1024), stats['time_to_first_byte']))
+        return stats
+
+    def get_file_status(self, remote_path):
+        """
+        :return: The WebHDFS FileStatus dict ('length', 'blockSize', 'type', ...) of a file or directory
+        """
+        response = self._request_webhdfs('GET', remote_path, 'GETFILESTATUS')
+        return self._check_response_status(response).json()['FileStatus']
+
+    def list_status(self, remote_path):
+        """
+        :return: The WebHDFS FileStatus dicts of the entries of a directory
+        """
+        response = self._request_webhdfs('GET', remote_path, 'LISTSTATUS')
+        return self._check_response_status(response).json()['FileStatuses']['FileStatus']
+
+    def get_file_block_locations(self, remote_path):
+        """
+        :return: The WebHDFS BlockLocation dicts ('offset', 'length', 'hosts', 'names', ...) of the blocks of a file,
+        None if the NameNode does not support GETFILEBLOCKLOCATIONS (before Hadoop 3)
+        """
+        response = self._request_webhdfs('GET', remote_path, 'GETFILEBLOCKLOCATIONS')
+        if response.status_code == 400 and 'GETFILEBLOCKLOCATIONS' in response.text:
+            return None
+        return self._check_response_status(response).json()['BlockLocations']['BlockLocation']
 
-    def write_remote_file_to_local_temp(self, remote_path):
-        local = self.create_temp_file()
-        file = self.get_remote_file(remote_path)
-        local.write(file)
-        local.seek(0)
-        return local
+    def iter_fsck_lines(self, path):
+        """
+        :return: Generator of the lines of the fsck output (files, blocks and locations) of a path, while it is received
+        """
+        response = self._call_namenode(lambda namenode: self.session.get(
+            '{0}://{1}:{2}/fsck'.format(self.hdfs_schema, namenode, self.hdfs_port),
+            params=dict(self.user_params, files=1, blocks=1, locations=1, path=path), stream=True, timeout=self.timeout,
+            verify=False, **self.request_extra_opts))
+        try:
+            if response.status_code >= 400:
+                self._check_response_status(response)
+            for line in response.iter_lines(chunk_size=self.chunk_size, decode_unicode=True):
+                yield line
+        finally:
+            response.close()
+
+    def get_hdfsfile_range_digest(self, path, range_size=None, parallelism=4, digest='md5'):
+        """
+        Read a remote file in ranges concurrently and calculate the TreeDigest of the ranges
+
+        Every range is read over its own pooled connection. With ranges of the block size every range is served by
+        the DataNodes of one block, so several DataNodes are read at once. The combined transfer statistics are kept
+        in last_read_stats.
+
+        :param path: The path of the file in HDFS
+        :param range_size: Size of the ranges in bytes, default the block size of the file
+        :param parallelism: Number of ranges read at the same time
+        :param digest: Name of the digest (see digest.DIGESTS)
+        :return: The hex TreeDigest of the remote file
+        """
+        status = self.get_file_status(path)
+        if range_size is None:
+            range_size = status['blockSize']
+        ranges = [(offset, min(range_size, status['length'] - offset))
+                  for offset in range(0, status['length'], range_size)]
+        tree_digest = TreeDigest(digest, block_size=range_size)
+
+        def read_range(index):
+            hash_builder = new_digest(digest)
+            offset, length = ranges[index]
+            stats = self.stream_from_hdfs(path, hash_builder=hash_builder, offset=offset, length=length)
+            if stats['bytes'] != length:
+                raise HdfsRequestError("Read {0} bytes of range {1}-{2} of {3}".format(stats['bytes'], offset,
+                                                                                       offset + length, path))
+            tree_digest.set_leaf_digest(index, hash_builder.digest())
+            return stats
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(ranges)))) as executor:
+            range_stats = list(executor.map(read_range, range(len(ranges))))
+        elapsed = time.monotonic() - start
+        self.last_read_stats = {'bytes': status['length'], 'seconds': elapsed, 'ranges': len(ranges),
+                                'time_to_first_byte': min([stats['time_to_first_byte'] for stats in range_stats],
+                                                          default=elapsed),
+                                'bytes_per_second': status['length'] / max(elapsed, 1e-9)}
+        self.logger.info("Read {0} bytes from {1} in {2} ranges in {3:.2f}s ({4:.1f} MB/s)".format(
+            status['length'], path, len(ranges), elapsed, self.last_read_stats['bytes_per_second'] / (1024 * 1024)))
+        return tree_digest.hexdigest()
+
+    @staticmethod
+    def calculate_digest(file, digest='md5', range_size=None, block_size=65536):
+        """
+        :param digest: Name of the digest (see digest.DIGESTS)
+        :param range_size: Calculate the TreeDigest of ranges of this size, to compare with get_hdfsfile_range_digest
+        :return: The hex digest of a local file
+        """
+        hash_builder = new_hash_builder(digest, block_size=range_size)
+        for block in iter(lambda: file.read(block_size), b""):
+            hash_builder.update(block)
+        return hash_builder.hexdigest()
+
+    def get_hdfsfile_digest(self, path, digest='md5', range_size=None, hash_threads=1):
+        """
+        Read a remote file and calculate its digest while it is received. The transfer statistics of the read are
+        kept in last_read_stats
+
+        :param digest: Name of the digest (see digest.DIGESTS)
+        :param range_size: Calculate the TreeDigest of ranges of this size instead of the plain digest
+        :param hash_threads: Number of threads hashing the ranges of the TreeDigest
+        :return: The hex digest of the remote file
+        """
+        hash_builder = new_hash_builder(digest, block_size=range_size, threads=hash_threads)
+        self.last_read_stats = self.stream_from_hdfs(path, hash_builder=hash_builder)
+        return hash_builder.hexdigest()
 
     def get_hdfsfile_and_calc_md5(self, path):
-        with self.write_remote_file_to_local_temp(path) as temp_file:
-            return self.calculate_md5(temp_file)
+        """
+        :return: The md5 of the remote file (see get_hdfsfile_digest)
+        """
+        return self.get_hdfsfile_digest(path)
 
     def cleanup_remote_file(self, path, recursive=False):
-        self.webhdfs.delete_file_dir(path, recursive=recursive)
+        self.block_locations.invalidate(path)
+        response = self._request_webhdfs('DELETE', path, 'DELETE', params={'recursive': str(recursive).lower()})
+        return self._check_response_status(response).json()['boolean']
+
+    def make_directory(self, path):
+        """
+        Create a directory and its missing parents (MKDIRS)
+
+        :return: True if the directory exists afterwards
+        """
+        response = self._request_webhdfs('PUT', path, 'MKDIRS')
+        return self._check_response_status(response).json()['boolean']
+
+    def rename(self, path, destination):
+        """
+        :param destination: The new absolute path
+        :return: False if the file does not exist or the destination exists
+        """
+        self.block_locations.invalidate(path)
+        response = self._request_webhdfs('PUT', path, 'RENAME', params={'destination': destination})
+        return self._check_response_status(response).json()['boolean']
 
     def get_host_location_of_first_block(self, filename):
-        file_block_info = self.get_block_info_for_file(filename)
-        file_first_block_info = self.get_first_block_info(filename, file_block_info.text)
-        file_block_ip = self.get_location_of_first_block(file_first_block_info)
-        return self.get_host_by_ip(file_block_ip)
+        blocks = self.block_locations.get_blocks(filename)
+        if len(blocks) < 1 or len(blocks[0]['hosts']) < 1:
+            raise HdfsRequestError("No block location information found for file {0}".format(filename))
+        return blocks[0]['hosts'][0]
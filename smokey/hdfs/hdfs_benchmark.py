@@ -0,0 +1,127 @@
+import json
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hdfs.statistics import summarize_phase
+
+# The phases of a benchmark round, in the order they run on every file
+PHASES = ['create', 'write', 'read', 'checksum', 'delete']
+
+
+class HdfsBenchmark:
+    """
+    Measure the throughput and latency of HDFS operations through an HdfsApi
+
+    Every combination of file size and parallelism runs a number of rounds. In a round, parallelism files are created
+    (empty), written, read back, checksummed and deleted, each phase with all files at the same time. Per phase the
+    latency of every operation and the total bytes transferred in the wall clock time of the phase are recorded, so
+    the results of runs before, during and after a component is stopped (or before and after an upgrade) can be
+    compared. Failed operations are counted instead of ending the benchmark.
+    """
+
+    def __init__(self, hdfs, directory='/user/smoketest/hdfs_benchmark', sizes=(1, 16, 128), parallelism=(1, 4),
+                 repetitions=3, seed=None, logger=logging):
+        """
+        :param hdfs: The HdfsApi to benchmark
+        :param directory: HDFS directory the benchmark files are created in
+        :param sizes: File sizes in MB
+        :param parallelism: Numbers of files written and read at the same time
+        :param repetitions: Number of rounds per combination of size and parallelism
+        :param seed: Seed of the pseudo random file content, a random seed per file when None
+        :param logger: logger instance
+        """
+        self.hdfs = hdfs
+        self.directory = directory.rstrip('/')
+        self.sizes = list(sizes)
+        self.parallelism = list(parallelism)
+        self.repetitions = repetitions
+        self.seed = seed
+        self.logger = logger
+
+    def _path(self, size, index):
+        return "{0}/benchmark_{1}mb_{2}.bin".format(self.directory, size, index)
+
+    def _create(self, path, size, seed):
+        self.hdfs.stream_to_hdfs(path, [])
+        return 0
+
+    def _write(self, path, size, seed):
+        self.hdfs.create_hdfs_file_of_size_in_mb(path, size=size, seed=seed)
+        return size * 1024 * 1024
+
+    def _read(self, path, size, seed):
+        return self.hdfs.stream_from_hdfs(path)['bytes']
+
+    def _checksum(self, path, size, seed):
+        self.hdfs.get_file_checksum(path)
+        return 0
+
+    def _delete(self, path, size, seed):
+        self.hdfs.cleanup_remote_file(path)
+        return 0
+
+    def _timed(self, operation, path, size, seed):
+        start = time.monotonic()
+        try:
+            transferred = operation(path, size, seed)
+        except Exception as e:
+            self.logger.warning("Benchmark operation {0} on {1} failed: {2}".format(operation.__name__, path, e))
+            return None
+        return time.monotonic() - start, transferred
+
+    def run_case(self, size, parallelism):
+        """
+        Run the rounds of one file size and parallelism
+
+        :return: A dict with the 'size_mb', 'parallelism', 'repetitions' and the summary per phase in 'phases' (see
+        summarize_phase)
+        """
+        operations = {'create': self._create, 'write': self._write, 'read': self._read, 'checksum': self._checksum,
+                      'delete': self._delete}
+        measured = {phase: {'latencies': [], 'bytes': 0, 'seconds': 0.0, 'errors': 0} for phase in PHASES}
+        paths = [self._path(size, index) for index in range(parallelism)]
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            for _ in range(self.repetitions):
+                seeds = [random.getrandbits(64) if self.seed is None else self.seed + index
+                         for index in range(parallelism)]
+                for phase in PHASES:
+                    start = time.monotonic()
+                    results = list(executor.map(self._timed, [operations[phase]] * parallelism, paths,
+                                                [size] * parallelism, seeds))
+                    measured[phase]['seconds'] += time.monotonic() - start
+                    for result in results:
+                        if result is None:
+                            measured[phase]['errors'] += 1
+                        else:
+                            measured[phase]['latencies'].append(result[0])
+                            measured[phase]['bytes'] += result[1]
+        phases = {phase: summarize_phase(measured[phase]['latencies'], measured[phase]['bytes'],
+                                         measured[phase]['seconds'], measured[phase]['errors']) for phase in PHASES}
+        for phase in ['write', 'read']:
+            self.logger.info("{0} MB x {1}: {2} {3:.1f} MB/s".format(
+                size, parallelism, phase, phases[phase]['mb_per_second']))
+        return {'size_mb': size, 'parallelism': parallelism, 'repetitions': self.repetitions, 'phases': phases}
+
+    def run(self, label=None):
+        """
+        Run all combinations of file size and parallelism
+
+        :param label: Name of the run in the results, like 'before' or 'datanode-stopped'
+        :return: A dict with the 'label', the 'namenode' called, the 'started' time (seconds since the epoch), the total
+        'seconds' and the 'results' per combination (see run_case)
+        """
+        started = time.time()
+        start = time.monotonic()
+        results = [self.run_case(size, parallelism) for size in self.sizes for parallelism in self.parallelism]
+        return {'label': label, 'namenode': self.hdfs.hdfs_host, 'started': started,
+                'seconds': time.monotonic() - start, 'results': results}
+
+    @staticmethod
+    def write_results(results, path):
+        """
+        Write the results of a run as JSON
+        """
+        with open(path, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
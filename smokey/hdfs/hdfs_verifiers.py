@@ -1,29 +1,429 @@
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import core.verification as verification
 import hdfs.hdfs_api as hdfs_api
 import hdfs.hdfs_application_runner as runner
+from hdfs.append_probe import AppendProbe, AppendProbeError
+from hdfs.digest import new_hash_builder
+from hdfs.statistics import percentile, summarize_phase
+from hdfs.payload import Payload
+
+
+def _digest_config(digest, hash_threads):
+    """
+    :return: (digest, hash_threads), defaults from the HDFS_VERIFIER_DIGEST and HDFS_VERIFIER_HASH_THREADS environment
+    variables
+    """
+    if digest is None:
+        digest = os.environ.get('HDFS_VERIFIER_DIGEST', 'md5')
+    if hash_threads is None:
+        hash_threads = int(os.environ.get('HDFS_VERIFIER_HASH_THREADS', 1))
+    return digest, hash_threads
+
+
+def create_ha_hdfs_api(ambari, logger):
+    """
+    Create an HdfsApi for all NameNodes of the cluster, starting with the active one according to Ambari
+
+    Verifiers keep their HdfsApi between verifications, so the connections (and the kerberos authentication) are
+    reused and Ambari is only asked once: after a NameNode failover the HdfsApi finds the new active NameNode itself.
+
+    :return: An HdfsApi
+    """
+    ha_states = ambari.get_host_ha_states('HDFS', 'NAMENODE')
+    namenodes = sorted(ha_states)
+    active = [host for host in namenodes if ha_states[host] == 'active']
+    if len(namenodes) == 0:
+        raise verification.VerificationError("Ambari does not know any NameNode")
+    return hdfs_api.HdfsApi(logger=logger, active_nn_host=(active + namenodes)[0], namenode_hosts=namenodes)
 
 
 class HdfsVerifier(verification.Verifier):
-    def __init__(self, logger, filename='hdfs_verifier_file.txt', filesize=324, ambari=None):
+    def __init__(self, logger, filename='hdfs_verifier_file.txt', filesize=324, ambari=None, read_parallelism=4,
+                 range_size=128 * 1024 * 1024, payload_seed=None, digest=None, hash_threads=None, deep=None,
+                 block_size=128 * 1024 * 1024):
+        """
+        By default the HDFS file checksum (MD5-of-MD5-of-CRC32C) calculated while the file is written is compared with
+        the checksum the DataNodes report, the file is not read back. The deep verification reads the file back and
+        compares its digest.
+
+        :param read_parallelism: Number of ranges of the file read at the same time, 1 reads the file sequentially
+        :param range_size: Size in bytes of the ranges the file is read in (the block size reads one block per range)
+        :param payload_seed: Seed of the pseudo random file content. Without a seed every verification writes
+        different content, so a file left by an earlier verification cannot pass for the new one
+        :param digest: Name of the digest compared (see digest.DIGESTS), default md5
+        :param hash_threads: Number of threads hashing ranges of the file, default 1. With more than one thread (or
+        read_parallelism > 1) the TreeDigest of the ranges is compared
+        :param deep: Read the file back and compare its digest, default the HDFS_VERIFIER_DEEP environment variable
+        (false)
+        :param block_size: Block size of the file, the HDFS file checksum depends on it
+        """
         super().__init__(logger)
         self.ambari = ambari
         self.filename = "/user/smoketest/hdfs_smoketest/{0}".format(filename)
         self.filesize = filesize
+        self.exclusive_tags = frozenset([self.filename])
+        self.read_parallelism = read_parallelism
+        self.range_size = range_size
+        self.payload_seed = payload_seed
+        self.digest, self.hash_threads = _digest_config(digest, hash_threads)
+        if deep is None:
+            deep = os.environ.get('HDFS_VERIFIER_DEEP', 'false').lower() == 'true'
+        self.deep = deep
+        self.block_size = block_size
+        self.hdfs = None
 
     def verify(self):
-        self.logger.info("Verify HDFS status by writing a file and checking the md5sum")
-        active_nn = self.ambari.get_specific_nn_host(state='active')
-        hdfs = hdfs_api.HdfsApi(logger=self.logger, active_nn_host=active_nn)
-        md5 = hdfs.create_hdfs_file_of_size_in_mb(self.filename, size=self.filesize)
-        remote_md5 = hdfs.get_hdfsfile_and_calc_md5(self.filename)
+        if self.hdfs is None:
+            self.hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+        hdfs = self.hdfs
+        seed = random.getrandbits(64) if self.payload_seed is None else self.payload_seed
+        if self.deep:
+            self._verify_digest(hdfs, seed)
+        else:
+            self._verify_checksum(hdfs, seed)
+
+    def _verify_checksum(self, hdfs, seed):
+        self.logger.info("Verify HDFS status by writing a file and checking the HDFS file checksum")
+        local_checksum = hdfs.create_hdfs_file_with_checksum(self.filename, size=self.filesize, seed=seed,
+                                                             block_size=self.block_size)
+        remote_checksum = hdfs.get_file_checksum(self.filename)
         hdfs.cleanup_remote_file(self.filename)
-        if md5 != remote_md5:
+        if local_checksum != remote_checksum['bytes']:
             raise verification.VerificationError(
-                "local md5 {0} did not match remote md5 {1} for file {2}".format(md5, remote_md5, self.filename))
+                "local checksum {0} did not match remote {1} checksum {2} for file {3}".format(
+                    local_checksum, remote_checksum['algorithm'], remote_checksum['bytes'], self.filename))
+
+    def _verify_digest(self, hdfs, seed):
+        self.logger.info("Verify HDFS status by writing a file and checking the {0}".format(self.digest))
+        range_size = self.range_size if self.read_parallelism > 1 or self.hash_threads > 1 else None
+        local_digest = hdfs.create_hdfs_file_of_size_in_mb(self.filename, size=self.filesize, range_size=range_size,
+                                                           seed=seed, digest=self.digest,
+                                                           hash_threads=self.hash_threads)
+        if self.read_parallelism > 1:
+            remote_digest = hdfs.get_hdfsfile_range_digest(self.filename, range_size=range_size,
+                                                           parallelism=self.read_parallelism, digest=self.digest)
+        else:
+            remote_digest = hdfs.get_hdfsfile_digest(self.filename, digest=self.digest, range_size=range_size,
+                                                     hash_threads=self.hash_threads)
+        hdfs.cleanup_remote_file(self.filename)
+        if local_digest != remote_digest:
+            raise verification.VerificationError("local {0} {1} did not match remote {0} {2} for file {3}".format(
+                self.digest, local_digest, remote_digest, self.filename))
+
+
+def _bound(value, variable):
+    """
+    :return: The bound, default the float value of the environment variable, None when neither is set
+    """
+    if value is None:
+        value = os.environ.get(variable)
+    return None if value is None else float(value)
+
+
+class HdfsLoadVerifier(verification.Verifier):
+    def __init__(self, logger, ambari=None, writers=4, readers=4, filesize=16, operations=2, min_mb_per_second=None,
+                 max_latency=None, max_errors=0, block_size=128 * 1024 * 1024):
+        """
+        Verify HDFS under load: writers and readers run at the same time, each on its own file. A writer writes its
+        file operations times and compares the HDFS file checksum, a reader reads its file (written once, by the first
+        verification) operations times and compares the md5. The verification fails when operations fail or when the
+        aggregate throughput or the tail latency is out of bounds, so a stopped DataNode or JournalNode that slows HDFS
+        down is noticed even when every operation still succeeds.
+
+        :param writers: Number of concurrent writers
+        :param readers: Number of concurrent readers
+        :param filesize: Size of the files in MB
+        :param operations: Number of writes or reads per writer or reader
+        :param min_mb_per_second: Minimum aggregate throughput of all writers and readers, default the
+        HDFS_LOAD_VERIFIER_MIN_MB_PER_SECOND environment variable (no minimum)
+        :param max_latency: Maximum 99th percentile in seconds of the latency of the operations, default the
+        HDFS_LOAD_VERIFIER_MAX_LATENCY environment variable (no maximum)
+        :param max_errors: Number of failed operations tolerated
+        :param block_size: Block size of the written files, the HDFS file checksum depends on it
+        """
+        super().__init__(logger)
+        self.ambari = ambari
+        self.directory = "/user/smoketest/hdfs_smoketest"
+        self.writers = writers
+        self.exclusive_tags = frozenset(['hdfs_load_verifier'])
+        self.readers = readers
+        self.filesize = filesize
+        self.operations = operations
+        self.min_mb_per_second = _bound(min_mb_per_second, 'HDFS_LOAD_VERIFIER_MIN_MB_PER_SECOND')
+        self.max_latency = _bound(max_latency, 'HDFS_LOAD_VERIFIER_MAX_LATENCY')
+        self.max_errors = max_errors
+        self.block_size = block_size
+        self.hdfs = None
+        self.read_files = None
+        self.last_stats = None
+
+    def _prepare_read_files(self):
+        read_files = {}
+        for index in range(self.readers):
+            path = "{0}/load_verifier_read_{1}.bin".format(self.directory, index)
+            read_files[path] = self.hdfs.create_hdfs_file_of_size_in_mb(path, size=self.filesize,
+                                                                        seed=random.getrandbits(64))
+        self.read_files = read_files
+
+    def _write(self, path):
+        local_checksum = self.hdfs.create_hdfs_file_with_checksum(path, size=self.filesize, seed=random.getrandbits(64),
+                                                                  block_size=self.block_size)
+        remote_checksum = self.hdfs.get_file_checksum(path)
+        if local_checksum != remote_checksum['bytes']:
+            raise verification.VerificationError("local checksum {0} did not match remote checksum {1} for file {2}"
+                                                 .format(local_checksum, remote_checksum['bytes'], path))
+        return self.filesize * 1024 * 1024
+
+    def _read(self, path):
+        md5 = hashlib.md5()
+        stats = self.hdfs.stream_from_hdfs(path, hash_builder=md5)
+        if md5.hexdigest() != self.read_files[path]:
+            raise verification.VerificationError("known md5 {0} did not match remote md5 {1} for file {2}".format(
+                self.read_files[path], md5.hexdigest(), path))
+        return stats['bytes']
+
+    def _run_worker(self, operation, path):
+        timings = []
+        errors = []
+        for _ in range(self.operations):
+            start = time.monotonic()
+            try:
+                transferred = operation(path)
+            except Exception as e:
+                self.logger.warning("Load verifier operation on {0} failed: {1}".format(path, e))
+                errors.append("{0}: {1}".format(path, e))
+                continue
+            timings.append((time.monotonic() - start, transferred))
+        return timings, errors
+
+    def _cleanup(self, paths):
+        for path in paths:
+            try:
+                self.hdfs.cleanup_remote_file(path)
+            except Exception as e:
+                self.logger.warning("Unable to remove {0}: {1}".format(path, e))
+
+    def verify(self):
+        self.logger.info("Verify HDFS under load with {0} writers and {1} readers".format(self.writers, self.readers))
+        if self.hdfs is None:
+            self.hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+        if self.read_files is None:
+            self._prepare_read_files()
+        write_paths = ["{0}/load_verifier_write_{1}.bin".format(self.directory, index) for index in range(self.writers)]
+        workers = [(self._write, path) for path in write_paths]
+        workers += [(self._read, path) for path in sorted(self.read_files)]
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            results = list(executor.map(lambda worker: self._run_worker(*worker), workers))
+        seconds = time.monotonic() - start
+        self._cleanup(write_paths)
+
+        errors = [error for timings, worker_errors in results for error in worker_errors]
+        stats = {}
+        for kind, kind_results in [('write', results[:self.writers]), ('read', results[self.writers:])]:
+            timings = [timing for worker_timings, worker_errors in kind_results for timing in worker_timings]
+            stats[kind] = summarize_phase([latency for latency, transferred in timings],
+                                          sum(transferred for latency, transferred in timings), seconds,
+                                          sum(len(worker_errors) for worker_timings, worker_errors in kind_results))
+        latencies = sorted(latency for timings, worker_errors in results for latency, transferred in timings)
+        stats['mb_per_second'] = stats['write']['mb_per_second'] + stats['read']['mb_per_second']
+        stats['p99_latency'] = percentile(latencies, 99)
+        stats['errors'] = len(errors)
+        self.last_stats = stats
+        self.logger.info("HDFS load: {0:.1f} MB/s, p99 latency {1}s, {2} errors".format(
+            stats['mb_per_second'], stats['p99_latency'], stats['errors']))
+
+        failures = []
+        if len(errors) > self.max_errors:
+            failures.append("{0} operations failed (first: {1})".format(len(errors), errors[0]))
+        if self.min_mb_per_second is not None and stats['mb_per_second'] < self.min_mb_per_second:
+            failures.append("throughput {0:.1f} MB/s below {1} MB/s".format(
+                stats['mb_per_second'], self.min_mb_per_second))
+        if self.max_latency is not None and (stats['p99_latency'] is None or stats['p99_latency'] > self.max_latency):
+            failures.append("p99 latency {0}s above {1}s".format(stats['p99_latency'], self.max_latency))
+        if len(failures) > 0:
+            raise verification.VerificationError("HDFS load verification failed: {0}".format('; '.join(failures)))
+
+    def close(self):
+        """
+        Remove the read files, the next verification writes new ones
+        """
+        if self.read_files is not None:
+            self._cleanup(sorted(self.read_files))
+            self.read_files = None
+
+
+class HdfsMetadataVerifier(verification.Verifier):
+    tier = verification.TIER_PROBE
+    # A batch is batch_size times every operation, too many NameNode calls to repeat every second like other probes
+    schedule_interval = 10
+
+    # The operations of a batch, in the order they run on every directory
+    OPERATIONS = ['MKDIRS', 'CREATE', 'GETFILESTATUS', 'LISTSTATUS', 'RENAME', 'DELETE']
+
+    def __init__(self, logger, ambari=None, batch_size=20, threads=8, max_latency=None, max_errors=0):
+        """
+        Verify the NameNode metadata operations: a batch of directories is created, an empty file is created in each,
+        its status and the directory listing are requested, the file is renamed and the directory deleted. Every
+        operation runs for the whole batch concurrently, so a slow edit log sync (a JournalNode or NameNode failure)
+        shows up in the latencies within seconds.
+
+        :param batch_size: Number of directories per verification
+        :param threads: Number of concurrent operations
+        :param max_latency: Maximum 99th percentile in seconds of the latency per operation type, default the
+        HDFS_METADATA_VERIFIER_MAX_LATENCY environment variable (no maximum)
+        :param max_errors: Number of failed operations tolerated
+        """
+        super().__init__(logger)
+        self.ambari = ambari
+        self.batch_size = batch_size
+        self.threads = threads
+        self.max_latency = _bound(max_latency, 'HDFS_METADATA_VERIFIER_MAX_LATENCY')
+        self.max_errors = max_errors
+        self.hdfs = None
+        self.last_stats = None
+
+    def _operation(self, name, directory):
+        file_path = "{0}/file".format(directory)
+        if name == 'MKDIRS':
+            succeeded = self.hdfs.make_directory(directory)
+        elif name == 'CREATE':
+            self.hdfs.stream_to_hdfs(file_path, [])
+            succeeded = True
+        elif name == 'GETFILESTATUS':
+            succeeded = self.hdfs.get_file_status(file_path)['type'] == 'FILE'
+        elif name == 'LISTSTATUS':
+            succeeded = len(self.hdfs.list_status(directory)) == 1
+        elif name == 'RENAME':
+            succeeded = self.hdfs.rename(file_path, "{0}/renamed".format(directory))
+        else:
+            succeeded = self.hdfs.cleanup_remote_file(directory, recursive=True)
+        if not succeeded:
+            raise verification.VerificationError("{0} of {1} did not succeed".format(name, directory))
+
+    def _timed(self, name, directory):
+        start = time.monotonic()
+        try:
+            self._operation(name, directory)
+        except Exception as e:
+            self.logger.warning("{0} of {1} failed: {2}".format(name, directory, e))
+            return None, "{0} {1}: {2}".format(name, directory, e)
+        return time.monotonic() - start, None
+
+    def verify(self):
+        self.logger.info("Verify the NameNode metadata operations with a batch of {0}".format(self.batch_size))
+        if self.hdfs is None:
+            self.hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+        base = "/user/smoketest/hdfs_smoketest/metadata_verifier_{0:016x}".format(random.getrandbits(64))
+        directories = ["{0}/dir_{1}".format(base, index) for index in range(self.batch_size)]
+        stats = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for name in self.OPERATIONS:
+                start = time.monotonic()
+                results = list(executor.map(lambda directory: self._timed(name, directory), directories))
+                seconds = time.monotonic() - start
+                latencies = [latency for latency, error in results if error is None]
+                errors += [error for latency, error in results if error is not None]
+                stats[name] = summarize_phase(latencies, 0, seconds, len(results) - len(latencies))
+                self.logger.info("{0}: {1:.1f} ops/s, p50 {2}s, p95 {3}s, p99 {4}s".format(
+                    name, stats[name]['operations_per_second'], stats[name]['latency']['p50'],
+                    stats[name]['latency']['p95'], stats[name]['latency']['p99']))
+        try:
+            self.hdfs.cleanup_remote_file(base, recursive=True)
+        except Exception as e:
+            self.logger.warning("Unable to remove {0}: {1}".format(base, e))
+        self.last_stats = stats
+
+        failures = []
+        if len(errors) > self.max_errors:
+            failures.append("{0} operations failed (first: {1})".format(len(errors), errors[0]))
+        if self.max_latency is not None:
+            failures += ["{0} p99 latency {1}s above {2}s".format(name, stats[name]['latency']['p99'], self.max_latency)
+                         for name in self.OPERATIONS if stats[name]['latency']['p99'] is not None and
+                         stats[name]['latency']['p99'] > self.max_latency]
+        if len(failures) > 0:
+            raise verification.VerificationError("HDFS metadata verification failed: {0}".format('; '.join(failures)))
+
+
+class HdfsAppendVerifier(verification.Verifier):
+    # Every verification reads the whole file back, the appends run in the background at their own interval
+    tier = verification.TIER_IO
+
+    def __init__(self, logger, ambari=None, filename='append_probe_file.txt', interval=1.0, stall_threshold=5.0,
+                 max_stall=None):
+        """
+        Verify the write pipeline recovery: the first verification starts an AppendProbe that keeps appending to a
+        file in the background, every later verification fails when appends stalled for longer than max_stall seconds
+        or acknowledged records are missing from the file. Verified while a DataNode is stopped, this shows how long
+        writers hang when a DataNode of their pipeline dies.
+
+        :param interval: Seconds between appends
+        :param stall_threshold: Seconds after which an append counts as stalled
+        :param max_stall: Maximum seconds appends may stall, default the HDFS_APPEND_PROBE_MAX_STALL environment
+        variable (60)
+        """
+        super().__init__(logger)
+        self.ambari = ambari
+        self.filename = "/user/smoketest/hdfs_smoketest/{0}".format(filename)
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        max_stall = _bound(max_stall, 'HDFS_APPEND_PROBE_MAX_STALL')
+        self.max_stall = 60.0 if max_stall is None else max_stall
+        self.hdfs = None
+        self.probe = None
+
+    def verify(self):
+        if self.probe is None:
+            self.logger.info("Start appending to {0} every {1}s".format(self.filename, self.interval))
+            if self.hdfs is None:
+                self.hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+            self.probe = AppendProbe(self.hdfs, self.filename, interval=self.interval,
+                                     stall_threshold=self.stall_threshold, logger=self.logger)
+            self.probe.start()
+            return
+        summary = self.probe.summary()
+        self.logger.info("Appends to {0}: {1} ok, {2} failed, p99 latency {3}s, longest stall {4:.1f}s".format(
+            self.filename, summary['operations'], summary['errors'], summary['latency']['p99'],
+            summary['longest_stall']))
+        if summary['longest_stall'] > self.max_stall:
+            raise verification.VerificationError("Appends to {0} stalled for {1:.1f}s, longer than {2}s".format(
+                self.filename, summary['longest_stall'], self.max_stall))
+        try:
+            self.probe.verify_content()
+        except (AppendProbeError, hdfs_api.HdfsRequestError) as e:
+            raise verification.VerificationError(e)
+
+    def close(self):
+        """
+        Stop the probe and remove its file
+        """
+        if self.probe is not None:
+            self.probe.stop()
+            self.hdfs.cleanup_remote_file(self.filename)
+            self.probe = None
 
 
 class HdfsDatanodeVerifier(verification.Verifier):
-    def __init__(self, logger, active_nn_host=None):
+    def __init__(self, logger, active_nn_host=None, known_digest=None, range_size=128 * 1024 * 1024,
+                 read_parallelism=4, payload_seed=None, payload_size=None, digest=None, hash_threads=None):
+        """
+        :param known_digest: The known digest of the file (see the README), a TreeDigest of ranges of range_size if
+        read_parallelism or hash_threads is larger than 1. Without a known digest (or payload) the file is read
+        sequentially and compared with the configured md5
+        :param range_size: Size in bytes of the ranges of the TreeDigest
+        :param read_parallelism: Number of ranges read at the same time
+        :param payload_seed: Seed the file was created with (see the README). With the seed and the payload_size the
+        known digest is calculated from the payload instead of configured
+        :param payload_size: Size of the file in bytes
+        :param digest: Name of the digest (see digest.DIGESTS), default md5
+        :param hash_threads: Number of threads hashing ranges of the file when it is read sequentially
+        """
         super().__init__(logger)
         if active_nn_host is not None:
             self.hdfs = hdfs_api.HdfsApi(logger=self.logger, active_nn_host=active_nn_host)
@@ -32,29 +432,57 @@ class HdfsDatanodeVerifier(verification.Verifier):
 
         self.filename = "/user/smoketest/hdfs_smoketest/hdfs_dn_test_file_with_known_md5.txt"
         self.md5 = "<put your md5 here>"
+        self.known_digest = known_digest
+        self.read_parallelism = read_parallelism
+        self.digest, self.hash_threads = _digest_config(digest, hash_threads)
+        self.range_size = range_size if read_parallelism > 1 or self.hash_threads > 1 else None
+        self.payload = None if payload_seed is None else Payload(payload_seed, payload_size)
 
     def verify(self):
-        self.logger.info("Verify HDFS status by reading a file and checking the md5sum")
-        remote_md5 = self.hdfs.get_hdfsfile_and_calc_md5(self.filename)
-        if self.md5 != remote_md5:
-            raise verification.VerificationError(
-                "known md5 {0} did not match remote md5 {1} for file {2}".format(self.md5, remote_md5, self.filename))
+        if self.payload is not None:
+            # Only once, the payload never changes
+            self.known_digest = self.payload.digest(new_hash_builder(self.digest, block_size=self.range_size,
+                                                                     threads=self.hash_threads))
+            self.payload = None
+        if self.known_digest is None:
+            self.logger.info("Verify HDFS status by reading a file and checking the md5sum")
+            remote_md5 = self.hdfs.get_hdfsfile_and_calc_md5(self.filename)
+            if self.md5 != remote_md5:
+                raise verification.VerificationError("known md5 {0} did not match remote md5 {1} for file {2}".format(
+                    self.md5, remote_md5, self.filename))
+            return
+
+        self.logger.info("Verify HDFS status by reading a file and checking the {0}".format(self.digest))
+        if self.read_parallelism > 1:
+            remote_digest = self.hdfs.get_hdfsfile_range_digest(self.filename, range_size=self.range_size,
+                                                                parallelism=self.read_parallelism, digest=self.digest)
+        else:
+            remote_digest = self.hdfs.get_hdfsfile_digest(self.filename, digest=self.digest,
+                                                          range_size=self.range_size, hash_threads=self.hash_threads)
+        if self.known_digest != remote_digest:
+            raise verification.VerificationError("known {0} {1} did not match remote {0} {2} for file {3}".format(
+                self.digest, self.known_digest, remote_digest, self.filename))
 
 
 class HdfsMrVerifier(verification.Verifier):
+    tier = verification.TIER_JOB
+
     def __init__(self, logger, ambari=None):
         super().__init__(logger)
         self.ambari = ambari
+        # teragen and terasort write to fixed paths, so two HdfsMrVerifiers never run at the same time
+        self.exclusive_tags = frozenset(['teragen'])
         self.teragen = runner.MrTeragenRunner(logger=self.logger)
         self.terasort = runner.MrTerasortRunner(logger=self.logger)
+        self.hdfs = None
 
     def verify(self):
         self.logger.info("Verify Mapreduce with teragen/terasort")
         try:
-            active_nn = self.ambari.get_specific_nn_host(state='active')
-            hdfs = hdfs_api.HdfsApi(logger=self.logger, active_nn_host=active_nn)
-            hdfs.cleanup_remote_file("/user/smoketest/hdfs_smoketest/teragenout", recursive=True)
-            hdfs.cleanup_remote_file("/user/smoketest/hdfs_smoketest/terasortout", recursive=True)
+            if self.hdfs is None:
+                self.hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+            self.hdfs.cleanup_remote_file("/user/smoketest/hdfs_smoketest/teragenout", recursive=True)
+            self.hdfs.cleanup_remote_file("/user/smoketest/hdfs_smoketest/terasortout", recursive=True)
             self.teragen.run()
             self.terasort.run()
         except runner.MrRequestError as e:
@@ -63,6 +491,8 @@ class HdfsMrVerifier(verification.Verifier):
 
 
 class HdfsSparkVerifier(verification.Verifier):
+    tier = verification.TIER_JOB
+
     def __init__(self, logger, spark2=False):
         super().__init__(logger)
         self.runner = runner.SparkHdfsTestRunner(logger=self.logger, spark2=spark2)
@@ -0,0 +1,108 @@
+import hashlib
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MASK = 0xFFFFFFFFFFFFFFFF
+GAMMA = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+WORD_SIZE = 8
+
+
+# Words generated per numpy pass, small enough to keep the working arrays in the CPU cache
+NUMPY_BLOCK_WORDS = 32768
+_numpy_increments = None
+
+
+def _words_numpy(seed, start, count):
+    global _numpy_increments
+    if _numpy_increments is None:
+        # uint64 arithmetic wraps around like the masked python arithmetic
+        _numpy_increments = numpy.arange(1, NUMPY_BLOCK_WORDS + 1, dtype=numpy.uint64) * numpy.uint64(GAMMA)
+    words = numpy.empty(count, dtype=numpy.uint64)
+    shifted = numpy.empty(min(count, NUMPY_BLOCK_WORDS), dtype=numpy.uint64)
+    for block_start in range(0, count, NUMPY_BLOCK_WORDS):
+        block = words[block_start:block_start + NUMPY_BLOCK_WORDS]
+        tmp = shifted[:len(block)]
+        numpy.add(_numpy_increments[:len(block)], numpy.uint64((seed + (start + block_start) * GAMMA) & MASK),
+                  out=block)
+        for shift, multiplier in ((30, MIX1), (27, MIX2), (31, None)):
+            numpy.right_shift(block, numpy.uint64(shift), out=tmp)
+            numpy.bitwise_xor(block, tmp, out=block)
+            if multiplier is not None:
+                numpy.multiply(block, numpy.uint64(multiplier), out=block)
+    return words.astype('<u8', copy=False).tobytes()
+
+
+def _words_python(seed, start, count):
+    words = bytearray(count * WORD_SIZE)
+    for i in range(count):
+        z = (seed + (start + i + 1) * GAMMA) & MASK
+        z = ((z ^ (z >> 30)) * MIX1) & MASK
+        z = ((z ^ (z >> 27)) * MIX2) & MASK
+        struct.pack_into('<Q', words, i * WORD_SIZE, z ^ (z >> 31))
+    return bytes(words)
+
+
+class Payload:
+    """
+    Deterministic pseudo random file content, defined by a seed and a size
+
+    The content is the SplitMix64 sequence of the seed as little endian 64 bit words. Every word only depends on its
+    index, so any range can be generated on its own and the chunks are generated vectorized with numpy. Without numpy
+    a (much slower) pure python implementation generates the same bytes.
+    """
+
+    def __init__(self, seed, size, chunk_size=4 * 1024 * 1024, use_numpy=True):
+        """
+        :param seed: Seed of the content (a 64 bit unsigned integer)
+        :param size: Size of the content in bytes
+        :param chunk_size: Size of the generated chunks in bytes, rounded up to a multiple of 8
+        :param use_numpy: Use numpy if it is installed
+        """
+        self.seed = seed & MASK
+        self.size = size
+        self.chunk_size = -(-chunk_size // WORD_SIZE) * WORD_SIZE
+        self._words = _words_numpy if use_numpy and numpy is not None else _words_python
+
+    def read_range(self, offset, length):
+        """
+        :return: The bytes of the content from offset, at most length bytes
+        """
+        length = max(0, min(length, self.size - offset))
+        if length == 0:
+            return b''
+        first_word = offset // WORD_SIZE
+        last_word = (offset + length - 1) // WORD_SIZE
+        data = self._words(self.seed, first_word, last_word - first_word + 1)
+        start = offset - first_word * WORD_SIZE
+        return data[start:start + length]
+
+    def chunks(self, offset=0, length=None):
+        """
+        Generate the content (or a range of it) in chunks of chunk_size
+        """
+        end = self.size if length is None else min(self.size, offset + length)
+        while offset < end:
+            chunk = self.read_range(offset, min(self.chunk_size, end - offset))
+            offset += len(chunk)
+            yield chunk
+
+    def __iter__(self):
+        return self.chunks()
+
+    def digest(self, hash_builder=None):
+        """
+        Calculate the digest of the content without storing it
+
+        :param hash_builder: A hashlib like object (update/hexdigest), default md5
+        :return: The hex digest
+        """
+        hash_builder = hashlib.md5() if hash_builder is None else hash_builder
+        for chunk in self.chunks():
+            hash_builder.update(chunk)
+        return hash_builder.hexdigest()
@@ -0,0 +1,116 @@
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _reverse_lookup(ip):
+    return socket.gethostbyaddr(ip)[0]
+
+
+class HostResolver:
+    """
+    Cache of the host names of (DataNode) addresses
+
+    Addresses are resolved with reverse DNS lookups on a thread pool, so the addresses of all blocks of a file are
+    resolved at the same time instead of one after the other. Host names are cached for ttl seconds and addresses that
+    could not be resolved for negative_ttl seconds, so an address without a name is not looked up for every block.
+    The cache can be preloaded with the host names and addresses Ambari knows (see ambari.api.Api.get_host_addresses),
+    which makes the lookups unnecessary for the hosts of the cluster.
+    """
+
+    def __init__(self, ttl=3600, negative_ttl=60, threads=16, lookup=_reverse_lookup, clock=time.monotonic,
+                 logger=logging):
+        """
+        :param ttl: Seconds a host name is cached
+        :param negative_ttl: Seconds an address that could not be resolved is cached
+        :param threads: Maximum number of concurrent lookups
+        :param lookup: Function returning the host name of an address, raising OSError when it is unknown
+        :param clock: Function returning the current time in seconds
+        :param logger: logger instance
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.threads = threads
+        self.lookup = lookup
+        self.clock = clock
+        self.logger = logger
+        self.lookups = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def preload(self, hosts):
+        """
+        :param hosts: A dict {host name: address}, like Ambari reports the hosts of the cluster
+        """
+        expires = self.clock() + self.ttl
+        with self._lock:
+            # In reverse order, so the first host name wins for an address shared by several hosts
+            for host, ip in sorted(hosts.items(), reverse=True):
+                self._entries[ip] = (expires, host)
+
+    def invalidate(self, ip=None):
+        """
+        :param ip: The address to forget, None clears the cache
+        """
+        with self._lock:
+            if ip is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ip, None)
+
+    def _cached(self, ip):
+        entry = self._entries.get(ip)
+        if entry is not None and entry[0] > self.clock():
+            return entry
+        return None
+
+    def _resolve_uncached(self, ip):
+        try:
+            host = self.lookup(ip)
+            ttl = self.ttl
+        except OSError as e:
+            self.logger.warning("Unable to get the host name of {0}: {1}".format(ip, e))
+            host = None
+            ttl = self.negative_ttl
+        with self._lock:
+            self.lookups += 1
+            self._entries[ip] = (self.clock() + ttl, host)
+        return host
+
+    def resolve(self, ip):
+        """
+        :return: The host name of the address, None if it could not be resolved
+        """
+        with self._lock:
+            entry = self._cached(ip)
+        if entry is not None:
+            return entry[1]
+        return self._resolve_uncached(ip)
+
+    def resolve_all(self, ips):
+        """
+        Resolve addresses, the uncached ones concurrently
+
+        :param ips: Iterable of addresses, duplicates are resolved once
+        :return: A dict {address: host name} of the addresses that could be resolved
+        """
+        resolved = {}
+        missing = []
+        with self._lock:
+            for ip in set(ips):
+                entry = self._cached(ip)
+                if entry is None:
+                    missing.append(ip)
+                elif entry[1] is not None:
+                    resolved[ip] = entry[1]
+        if len(missing) == 1:
+            hosts = [self._resolve_uncached(missing[0])]
+        elif len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.threads, len(missing))) as executor:
+                hosts = list(executor.map(self._resolve_uncached, missing))
+        else:
+            hosts = []
+        resolved.update((ip, host) for ip, host in zip(missing, hosts) if host is not None)
+        return resolved
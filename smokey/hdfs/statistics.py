@@ -0,0 +1,37 @@
+# The latency percentiles reported per phase
+PERCENTILES = [50, 90, 95, 99]
+
+
+def percentile(values, percent):
+    """
+    :param values: Sorted list of numbers
+    :param percent: The percentile, between 0 and 100
+    :return: The percentile of the values, interpolated linearly between the closest ranks. None without values
+    """
+    if len(values) == 0:
+        return None
+    rank = (len(values) - 1) * percent / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize_phase(latencies, transferred, seconds, errors):
+    """
+    :param latencies: Seconds every successful operation of the phase took
+    :param transferred: Number of bytes written or read by the successful operations
+    :param seconds: Wall clock seconds the phase took, the operations overlap when they run in parallel
+    :param errors: Number of failed operations
+    :return: A dict with the number of 'operations', 'errors', 'bytes', 'seconds', the throughput in 'mb_per_second'
+    and 'operations_per_second' and the 'latency' (min, mean, percentiles and max in seconds)
+    """
+    latencies = sorted(latencies)
+    summary = {'operations': len(latencies), 'errors': errors, 'bytes': transferred, 'seconds': seconds,
+               'mb_per_second': transferred / (1024 * 1024) / seconds if seconds > 0 else 0.0,
+               'operations_per_second': len(latencies) / seconds if seconds > 0 else 0.0,
+               'latency': {'min': latencies[0] if len(latencies) > 0 else None,
+                           'mean': sum(latencies) / len(latencies) if len(latencies) > 0 else None,
+                           'max': latencies[-1] if len(latencies) > 0 else None}}
+    for percent in PERCENTILES:
+        summary['latency']['p{0}'.format(percent)] = percentile(latencies, percent)
+    return summary
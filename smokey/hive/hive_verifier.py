@@ -4,6 +4,8 @@ import core.application_runner as runner
 
 
 class HiveVerifier(verification.Verifier):
+    tier = verification.TIER_JOB
+
     def __init__(self, logger, principal='', database='', server='localhost', port=10001, query='show tables;',
                  zk_nodes='', zookeeper=False):
         super().__init__(logger)
@@ -4,6 +4,8 @@ import mapreduce.mr_runner as mr
 
 
 class MapreduceVerifier(verification.Verifier):
+    tier = verification.TIER_JOB
+
     def __init__(self, logger):
         super().__init__(logger)
         self.runner = mr.MrPiRunner(logger=self.logger)
@@ -38,11 +38,10 @@ if __name__ == "__main__":
     clustername = 'Sandbox'
 
     try:
-        ranger_admin_ambari_info = ambari.get_component_info('RANGER', 'RANGER_ADMIN')
-        hdfs_namenode_ambari_info = ambari.get_component_info('HDFS', 'NAMENODE')
+        snapshot = ambari.get_cluster_snapshot()
+        ranger_admin_ambari_info = snapshot.get_component_info('RANGER', 'RANGER_ADMIN')
 
-        if ambari.check_if_all_components_started('RANGER', 'RANGER_ADMIN') and \
-                ambari.check_if_all_components_started('HDFS', 'NAMENODE'):
+        if snapshot.all_started('RANGER', 'RANGER_ADMIN') and snapshot.all_started('HDFS', 'NAMENODE'):
             logger.info("Both HDFS namenodes and Ranger admin are in normal state. Starting smoke test.")
             rnd_ranger_host, rnd_ranger_component = ambari.get_random_host_and_component_path(ranger_admin_ambari_info)
             logger.info("Selected random Ranger admin host & components for this test: {0}, {1}"
@@ -72,10 +71,11 @@ if __name__ == "__main__":
             ambari.change_host_component_state_and_wait(rnd_ranger_component, state='STARTED')
             logger.debug("Started the Ranger admin")
 
-            hdfs_namenode_all_started = ambari.check_if_all_components_started('HDFS', 'NAMENODE')
+            snapshot = ambari.get_cluster_snapshot()
+            hdfs_namenode_all_started = snapshot.all_started('HDFS', 'NAMENODE')
             logger.debug("All namenodes in normal state? {0}".format(hdfs_namenode_all_started))
 
-            ranger_admin_all_started = ambari.check_if_all_components_started('RANGER', 'RANGER_ADMIN')
+            ranger_admin_all_started = snapshot.all_started('RANGER', 'RANGER_ADMIN')
             logger.debug("All Ranger admins in normal state? {0}".format(ranger_admin_all_started))
 
             logger.info("Smoke test finished {0}successfully".format("" if ranger_admin_all_started else "un"))
@@ -0,0 +1,39 @@
+import argparse
+import logging
+import time
+
+from simulator.cluster import SimulatedCluster
+from simulator.server import ClusterSimulator, ENDPOINT_KINDS
+
+
+def key_value(value):
+    kind, _, number = value.partition('=')
+    if kind not in ENDPOINT_KINDS + ['ambari_request']:
+        raise argparse.ArgumentTypeError("Unknown endpoint kind {0}".format(kind))
+    return kind, float(number)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local Ambari/WebHDFS/YARN simulator to run the smoketests against')
+    parser.add_argument('--hosts', type=int, default=10, help='Number of worker hosts.')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on.')
+    parser.add_argument('--transition-time', type=float, default=1.0,
+                        help='Seconds an Ambari start/stop request takes.')
+    parser.add_argument('--latency', type=key_value, action='append', default=[],
+                        help='Latency per endpoint kind ({0}), e.g. ambari=0.05'.format(', '.join(ENDPOINT_KINDS)))
+    parser.add_argument('--failure-rate', type=key_value, action='append', default=[],
+                        help='Fraction of failing calls per endpoint kind (or ambari_request), e.g. namenode=0.01')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for block placement and failures.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cluster = SimulatedCluster(host_count=args.hosts, transition_time=args.transition_time, seed=args.seed)
+    simulator = ClusterSimulator(cluster, port=args.port, latency=dict(args.latency),
+                                 failure_rates=dict(args.failure_rate), seed=args.seed).start()
+    for name, value in sorted(simulator.environment().items()):
+        print("export {0}={1}".format(name, value))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
@@ -0,0 +1,19 @@
+import argparse
+
+from hdfs.digest import available_digests, benchmark
+from hdfs.payload import Payload
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hashing throughput of the digests available for HDFS verification')
+    parser.add_argument('-d', '--digest', action='append', choices=available_digests(),
+                        help='Digest to measure (repeatable), default all available digests.')
+    parser.add_argument('-s', '--size', type=int, default=256, help='Megabytes hashed per digest.')
+    parser.add_argument('-b', '--block-size', type=int, default=8, help='Block size of the tree digest in megabytes.')
+    parser.add_argument('-t', '--threads', type=int, default=4, help='Threads hashing the blocks of the tree digest.')
+    args = parser.parse_args()
+
+    content = Payload(0, args.size * 1024 * 1024).read_range(0, args.size * 1024 * 1024)
+    print("{0:<10} {1:<6} {2:>10}".format('digest', 'mode', 'MB/s'))
+    for result in benchmark(args.digest, content=content, block_size=args.block_size * 1024 * 1024,
+                            threads=args.threads):
+        print("{0:<10} {1:<6} {2:>10.1f}".format(result['digest'], result['mode'], result['mb_per_second']))
@@ -0,0 +1,51 @@
+import argparse
+import logging
+
+import ambari.api as api
+import hdfs.hdfs_api as hdfs_api
+from hdfs.hdfs_benchmark import HdfsBenchmark, PHASES
+from hdfs.hdfs_verifiers import create_ha_hdfs_api
+
+
+def print_results(results):
+    print("{0:>8} {1:>11} {2:>9} {3:>10} {4:>10} {5:>10} {6:>7}".format(
+        'size MB', 'parallelism', 'phase', 'MB/s', 'p50 s', 'p99 s', 'errors'))
+    for case in results['results']:
+        for phase in PHASES:
+            summary = case['phases'][phase]
+            latency = summary['latency']
+            print("{0:>8} {1:>11} {2:>9} {3:>10.1f} {4:>10.4f} {5:>10.4f} {6:>7}".format(
+                case['size_mb'], case['parallelism'], phase, summary['mb_per_second'],
+                latency['p50'] if latency['p50'] is not None else float('nan'),
+                latency['p99'] if latency['p99'] is not None else float('nan'), summary['errors']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='HDFS throughput and latency benchmark')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1, 16, 128], help='File sizes in MB.')
+    parser.add_argument('-p', '--parallelism', type=int, nargs='+', default=[1, 4],
+                        help='Numbers of files written and read at the same time.')
+    parser.add_argument('-r', '--repetitions', type=int, default=3,
+                        help='Number of rounds per file size and parallelism.')
+    parser.add_argument('-d', '--directory', default='/user/smoketest/hdfs_benchmark',
+                        help='HDFS directory of the benchmark files.')
+    parser.add_argument('-n', '--namenodes', default=None,
+                        help='Comma separated NameNode hosts, the first is called first. Default the NameNodes Ambari '
+                             'knows.')
+    parser.add_argument('-l', '--label', default=None, help='Name of the run in the results, e.g. before.')
+    parser.add_argument('-o', '--output', default=None, help='File to write the JSON results to.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the file content.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.namenodes is None:
+        hdfs = create_ha_hdfs_api(api.Api(), logging)
+    else:
+        namenodes = args.namenodes.split(',')
+        hdfs = hdfs_api.HdfsApi(active_nn_host=namenodes[0], namenode_hosts=namenodes, pool_size=max(args.parallelism))
+    benchmark = HdfsBenchmark(hdfs, directory=args.directory, sizes=args.sizes, parallelism=args.parallelism,
+                              repetitions=args.repetitions, seed=args.seed)
+    results = benchmark.run(label=args.label)
+    print_results(results)
+    if args.output is not None:
+        HdfsBenchmark.write_results(results, args.output)
@@ -0,0 +1,356 @@
+import hashlib
+import posixpath
+import random
+import threading
+import time
+
+from hdfs.checksum import BYTES_PER_CRC, chunk_crcs, file_checksum, checksum_algorithm
+
+# Hosts running the master components. Both names resolve to the local machine, so clients that connect to a
+# component host (HdfsApi to a NameNode, Yarn to a ResourceManager) reach the simulator by the host name Ambari reports
+MASTER_HOSTS = ['localhost', '127.0.0.1']
+
+# Components with an active/standby pair on the master hosts
+HA_COMPONENTS = ['NAMENODE', 'RESOURCEMANAGER', 'HBASE_MASTER']
+
+# Final and transitional host component state per requested state
+TRANSITIONS = {'STARTED': ('STARTING', 'START'), 'INSTALLED': ('STOPPING', 'STOP')}
+RUNNING_STATES = ['STARTED', 'STOPPING']
+
+
+class SimulatedHdfsError(Exception):
+    """
+    A WebHDFS RemoteException, the status is the HTTP status the NameNode answers with
+    """
+
+    def __init__(self, exception, message, status=404):
+        super().__init__(message)
+        self.exception = exception
+        self.message = message
+        self.status = status
+
+
+class SimulatedCluster:
+    """
+    In memory model of an HDP cluster as far as the smoketests can see it through Ambari, WebHDFS and the RM UI
+
+    The masters run on MASTER_HOSTS, the workers (DataNodes, NodeManagers) on host_count generated hosts. Ambari state
+    change requests take transition_time seconds: host components pass the STOPPING/STARTING state and get their new
+    state when the request completes. Stopping the active component of an HA pair makes its running peer active.
+    """
+
+    def __init__(self, host_count=10, clustername='Sandbox', transition_time=1.0, block_size=128 * 1024 * 1024,
+                 replication=3, seed=None, clock=time.monotonic):
+        """
+        :param host_count: Number of worker hosts (10 to 5000 is a realistic range)
+        :param clustername: Name of the cluster in Ambari
+        :param transition_time: Seconds an Ambari state change request takes
+        :param block_size: HDFS block size in bytes, determines the blocks fsck reports
+        :param replication: Number of DataNodes every block is placed on
+        :param seed: Seed for the random block placement and request failures, None for a random seed
+        :param clock: Function returning the current time in seconds
+        """
+        self.clustername = clustername
+        self.transition_time = transition_time
+        self.block_size = block_size
+        self.replication = replication
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.request_failure_rate = 0.0
+        self.lock = threading.RLock()
+
+        self.hosts = {host: '127.0.0.1' for host in MASTER_HOSTS}
+        self.workers = []
+        for i in range(host_count):
+            host = 'node{0:04d}.simulated'.format(i + 1)
+            self.hosts[host] = '10.{0}.{1}.{2}'.format(i // 62500, (i // 250) % 250, i % 250 + 1)
+            self.workers.append(host)
+
+        self.services = {}
+        self.component_hosts = {}
+        self.states = {}
+        for service, component, hosts in self._layout():
+            self.services.setdefault(service, []).append(component)
+            self.component_hosts[component] = sorted(hosts)
+            for host in hosts:
+                self.states[(component, host)] = 'STARTED'
+        self.component_services = {component: service for service, components in self.services.items()
+                                   for component in components}
+        self.active = {component: MASTER_HOSTS[0] for component in HA_COMPONENTS}
+
+        self.requests = {}
+        self.pending_requests = []
+        self.files = {}
+        self.directories = {'/'}
+        self.next_block_id = 1073741825
+
+    def _layout(self):
+        first_workers = self.workers[:1]
+        return [('HDFS', 'NAMENODE', MASTER_HOSTS),
+                ('HDFS', 'ZKFC', MASTER_HOSTS),
+                ('HDFS', 'JOURNALNODE', MASTER_HOSTS + first_workers),
+                ('HDFS', 'DATANODE', self.workers),
+                ('YARN', 'RESOURCEMANAGER', MASTER_HOSTS),
+                ('YARN', 'NODEMANAGER', self.workers),
+                ('MAPREDUCE2', 'HISTORYSERVER', MASTER_HOSTS[:1]),
+                ('ZOOKEEPER', 'ZOOKEEPER_SERVER', MASTER_HOSTS + first_workers),
+                ('HBASE', 'HBASE_MASTER', MASTER_HOSTS),
+                ('HIVE', 'HIVE_METASTORE', MASTER_HOSTS[:1]),
+                ('HIVE', 'HIVE_SERVER', MASTER_HOSTS[:1]),
+                ('SPARK', 'SPARK_JOBHISTORYSERVER', MASTER_HOSTS[:1]),
+                ('SPARK2', 'SPARK2_JOBHISTORYSERVER', MASTER_HOSTS[:1]),
+                ('RANGER', 'RANGER_ADMIN', MASTER_HOSTS[:1])]
+
+    # Ambari
+
+    def get_hosts(self, component):
+        """
+        :return: Sorted list of the hosts running the component
+        """
+        return self.component_hosts.get(component, [])
+
+    def get_state(self, component, host):
+        """
+        :return: State of the host component, None if the component does not run on the host
+        """
+        with self.lock:
+            self._advance_requests()
+            return self.states.get((component, host))
+
+    def is_running(self, component, host):
+        return self.get_state(component, host) in RUNNING_STATES
+
+    def get_ha_state(self, component, host):
+        """
+        :return: 'active' or 'standby' for a running HA component, None otherwise
+        """
+        with self.lock:
+            if component not in HA_COMPONENTS or not self.is_running(component, host):
+                return None
+            return 'active' if self.active[component] == host else 'standby'
+
+    def get_component_counts(self, component):
+        """
+        :return: A tuple (started_count, total_count)
+        """
+        with self.lock:
+            self._advance_requests()
+            states = [self.states[(component, host)] for host in self.get_hosts(component)]
+            return len([state for state in states if state == 'STARTED']), len(states)
+
+    def change_state(self, host_components, state, context=''):
+        """
+        Request a state change of host components, like an Ambari PUT on HostRoles/state
+
+        :param host_components: List of (component, host) tuples
+        :param state: The requested state ('STARTED', 'INSTALLED')
+        :param context: RequestInfo/context of the request
+        :return: The id of the created request, None if all host components already have the state
+        """
+        if state not in TRANSITIONS:
+            raise ValueError("Unsupported state {0}".format(state))
+        with self.lock:
+            self._advance_requests()
+            changing = [(component, host) for component, host in host_components
+                        if self.states[(component, host)] != state]
+            if len(changing) == 0:
+                return None
+            request_id = len(self.requests) + 1
+            failed = self.random.random() < self.request_failure_rate
+            self.requests[request_id] = {'id': request_id, 'context': context, 'state': state,
+                                         'host_components': changing, 'start': self.clock(), 'failed': failed,
+                                         'previous': {key: self.states[key] for key in changing}, 'status': None}
+            self.pending_requests.append(self.requests[request_id])
+            for key in changing:
+                self.states[key] = TRANSITIONS[state][0]
+            return request_id
+
+    def get_request(self, request_id):
+        """
+        :return: A dict with the request id, context, status ('IN_PROGRESS', 'COMPLETED', 'FAILED'), progress and
+        the (component, host, command, task status) of the tasks. None for an unknown request
+        """
+        with self.lock:
+            self._advance_requests()
+            request = self.requests.get(request_id)
+            if request is None:
+                return None
+            if request['status'] is None:
+                status = 'IN_PROGRESS'
+                progress = 100.0 * (self.clock() - request['start']) / self.transition_time
+            else:
+                status = request['status']
+                progress = 100.0
+            command = TRANSITIONS[request['state']][1]
+            return {'id': request_id, 'context': request['context'], 'status': status, 'progress': progress,
+                    'tasks': [(component, host, command, status) for component, host in request['host_components']]}
+
+    def _advance_requests(self):
+        now = self.clock()
+        for request in [request for request in self.pending_requests
+                        if now - request['start'] >= self.transition_time]:
+            self.pending_requests.remove(request)
+            request['status'] = 'FAILED' if request['failed'] else 'COMPLETED'
+            transitional_state = TRANSITIONS[request['state']][0]
+            for component, host in request['host_components']:
+                # A later request might have changed the host component again
+                if self.states[(component, host)] == transitional_state:
+                    if request['failed']:
+                        self.states[(component, host)] = request['previous'][(component, host)]
+                    else:
+                        self._set_state(component, host, request['state'])
+
+    def _set_state(self, component, host, state):
+        self.states[(component, host)] = state
+        if component not in HA_COMPONENTS:
+            return
+        if state == 'INSTALLED' and self.active[component] == host:
+            peers = [peer for peer in self.get_hosts(component) if self.states[(component, peer)] in RUNNING_STATES]
+            self.active[component] = peers[0] if len(peers) > 0 else None
+        elif state == 'STARTED' and self.active[component] is None:
+            self.active[component] = host
+
+    # HDFS
+
+    def _check_parent(self, path):
+        parent = posixpath.dirname(path)
+        if parent not in self.directories:
+            raise SimulatedHdfsError('FileNotFoundException', "Parent directory {0} does not exist".format(parent))
+
+    def _place_blocks(self, length, block_size):
+        datanodes = [host for host in self.get_hosts('DATANODE') if self.states[('DATANODE', host)] in RUNNING_STATES]
+        if len(datanodes) == 0:
+            raise SimulatedHdfsError('IOException', "No running datanodes", status=500)
+        blocks = []
+        offset = 0
+        while offset < length:
+            block_length = min(block_size, length - offset)
+            locations = self.random.sample(datanodes, min(self.replication, len(datanodes)))
+            blocks.append({'id': self.next_block_id, 'offset': offset, 'length': block_length,
+                           'locations': locations})
+            self.next_block_id += 1
+            offset += block_length
+        return blocks
+
+    def mkdirs(self, path):
+        with self.lock:
+            if path in self.files:
+                raise SimulatedHdfsError('FileAlreadyExistsException', "{0} is a file".format(path), status=403)
+            while path not in self.directories:
+                self.directories.add(path)
+                path = posixpath.dirname(path)
+
+    def create(self, path, data, overwrite=False, block_size=None):
+        """
+        Create a file, the parent directories are created like the NameNode does
+
+        :param block_size: Block size of the file, default the block size of the cluster
+        """
+        block_size = self.block_size if block_size is None else block_size
+        with self.lock:
+            if path in self.directories:
+                raise SimulatedHdfsError('FileAlreadyExistsException', "{0} is a directory".format(path), status=403)
+            if path in self.files and not overwrite:
+                raise SimulatedHdfsError('FileAlreadyExistsException', "{0} already exists".format(path), status=403)
+            blocks = self._place_blocks(len(data), block_size)
+            self.mkdirs(posixpath.dirname(path))
+            self.files[path] = {'data': bytes(data), 'blocks': blocks, 'block_size': block_size,
+                                'modification_time': time.time()}
+
+    def append(self, path, data):
+        with self.lock:
+            file_info = self._get_file(path)
+            data = file_info['data'] + bytes(data)
+            self.files[path] = {'data': data, 'blocks': self._place_blocks(len(data), file_info['block_size']),
+                                'block_size': file_info['block_size'], 'modification_time': time.time()}
+
+    def _get_file(self, path):
+        if path not in self.files:
+            raise SimulatedHdfsError('FileNotFoundException', "File does not exist: {0}".format(path))
+        return self.files[path]
+
+    def read(self, path, offset=0, length=None):
+        with self.lock:
+            data = self._get_file(path)['data']
+        if length is None:
+            return data[offset:]
+        return data[offset:offset + length]
+
+    def get_blocks(self, path):
+        with self.lock:
+            return self._get_file(path)['blocks']
+
+    def get_checksum(self, path, bytes_per_crc=BYTES_PER_CRC):
+        """
+        :return: The MD5-of-MD5-of-CRC32C FileChecksum of a file like WebHDFS returns it, calculated per block like
+        the DataNodes do
+        """
+        with self.lock:
+            file_info = self._get_file(path)
+        blocks = file_info['blocks']
+        block_md5s = [hashlib.md5(chunk_crcs(file_info['data'][block['offset']:block['offset'] + block['length']],
+                                             bytes_per_crc)).digest() for block in blocks]
+        bytes_per_crc = bytes_per_crc if len(blocks) > 0 else 0
+        crc_per_block = file_info['block_size'] // bytes_per_crc if len(blocks) > 1 else 0
+        checksum = file_checksum(bytes_per_crc, crc_per_block, block_md5s)
+        return {'algorithm': checksum_algorithm(bytes_per_crc, crc_per_block), 'bytes': checksum.hex(),
+                'length': len(checksum)}
+
+    def get_status(self, path):
+        """
+        :return: The FileStatus of a file or directory like WebHDFS returns it
+        """
+        with self.lock:
+            name = posixpath.basename(path)
+            if path in self.directories:
+                return {'pathSuffix': name, 'type': 'DIRECTORY', 'length': 0, 'owner': 'smoketest',
+                        'group': 'hdfs', 'permission': '755', 'replication': 0, 'blockSize': 0,
+                        'modificationTime': 0, 'accessTime': 0,
+                        'childrenNum': len(self._children(path))}
+            file_info = self._get_file(path)
+            return {'pathSuffix': name, 'type': 'FILE', 'length': len(file_info['data']), 'owner': 'smoketest',
+                    'group': 'hdfs', 'permission': '644', 'replication': self.replication,
+                    'blockSize': file_info['block_size'],
+                    'modificationTime': int(file_info['modification_time'] * 1000), 'accessTime': 0, 'childrenNum': 0}
+
+    def _children(self, path):
+        return sorted(child for child in list(self.directories) + list(self.files)
+                      if child != path and posixpath.dirname(child) == path)
+
+    def list_status(self, path):
+        with self.lock:
+            if path not in self.directories:
+                return [self.get_status(path)]
+            return [self.get_status(child) for child in self._children(path)]
+
+    def rename(self, source, destination):
+        """
+        :return: False if the source does not exist or the destination exists, like the NameNode
+        """
+        with self.lock:
+            if source not in self.files or destination in self.files or destination in self.directories or \
+                    posixpath.dirname(destination) not in self.directories:
+                return False
+            self.files[destination] = self.files.pop(source)
+            return True
+
+    def delete(self, path, recursive=False):
+        """
+        :return: False if the path does not exist
+        """
+        with self.lock:
+            if path in self.files:
+                del self.files[path]
+                return True
+            if path not in self.directories or path == '/':
+                return False
+            children = [child for child in list(self.directories) + list(self.files)
+                        if child.startswith(path.rstrip('/') + '/')]
+            if len(children) > 0 and not recursive:
+                raise SimulatedHdfsError('PathIsNotEmptyDirectoryException', "{0} is non empty".format(path),
+                                         status=403)
+            for child in children:
+                self.directories.discard(child)
+                self.files.pop(child, None)
+            self.directories.discard(path)
+            return True
@@ -0,0 +1,598 @@
+import base64
+import json
+import logging
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from simulator.cluster import SimulatedCluster, SimulatedHdfsError
+
+AMBARI_BASE = '/api/v1/clusters'
+WEBHDFS_BASE = '/webhdfs/v1'
+
+# The endpoint kinds latency and failures can be configured for
+ENDPOINT_KINDS = ['ambari', 'namenode', 'datanode', 'fsck', 'resourcemanager']
+
+
+class _ConnectionDropped(Exception):
+    """
+    Raised by a handler to close the connection without a response, like a host where nothing listens on the port
+    """
+    pass
+
+
+class _SimulatorHttpServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, simulator):
+        super().__init__(address, _SimulatorRequestHandler)
+        self.simulator = simulator
+
+
+class _SimulatorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        self.server.simulator.logger.debug("Simulator: " + format % args)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def _handle(self):
+        self.simulator = self.server.simulator
+        self.cluster = self.simulator.cluster
+        url = urlsplit(self.path)
+        self.url_path = unquote(url.path)
+        self.query = url.query
+        self.params = dict(parse_qsl(url.query, keep_blank_values=True))
+        self.body = self._read_body()
+        self.host_header = self.headers.get('Host', '')
+        self.host = self.host_header.rsplit(':', 1)[0]
+
+        if self.url_path.startswith(AMBARI_BASE):
+            kind, handler = 'ambari', self._ambari
+        elif self.url_path.startswith(WEBHDFS_BASE):
+            if self.params.get('datanode') == 'true':
+                kind, handler = 'datanode', self._datanode
+            else:
+                kind, handler = 'namenode', self._namenode
+        elif self.url_path == '/fsck':
+            kind, handler = 'fsck', self._fsck
+        else:
+            kind, handler = 'resourcemanager', self._resourcemanager
+
+        self.simulator.record_call(kind, user=self.params.get('user.name'))
+        try:
+            self.simulator.delay(kind)
+            if self.simulator.should_fail(kind):
+                self._send_failure(kind)
+            else:
+                handler()
+        except _ConnectionDropped:
+            self.close_connection = True
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    # Skip the trailers
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length > 0 else b''
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode(), headers=headers)
+
+    def _send_failure(self, kind):
+        if kind == 'ambari':
+            self._send_json(503, {'status': 503, 'message': "Simulated failure"})
+        elif kind in ('namenode', 'datanode'):
+            self._send_remote_exception(SimulatedHdfsError('IOException', "Simulated failure", status=500))
+        else:
+            self._send(503, b"Simulated failure", content_type='text/plain')
+
+    # Ambari
+
+    def _ambari_error(self, status, message):
+        self._send_json(status, {'status': status, 'message': message})
+
+    def _ambari_session(self):
+        cookies = [cookie.strip().split('=', 1) for cookie in self.headers.get('Cookie', '').split(';')]
+        for cookie in cookies:
+            if len(cookie) == 2 and cookie[0] == 'AMBARISESSIONID' and self.simulator.has_session(cookie[1]):
+                return cookie[1]
+
+    def _ambari_basic_auth(self):
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('Basic '):
+            return False
+        credentials = base64.b64decode(authorization[len('Basic '):]).decode()
+        return credentials == '{0}:{1}'.format(self.simulator.ambari_user, self.simulator.ambari_password)
+
+    def _ambari_href(self, *parts):
+        return 'http://{0}{1}/{2}'.format(self.host_header, AMBARI_BASE, '/'.join((self.cluster.clustername,) + parts))
+
+    def _ambari(self):
+        headers = {}
+        if self._ambari_basic_auth():
+            headers['Set-Cookie'] = 'AMBARISESSIONID={0}; Path=/; HttpOnly'.format(self.simulator.create_session())
+        elif self._ambari_session() is None:
+            self._ambari_error(403, "Full authentication is required to access this resource")
+            return
+        if self.command == 'PUT' and 'X-Requested-By' not in self.headers:
+            self._ambari_error(400, "CSRF protection is turned on. X-Requested-By HTTP header is required.")
+            return
+
+        parts = [part for part in self.url_path[len(AMBARI_BASE):].split('/') if part != '']
+        if len(parts) == 0:
+            self._send_json(200, {'href': 'http://{0}{1}'.format(self.host_header, AMBARI_BASE),
+                                  'items': [{'Clusters': {'cluster_name': self.cluster.clustername}}]},
+                            headers=headers)
+            return
+        if parts[0] != self.cluster.clustername:
+            self._ambari_error(404, "The requested resource doesn't exist: Cluster not found")
+            return
+
+        with self.cluster.lock:
+            status, response = self._ambari_resource(parts[1:])
+        if response is None:
+            self._send(status, headers=headers)
+        else:
+            self._send_json(status, response, headers=headers)
+
+    def _ambari_resource(self, parts):
+        cluster = self.cluster
+        if len(parts) == 0:
+            return 200, {'href': self._ambari_href(), 'Clusters': {'cluster_name': cluster.clustername}}
+        resource = parts[0]
+        if resource == 'services':
+            if len(parts) == 1:
+                return 200, {'href': self._ambari_href('services'),
+                             'items': [self._service(service, True) for service in sorted(cluster.services)]}
+            service = parts[1]
+            if service not in cluster.services:
+                return 404, self._not_found("Service not found")
+            if len(parts) == 2:
+                return 200, self._service(service, False)
+            if len(parts) == 3 and parts[2] == 'components':
+                return 200, {'items': [self._component(component, False) for component in cluster.services[service]]}
+            if len(parts) == 4 and parts[2] == 'components' and parts[3] in cluster.services[service]:
+                return 200, self._component(parts[3], True)
+        elif resource == 'hosts':
+            if len(parts) == 1:
+                return 200, {'href': self._ambari_href('hosts'),
+                             'items': [{'href': self._ambari_href('hosts', host),
+                                        'Hosts': {'cluster_name': cluster.clustername, 'host_name': host,
+                                                  'ip': ip}} for host, ip in sorted(cluster.hosts.items())]}
+            host = parts[1]
+            if host not in cluster.hosts:
+                return 404, self._not_found("Host not found")
+            components = [component for component in cluster.component_services
+                          if cluster.get_state(component, host) is not None]
+            if len(parts) == 2:
+                return 200, {'href': self._ambari_href('hosts', host),
+                             'Hosts': {'cluster_name': cluster.clustername, 'host_name': host,
+                                       'ip': cluster.hosts[host]},
+                             'host_components': [self._host_component(component, host, False)
+                                                 for component in components]}
+            if len(parts) == 4 and parts[2] == 'host_components' and parts[3] in components:
+                if self.command == 'PUT':
+                    return self._change_state([(parts[3], host)])
+                return 200, self._host_component(parts[3], host, True)
+        elif resource == 'host_components' and len(parts) == 1:
+            selected = self._select_host_components()
+            if self.command == 'PUT':
+                return self._change_state(selected)
+            return 200, {'items': [self._host_component(component, host, False) for component, host in selected]}
+        elif resource == 'requests' and len(parts) == 2 and parts[1].isdigit():
+            request = cluster.get_request(int(parts[1]))
+            if request is not None:
+                return 200, self._request(request)
+        return 404, self._not_found("Resource not found")
+
+    @staticmethod
+    def _not_found(message):
+        return {'status': 404, 'message': "The requested resource doesn't exist: {0}".format(message)}
+
+    def _service(self, service, with_components):
+        states = [self.cluster.get_component_counts(component) for component in self.cluster.services[service]]
+        info = {'href': self._ambari_href('services', service),
+                'ServiceInfo': {'cluster_name': self.cluster.clustername, 'service_name': service,
+                                'state': 'STARTED' if all(started > 0 for started, total in states) else 'INSTALLED'}}
+        info['components'] = [self._component(component, with_components)
+                              for component in self.cluster.services[service]]
+        return info
+
+    def _component(self, component, with_host_components):
+        service = self.cluster.component_services[component]
+        started_count, total_count = self.cluster.get_component_counts(component)
+        info = {'href': self._ambari_href('services', service, 'components', component),
+                'ServiceComponentInfo': {'cluster_name': self.cluster.clustername, 'service_name': service,
+                                         'component_name': component,
+                                         'state': 'STARTED' if started_count > 0 else 'INSTALLED',
+                                         'started_count': started_count, 'total_count': total_count,
+                                         'installed_count': total_count - started_count}}
+        if with_host_components:
+            info['host_components'] = [self._host_component(component, host, False)
+                                       for host in self.cluster.get_hosts(component)]
+        return info
+
+    def _host_component(self, component, host, with_metrics):
+        roles = {'cluster_name': self.cluster.clustername, 'component_name': component, 'host_name': host,
+                 'service_name': self.cluster.component_services[component],
+                 'state': self.cluster.get_state(component, host)}
+        ha_state = self.cluster.get_ha_state(component, host)
+        if component == 'RESOURCEMANAGER' and ha_state is not None:
+            roles['ha_state'] = ha_state.upper()
+        info = {'href': self._ambari_href('hosts', host, 'host_components', component), 'HostRoles': roles}
+        if with_metrics and ha_state is not None:
+            if component == 'NAMENODE':
+                info['metrics'] = {'dfs': {'FSNamesystem': {'HAState': ha_state}}}
+            elif component == 'HBASE_MASTER':
+                info['metrics'] = {'hbase': {'master': {'IsActiveMaster': str(ha_state == 'active').lower()}}}
+        return info
+
+    def _predicate_values(self, field):
+        match = re.search(r'(?:^|&){0}\.in\(([^)]*)\)'.format(re.escape(field)), self.query)
+        if match is not None:
+            return set(unquote(match.group(1)).split(','))
+        if field in self.params:
+            return {self.params[field]}
+
+    def _select_host_components(self):
+        components = self._predicate_values('HostRoles/component_name')
+        hosts = self._predicate_values('HostRoles/host_name')
+        return [(component, host) for component, host in sorted(self.cluster.states)
+                if (components is None or component in components) and (hosts is None or host in hosts)]
+
+    def _change_state(self, host_components):
+        try:
+            data = json.loads(self.body.decode())
+            # The Api sends the body as an escaped JSON string, Ambari accepts both
+            if isinstance(data, str):
+                data = json.loads(data)
+            state = data['Body']['HostRoles']['state']
+            context = data.get('RequestInfo', {}).get('context', '')
+            request_id = self.cluster.change_state(host_components, state, context=context)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return 400, {'status': 400, 'message': "Invalid request: {0}".format(e)}
+        if request_id is None:
+            return 200, None
+        return 202, {'href': self._ambari_href('requests', str(request_id)),
+                     'Requests': {'id': request_id, 'status': 'Accepted'}}
+
+    def _request(self, request):
+        href = self._ambari_href('requests', str(request['id']))
+        return {'href': href,
+                'Requests': {'id': request['id'], 'cluster_name': self.cluster.clustername,
+                             'request_context': request['context'], 'request_status': request['status'],
+                             'progress_percent': min(request['progress'], 100.0)},
+                'tasks': [{'href': '{0}/tasks/{1}'.format(href, i + 1),
+                           'Tasks': {'id': i + 1, 'request_id': request['id'], 'host_name': host, 'role': component,
+                                     'command': command, 'status': status}}
+                          for i, (component, host, command, status) in enumerate(request['tasks'])]}
+
+    # WebHDFS and fsck
+
+    def _send_remote_exception(self, error):
+        self._send_json(error.status, {'RemoteException': {
+            'exception': error.exception,
+            'javaClassName': 'org.apache.hadoop.{0}'.format(error.exception),
+            'message': error.message}})
+
+    def _check_namenode(self):
+        """
+        Make sure the called host runs the active NameNode
+
+        :return: False if an error response was sent
+        """
+        if not self.cluster.is_running('NAMENODE', self.host):
+            raise _ConnectionDropped()
+        if self.cluster.get_ha_state('NAMENODE', self.host) != 'active':
+            self._send_remote_exception(SimulatedHdfsError(
+                'StandbyException', "Operation category READ is not supported in state standby", status=403))
+            return False
+        return True
+
+    def _redirect_to_datanode(self, datanode):
+        params = dict(self.params, datanode='true', dn=datanode)
+        location = 'http://{0}{1}?{2}'.format(self.host_header, self.url_path, urlencode(params))
+        self._send(307, headers={'Location': location})
+
+    def _running_datanodes(self, candidates=None):
+        if candidates is None:
+            candidates = self.cluster.get_hosts('DATANODE')
+        return [host for host in candidates if self.cluster.is_running('DATANODE', host)]
+
+    def _flag(self, name):
+        return self.params.get(name, 'false').lower() == 'true'
+
+    def _namenode(self):
+        if not self._check_namenode():
+            return
+        op = self.params.get('op', '').upper()
+        path = self.url_path[len(WEBHDFS_BASE):] or '/'
+        cluster = self.cluster
+        try:
+            if op in ('CREATE', 'APPEND'):
+                if op == 'CREATE' and path in cluster.files and not self._flag('overwrite'):
+                    raise SimulatedHdfsError('FileAlreadyExistsException', "{0} already exists".format(path),
+                                             status=403)
+                if op == 'APPEND':
+                    cluster.get_status(path)
+                datanodes = self._running_datanodes()
+                if len(datanodes) == 0:
+                    raise SimulatedHdfsError('IOException', "No running datanodes", status=500)
+                self._redirect_to_datanode(self.simulator.choice(datanodes))
+            elif op in ('OPEN', 'GETFILECHECKSUM'):
+                blocks = cluster.get_blocks(path)
+                datanodes = self._running_datanodes(blocks[0]['locations'] if len(blocks) > 0 else None)
+                if len(datanodes) == 0:
+                    raise SimulatedHdfsError('BlockMissingException', "Could not obtain block of {0}".format(path),
+                                             status=500)
+                self._redirect_to_datanode(self.simulator.choice(datanodes))
+            elif op == 'GETFILEBLOCKLOCATIONS' and self.simulator.block_locations_api:
+                self._send_json(200, {'BlockLocations': {'BlockLocation': self._block_locations(path)}})
+            elif op == 'GETFILESTATUS':
+                self._send_json(200, {'FileStatus': cluster.get_status(path)})
+            elif op == 'LISTSTATUS':
+                self._send_json(200, {'FileStatuses': {'FileStatus': cluster.list_status(path)}})
+            elif op == 'MKDIRS':
+                cluster.mkdirs(path)
+                self._send_json(200, {'boolean': True})
+            elif op == 'RENAME':
+                self._send_json(200, {'boolean': cluster.rename(path, self.params.get('destination', ''))})
+            elif op == 'DELETE':
+                self._send_json(200, {'boolean': cluster.delete(path, recursive=self._flag('recursive'))})
+            else:
+                raise SimulatedHdfsError('IllegalArgumentException', "Invalid value for webhdfs parameter "
+                                                                     "\"op\": {0}".format(op), status=400)
+        except SimulatedHdfsError as e:
+            self._send_remote_exception(e)
+
+    def _block_locations(self, path):
+        offset = int(self.params.get('offset', 0))
+        length = self.params.get('length')
+        end = None if length is None else offset + int(length)
+        locations = []
+        for block in self.cluster.get_blocks(path):
+            if block['offset'] + block['length'] <= offset or (end is not None and block['offset'] >= end):
+                continue
+            names = ['{0}:50010'.format(self.cluster.hosts[host]) for host in block['locations']]
+            locations.append({'offset': block['offset'], 'length': block['length'], 'corrupt': False,
+                              'hosts': list(block['locations']), 'names': names, 'cachedHosts': [],
+                              'topologyPaths': ['/default-rack/{0}'.format(name) for name in names],
+                              'storageTypes': ['DISK'] * len(names)})
+        return locations
+
+    def _datanode(self):
+        if not self.cluster.is_running('DATANODE', self.params.get('dn')):
+            raise _ConnectionDropped()
+        op = self.params.get('op', '').upper()
+        path = self.url_path[len(WEBHDFS_BASE):]
+        try:
+            if op == 'CREATE':
+                block_size = self.params.get('blocksize')
+                self.cluster.create(path, self.body, overwrite=self._flag('overwrite'),
+                                    block_size=None if block_size is None else int(block_size))
+                self._send(201, headers={'Location': 'hdfs://{0}{1}'.format(self.host_header, path)})
+            elif op == 'APPEND':
+                self.cluster.append(path, self.body)
+                self._send(200)
+            elif op == 'OPEN':
+                length = self.params.get('length')
+                data = self.cluster.read(path, offset=int(self.params.get('offset', 0)),
+                                         length=None if length is None else int(length))
+                self._send(200, data, content_type='application/octet-stream')
+            elif op == 'GETFILECHECKSUM':
+                self._send_json(200, {'FileChecksum': self.cluster.get_checksum(path)})
+            else:
+                raise SimulatedHdfsError('IllegalArgumentException', "Invalid operation {0}".format(op),
+                                         status=400)
+        except SimulatedHdfsError as e:
+            self._send_remote_exception(e)
+
+    def _fsck(self):
+        if not self._check_namenode():
+            return
+        racks = self.params.get('racks', '0').lower() in ('1', 'true')
+        self._send(200, self.simulator.fsck_report(self.params.get('path', '/'), racks=racks).encode(),
+                   content_type='text/plain; charset=utf-8')
+
+    # ResourceManager UI
+
+    def _resourcemanager(self):
+        if not self.cluster.is_running('RESOURCEMANAGER', self.host):
+            raise _ConnectionDropped()
+        self._send(200, b"<html><body>Simulated ResourceManager</body></html>", content_type='text/html')
+
+
+class ClusterSimulator:
+    """
+    Local stand-in for the Ambari REST api, WebHDFS/fsck of the NameNodes and the ResourceManager UI
+
+    All endpoints are served on one port of the local machine. The endpoint is chosen by path (/api/v1/clusters,
+    /webhdfs/v1, /fsck, anything else is the RM UI) and the called component host by the Host header, so the master
+    hosts of the SimulatedCluster ('localhost', '127.0.0.1') behave as separate hosts. A stopped component drops the
+    connection like a host without a listening process.
+
+    Use environment() to point the smoketests at the simulator.
+    """
+
+    def __init__(self, cluster=None, address='127.0.0.1', port=0, latency=None, failure_rates=None, seed=None,
+                 ambari_user='raj_ops', ambari_password='raj_ops', block_locations_api=True, logger=logging):
+        """
+        :param cluster: The SimulatedCluster to serve, a default cluster of 10 worker hosts when None
+        :param address: Address to listen on
+        :param port: Port to listen on, 0 picks a free port
+        :param latency: Dict {endpoint kind: seconds} added to every response of that kind (see ENDPOINT_KINDS)
+        :param failure_rates: Dict {endpoint kind: fraction} of the calls that fail with a 5xx response. The kind
+        'ambari_request' makes that fraction of the Ambari state change requests end FAILED
+        :param seed: Seed for the failure injection and the choice of DataNodes
+        :param ambari_user: User accepted by the Ambari authentication
+        :param ambari_password: Password accepted by the Ambari authentication
+        :param block_locations_api: Serve WebHDFS GETFILEBLOCKLOCATIONS (Hadoop 3), False answers it like a Hadoop 2
+        NameNode that does not know the operation
+        :param logger: logger instance
+        """
+        self.cluster = SimulatedCluster() if cluster is None else cluster
+        self.address = address
+        self.latency = dict(latency or {})
+        self.failure_rates = dict(failure_rates or {})
+        self.cluster.request_failure_rate = self.failure_rates.get('ambari_request', 0.0)
+        self.ambari_user = ambari_user
+        self.ambari_password = ambari_password
+        self.block_locations_api = block_locations_api
+        self.logger = logger
+        self.calls = Counter()
+        self.users = {}
+        self._random = random.Random(seed)
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._server = _SimulatorHttpServer((address, port), self)
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='cluster-simulator', daemon=True)
+        self._thread.start()
+        self.logger.info("Cluster simulator listening on {0}:{1}".format(self.address, self.port))
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def environment(self):
+        """
+        :return: A dict with the environment variables that point Ambari, HDFS and YARN clients at the simulator
+        """
+        return {'AMBARI_SCHEMA': 'http', 'AMBARI_HOST': self.address, 'AMBARI_PORT': str(self.port),
+                'AMBARI_USER': self.ambari_user, 'AMBARI_PWD': self.ambari_password,
+                'HDFS_NAMENODE_SCHEMA': 'http', 'HDFS_NAMENODE_PORT': str(self.port),
+                'YARN_RESOURCEMANAGER_PORT': str(self.port)}
+
+    def record_call(self, kind, user=None):
+        """
+        Count a call of an endpoint kind and remember the user.name it was called with (None without) in users
+        """
+        with self._lock:
+            self.calls[kind] += 1
+            self.users.setdefault(kind, set()).add(user)
+
+    def delay(self, kind):
+        if self.latency.get(kind, 0) > 0:
+            time.sleep(self.latency[kind])
+
+    def should_fail(self, kind):
+        with self._lock:
+            return self._random.random() < self.failure_rates.get(kind, 0.0)
+
+    def choice(self, items):
+        with self._lock:
+            return self._random.choice(items)
+
+    def create_session(self):
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions.add(session_id)
+        return session_id
+
+    def has_session(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def expire_sessions(self):
+        """
+        Forget all Ambari sessions, like an Ambari restart
+        """
+        with self._lock:
+            self._sessions.clear()
+
+    def fsck_report(self, path, racks=True):
+        """
+        :param racks: Print the locations like 'hdfs fsck <path> -files -blocks -locations -racks' (/rack/ip:port),
+        otherwise like Hadoop 2.7+ prints them without -racks (DatanodeInfoWithStorage[ip:port,storage,type])
+        :return: The fsck output for a file or the files in a directory
+        """
+        date = formatdate(localtime=True)
+        header = "FSCK started by smoketest (auth:SIMPLE) from /127.0.0.1 for path {0} at {1}\n".format(path, date)
+        if path in self.cluster.directories:
+            prefix = path.rstrip('/') + '/'
+            paths = sorted(file_path for file_path in list(self.cluster.files) if file_path.startswith(prefix))
+        else:
+            paths = [path]
+        lines = [header]
+        length = 0
+        block_count = 0
+        for file_path in paths:
+            try:
+                blocks = self.cluster.get_blocks(file_path)
+                file_length = self.cluster.get_status(file_path)['length']
+            except SimulatedHdfsError:
+                return header + "FSCK ended at {0} in 1 milliseconds\n\n\nFsck on path '{1}' FAILED\n".format(
+                    date, path)
+            length += file_length
+            block_count += len(blocks)
+            lines.append("{0} {1} bytes, {2} block(s):  OK\n".format(file_path, file_length, len(blocks)))
+            for i, block in enumerate(blocks):
+                if racks:
+                    locations = ', '.join('/default-rack/{0}:50010'.format(self.cluster.hosts[host])
+                                          for host in block['locations'])
+                else:
+                    locations = ', '.join('DatanodeInfoWithStorage[{0}:50010,DS-{1},DISK]'.format(
+                        self.cluster.hosts[host], host) for host in block['locations'])
+                lines.append("{0}. BP-1-127.0.0.1-1:blk_{1}_{2} len={3} repl={4} [{5}]\n".format(
+                    i, block['id'], block['id'] - 1073740000, block['length'], len(block['locations']), locations))
+            lines.append("\n")
+        summary = ("\nStatus: HEALTHY\n"
+                   " Total size:\t{0} B\n"
+                   " Total files:\t{6}\n"
+                   " Total blocks (validated):\t{1}\n"
+                   " Default replication factor:\t{2}\n"
+                   " Number of data-nodes:\t\t{3}\n"
+                   "FSCK ended at {4} in 1 milliseconds\n\n\n"
+                   "The filesystem under path '{5}' is HEALTHY\n")
+        lines.append(summary.format(length, block_count, self.cluster.replication,
+                                    len(self.cluster.get_hosts('DATANODE')), date, path, len(paths)))
+        return ''.join(lines)
@@ -4,6 +4,7 @@ import spark.spark_runner as spark
 
 
 class SparkVerifier(verification.Verifier):
+    tier = verification.TIER_JOB
 
     def __init__(self, logger, spark2=False):
         super().__init__(logger)
@@ -1,10 +1,29 @@
 # flake8: noqa
+import http.server
+import json
+import socketserver
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
 
+import requests
+
 import ambari.api as api
 
 
+def json_response(body, **kwargs):
+    """
+    A mocked response with a JSON body, parsed completely (json) or while it is streamed (iter_content)
+    """
+    document = json.dumps(body).encode()
+    response = Mock(ok=True, status_code=200, **kwargs)
+    response.json.return_value = body
+    response.iter_content.side_effect = lambda chunk_size: (document[i:i + chunk_size]
+                                                            for i in range(0, len(document), chunk_size))
+    return response
+
+
 class TestAmbariApi(unittest.TestCase):
     def setUp(self):
         self.ambari = api.Api(request_timeout=2, polling_timeout=5)
@@ -14,7 +33,7 @@ class TestAmbariApi(unittest.TestCase):
         self.assertRegex(self.ambari._encode_escaped_json_string_for_ambari(data), '\\\\"foo\\\\": \\\\"bar\\\\"')
         self.assertRegex(self.ambari._encode_escaped_json_string_for_ambari(data), '\\\\"baz\\\\": {\\\\"nr\\\\": 42}')
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_mocking_request(self, mock_request):
         response = {'ServiceComponentInfo': {'component_name': 'KRIS_GATEWAY', 'display_name': 'Kris Gateway',
                                              'unknown_count': 0, 'state': 'STARTED', 'service_name': 'KRIS',
@@ -34,13 +53,12 @@ class TestAmbariApi(unittest.TestCase):
                 'href': 'https://sandbox.hortonworks.com:8443/api/v1/clusters/Sandbox/hosts/sandbox.hortonworks.com/host_components/KRIS_GATEWAY'}],
                     'href': 'https://sandbox.hortonworks.com:8443/api/v1/clusters/Sandbox/services/KRIS/components/KRIS_GATEWAY'}
 
-        mock_request.return_value = Mock(ok=True, status_code=200, cookies={'AMBARISESSIONID': 'KRISUUID12345678'})
-        mock_request.return_value.json.return_value = response
+        mock_request.return_value = json_response(response, cookies={'AMBARISESSIONID': 'KRISUUID12345678'})
 
         ambari_response = self.ambari.get_component_info('KNOX', 'KNOX_GATEWAY')
-        self.assertEqual(response, ambari_response)
+        self.assertEqual({'host_components': response['host_components']}, ambari_response)
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_check_response(self, mock_request):
         response = {'MockedResponse': {'Mock': True}}
 
@@ -50,14 +68,14 @@ class TestAmbariApi(unittest.TestCase):
         with self.assertRaises(api.AmbariRequestError):
             self.ambari.get_component_info('KNOX', 'KNOX_GATEWAY')
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_ambari_session(self, mock_request):
         response = {'MockedResponse': {'Mock': True}}
 
         mock_request.return_value = Mock(ok=True, status_code=200, cookies={'AMBARISESSIONID': 'KRISUUID12345678'})
         mock_request.return_value.json.return_value = response
 
-        ambari_response = self.ambari.get_component_info('KNOX', 'KNOX_GATEWAY')
+        ambari_response = self.ambari.get_service_info('KNOX')
         self.assertEqual(response, ambari_response)
         self.assertEqual('KRISUUID12345678', self.ambari.ambari_session)
         self.assertDictEqual({
@@ -155,7 +173,7 @@ class TestAmbariApi(unittest.TestCase):
         self.assertEqual(path,
                          'https://sandbox.hortonworks.com:8443/api/v1/clusters/Sandbox/hosts/' + host + '/host_components/KRIS_GATEWAY')
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_timeout_waiting_for_service_state_change(self, mock_request):
         response = {'tasks': [
             {'Tasks': {'stage_id': 0, 'id': 46910, 'cluster_name': 'Sandbox', 'request_id': 10045},
@@ -222,3 +240,247 @@ class TestAmbariApi(unittest.TestCase):
         hosts = self.ambari.get_sample_hosts(info, k=1)
         for host in hosts:
             self.assertIn(host, ['sandbox.hortonworks.com', 'sandbox.hortonworks.com'])
+
+
+class CountingAmbariHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        CountingAmbariHandler.connections += 1
+
+    def do_GET(self):
+        body = json.dumps({'href': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'AMBARISESSIONID=KRISUUID12345678; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class TestAmbariApiConnectionReuse(unittest.TestCase):
+    def setUp(self):
+        CountingAmbariHandler.connections = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), CountingAmbariHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        env = {'AMBARI_HOST': '127.0.0.1', 'AMBARI_PORT': str(self.server.server_address[1])}
+        with patch.dict('ambari.api.os.environ', env):
+            self.ambari = api.Api(request_timeout=2, polling_timeout=5)
+
+    def tearDown(self):
+        self.ambari.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pooled_session_reuses_connection(self):
+        for _ in range(25):
+            self.ambari.get_service_info('HDFS')
+        self.assertEqual(1, CountingAmbariHandler.connections)
+
+    def test_bare_requests_open_connection_per_call(self):
+        # Baseline for comparison: what every Ambari call cost before the pooled session
+        url = 'http://127.0.0.1:{0}/api/v1/clusters'.format(self.server.server_address[1])
+        for _ in range(25):
+            requests.request('GET', url, timeout=2)
+        self.assertEqual(25, CountingAmbariHandler.connections)
+
+
+class TestAmbariHaStates(unittest.TestCase):
+    def setUp(self):
+        self.ambari = api.Api(request_timeout=2, polling_timeout=5)
+        self.ambari.ambari_session = 'KRISUUID12345678'
+
+    @staticmethod
+    def _host_component(host, component):
+        return {'HostRoles': {'component_name': component, 'host_name': host},
+                'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/{0}/host_components/{1}'.format(
+                    host, component)}
+
+    def _respond(self, responses):
+        def request(method, url, **kwargs):
+            for fragment, body in responses.items():
+                if fragment in url:
+                    return json_response(body)
+            raise AssertionError("Unexpected url {0}".format(url))
+        return request
+
+    @patch('requests.Session.request')
+    def test_namenode_ha_states(self, mock_request):
+        mock_request.side_effect = self._respond({
+            'nn1/host_components/NAMENODE?': {'HostRoles': {'host_name': 'nn1'},
+                                              'metrics': {'dfs': {'FSNamesystem': {'HAState': 'standby'}}}},
+            'nn2/host_components/NAMENODE?': {'HostRoles': {'host_name': 'nn2'},
+                                              'metrics': {'dfs': {'FSNamesystem': {'HAState': 'active'}}}},
+            'nn3/host_components/NAMENODE?': {'HostRoles': {'host_name': 'nn3'}},
+            'components/NAMENODE?fields=host_components': {
+                'host_components': [self._host_component(host, 'NAMENODE') for host in ['nn1', 'nn2', 'nn3']]}
+        })
+        self.assertDictEqual({'nn1': 'standby', 'nn2': 'active', 'nn3': None},
+                             self.ambari.get_host_ha_states('HDFS', 'NAMENODE'))
+        self.assertEqual('nn2', self.ambari.get_specific_nn_host(state='active'))
+        self.assertEqual('nn1', self.ambari.get_specific_nn_host(state='standby'))
+
+    @patch('requests.Session.request')
+    def test_hbase_master_ha_states(self, mock_request):
+        mock_request.side_effect = self._respond({
+            'hm1/host_components/HBASE_MASTER?': {'HostRoles': {'host_name': 'hm1'},
+                                                  'metrics': {'hbase': {'master': {'IsActiveMaster': 'false'}}}},
+            'hm2/host_components/HBASE_MASTER?': {'HostRoles': {'host_name': 'hm2'},
+                                                  'metrics': {'hbase': {'master': {'IsActiveMaster': 'true'}}}},
+            'components/HBASE_MASTER?fields=host_components': {
+                'host_components': [self._host_component(host, 'HBASE_MASTER') for host in ['hm1', 'hm2']]}
+        })
+        self.assertEqual('hm2', self.ambari.get_specific_hbase_master(state='active'))
+        self.assertEqual('hm1', self.ambari.get_specific_hbase_master(state='standby'))
+
+    @patch('requests.Session.request')
+    def test_resourcemanager_ha_states_in_one_call(self, mock_request):
+        mock_request.side_effect = self._respond({
+            'components/RESOURCEMANAGER?fields=host_components/HostRoles/ha_state': {'host_components': [
+                {'HostRoles': {'host_name': 'rm1', 'ha_state': 'ACTIVE'}},
+                {'HostRoles': {'host_name': 'rm2', 'ha_state': 'STANDBY'}}]}
+        })
+        self.assertDictEqual({'rm1': 'active', 'rm2': 'standby'},
+                             self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER'))
+        self.assertDictEqual({'rm1': 'ACTIVE', 'rm2': 'STANDBY'},
+                             self.ambari.get_component_host_hastate('YARN', 'RESOURCEMANAGER'))
+        self.assertEqual(1, mock_request.call_count)
+
+    @patch('requests.Session.request')
+    def test_ha_states_are_refreshed_after_state_change(self, mock_request):
+        mock_request.side_effect = self._respond({
+            'components/RESOURCEMANAGER?fields=host_components/HostRoles/ha_state': {'host_components': [
+                {'HostRoles': {'host_name': 'rm1', 'ha_state': 'ACTIVE'}}]},
+            'host_components/RESOURCEMANAGER': {'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/requests/1'},
+            'requests/1?fields=Requests/request_status,Requests/progress_percent': {
+                'Requests': {'request_status': 'COMPLETED', 'progress_percent': 100.0}}
+        })
+        self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER')
+        self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER')
+        self.assertEqual(1, mock_request.call_count)
+
+        self.ambari.change_host_component_state_and_wait(
+            'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/rm1/host_components/RESOURCEMANAGER')
+        self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER')
+        self.assertEqual(4, mock_request.call_count)
+
+    @patch('requests.Session.request')
+    def test_state_read_right_after_result_is_fresh(self, mock_request):
+        responses = {
+            'components/RESOURCEMANAGER?fields=host_components/HostRoles/ha_state': {'host_components': [
+                {'HostRoles': {'host_name': 'rm1', 'ha_state': 'ACTIVE'}}]},
+            'host_components/RESOURCEMANAGER': {'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/requests/1'},
+            'requests/1?fields=Requests/request_status,Requests/progress_percent': {
+                'Requests': {'request_status': 'COMPLETED', 'progress_percent': 100.0}}
+        }
+        mock_request.side_effect = self._respond(responses)
+        self.assertEqual({'rm1': 'active'}, self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER'))
+        invalidate_cache = self.ambari.invalidate_cache
+
+        def slow_invalidate_cache(*kinds):
+            # A slow invalidation must still be finished before the waiter wakes up
+            time.sleep(0.2)
+            invalidate_cache(*kinds)
+        self.ambari.invalidate_cache = slow_invalidate_cache
+
+        request = self.ambari.change_host_component_state(
+            'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/rm1/host_components/RESOURCEMANAGER', state='INSTALLED')
+        responses['components/RESOURCEMANAGER?fields=host_components/HostRoles/ha_state'] = {'host_components': [
+            {'HostRoles': {'host_name': 'rm1', 'ha_state': 'STANDBY'}}]}
+        request.result(timeout=5)
+        self.assertEqual({'rm1': 'standby'}, self.ambari.get_host_ha_states('YARN', 'RESOURCEMANAGER'))
+
+
+class TestAmbariBulkStateChange(unittest.TestCase):
+    def setUp(self):
+        self.ambari = api.Api(request_timeout=2, polling_timeout=5)
+        self.ambari.ambari_session = 'KRISUUID12345678'
+
+    @patch('requests.Session.request')
+    def test_change_host_components_state_with_one_request(self, mock_request):
+        responses = {
+            'PUT': {'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/requests/12'},
+            'GET': {'Requests': {'request_status': 'COMPLETED', 'progress_percent': 100.0},
+                    'tasks': [{'Tasks': {'host_name': 'dn1', 'role': 'DATANODE', 'status': 'COMPLETED'}},
+                              {'Tasks': {'host_name': 'dn2', 'role': 'DATANODE', 'status': 'COMPLETED'}}]}
+        }
+
+        def request(method, url, **kwargs):
+            response = Mock(ok=True, status_code=200)
+            response.json.return_value = responses[method]
+            return response
+        mock_request.side_effect = request
+
+        ambari_request = self.ambari.change_host_components_state(['DATANODE', 'NODEMANAGER'], ['dn1', 'dn2'],
+                                                                  state='INSTALLED')
+        self.assertEqual('COMPLETED', ambari_request.result(timeout=5)['request_status'])
+        self.assertEqual(['dn1', 'dn2'], [task['host_name'] for task in ambari_request.get_tasks()])
+
+        method, url = mock_request.call_args_list[0][0]
+        self.assertEqual('PUT', method)
+        self.assertEqual('http://sandbox:8080/api/v1/clusters/Sandbox/host_components?'
+                         'HostRoles/component_name.in(DATANODE,NODEMANAGER)&HostRoles/host_name.in(dn1,dn2)', url)
+        self.assertIn('\\"state\\": \\"INSTALLED\\"', mock_request.call_args_list[0][1]['data'])
+        self.assertEqual(3, mock_request.call_count)
+
+
+class TestRequestPoller(unittest.TestCase):
+    def setUp(self):
+        self.polls = {}
+        self.statuses = {}
+
+    def _fetch_status(self, href):
+        self.polls[href] = self.polls.get(href, 0) + 1
+        status, completed_after = self.statuses[href]
+        if self.polls[href] >= completed_after:
+            return {'request_status': status, 'progress_percent': 100.0}
+        return {'request_status': 'IN_PROGRESS', 'progress_percent': 10.0 * self.polls[href]}
+
+    def test_waits_for_many_requests_in_one_loop(self):
+        self.statuses = {'requests/1': ('COMPLETED', 2), 'requests/2': ('COMPLETED', 4),
+                         'requests/3': ('FAILED', 1)}
+        poller = api.RequestPoller(self._fetch_status, initial_interval=0.01, max_interval=0.05)
+        futures = {href: poller.submit(href, timeout=5) for href in self.statuses}
+
+        self.assertEqual('COMPLETED', futures['requests/1'].result(timeout=5)['request_status'])
+        self.assertEqual('COMPLETED', futures['requests/2'].result(timeout=5)['request_status'])
+        with self.assertRaises(api.AmbariRequestError):
+            futures['requests/3'].result(timeout=5)
+        self.assertDictEqual({'requests/1': 2, 'requests/2': 4, 'requests/3': 1}, self.polls)
+
+    def test_on_done_runs_before_the_future_is_resolved(self):
+        self.statuses = {'requests/1': ('COMPLETED', 1)}
+        poller = api.RequestPoller(self._fetch_status, initial_interval=0.01, max_interval=0.05)
+        done = []
+
+        def on_done():
+            time.sleep(0.1)
+            done.append(True)
+        future = poller.submit('requests/1', timeout=5, on_done=on_done)
+        future.result(timeout=5)
+        self.assertEqual([True], done)
+
+    def test_timeout_from_worker_thread(self):
+        self.statuses = {'requests/1': ('COMPLETED', 1000)}
+        poller = api.RequestPoller(self._fetch_status, initial_interval=0.01, max_interval=0.05)
+        errors = []
+
+        def wait():
+            try:
+                poller.submit('requests/1', timeout=0.2).result(timeout=5)
+            except api.AmbariWaitForCompletionTimeoutError as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=wait)
+        worker.start()
+        worker.join(timeout=5)
+        self.assertEqual(1, len(errors))
@@ -0,0 +1,65 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from hdfs.append_probe import AppendProbe, AppendProbeError
+
+
+class TestAppendProbe(unittest.TestCase):
+    def setUp(self):
+        self.hdfs = MagicMock()
+
+    def test_failed_appends_are_one_stall(self):
+        self.hdfs.append_to_hdfs.side_effect = [None, Exception('pipeline'), Exception('pipeline'), None, None]
+        probe = AppendProbe(self.hdfs, '/probe')
+        for _ in range(5):
+            probe.append()
+
+        self.assertEqual([0, 3, 4], probe.acknowledged)
+        self.assertEqual(1, len(probe.stalls))
+        summary = probe.summary()
+        self.assertEqual(3, summary['operations'])
+        self.assertEqual(2, summary['errors'])
+        self.assertEqual(probe.stalls[0], summary['longest_stall'])
+        self.assertEqual(b'000000000000003\n', self.hdfs.append_to_hdfs.call_args_list[3][0][1])
+
+    def test_slow_append_is_a_stall(self):
+        self.hdfs.append_to_hdfs.side_effect = lambda path, data: time.sleep(0.05)
+        probe = AppendProbe(self.hdfs, '/probe', stall_threshold=0.01)
+        probe.append()
+        self.assertEqual(1, len(probe.stalls))
+        self.assertGreaterEqual(probe.stalls[0], 0.05)
+
+    def test_ongoing_stall(self):
+        self.hdfs.append_to_hdfs.side_effect = Exception('pipeline')
+        probe = AppendProbe(self.hdfs, '/probe')
+        probe.append()
+        time.sleep(0.02)
+        self.assertEqual([], probe.stalls)
+        self.assertGreaterEqual(probe.longest_stall(), 0.02)
+
+    def test_background_appends(self):
+        probe = AppendProbe(self.hdfs, '/probe', interval=0.01)
+        probe.start()
+        time.sleep(0.1)
+        summary = probe.stop()
+
+        self.hdfs.stream_to_hdfs.assert_called_once_with('/probe', [])
+        self.assertGreater(summary['operations'], 2)
+        self.assertEqual(summary['operations'], self.hdfs.append_to_hdfs.call_count)
+
+    def test_verify_content(self):
+        probe = AppendProbe(self.hdfs, '/probe')
+        probe.acknowledged = [0, 2]
+        self.hdfs.get_remote_file.return_value = b'000000000000000\n000000000000001\n000000000000002\n0000'
+        probe.verify_content()
+
+        self.hdfs.get_remote_file.return_value = b'000000000000000\n000000000000001\n'
+        with self.assertRaisesRegex(AppendProbeError, 'missing'):
+            probe.verify_content()
+        self.hdfs.get_remote_file.return_value = b'000000000000002\n000000000000000\n'
+        with self.assertRaisesRegex(AppendProbeError, 'order'):
+            probe.verify_content()
+        self.hdfs.get_remote_file.return_value = b'0000000x0000000\n'
+        with self.assertRaisesRegex(AppendProbeError, 'corrupted'):
+            probe.verify_content()
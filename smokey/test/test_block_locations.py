@@ -0,0 +1,107 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import hdfs.hdfs_api as hdfs_api
+from hdfs.block_locations import parse_fsck_lines
+from hdfs.resolver import HostResolver
+from simulator.cluster import SimulatedCluster
+from simulator.server import ClusterSimulator
+
+
+class TestParseFsckLines(unittest.TestCase):
+    def test_parse_files_and_blocks(self):
+        output = [
+            "FSCK started by tester (auth:KERBEROS_SSL) from /192.168.0.48 for path /data at Wed Feb 22 10:19:52 2017",
+            "/data/a.log 350 bytes, 3 block(s):  OK",
+            "0. BP-1-192.168.0.241-1:blk_1_1 len=200 repl=2 [/RACK1/192.168.2.32:1019, /RACK2/192.168.3.9:1019]",
+            "1. BP-1-192.168.0.241-1:blk_2_2 len=100 repl=1 [DatanodeInfoWithStorage[192.168.2.14:50010,DS-1,DISK]]",
+            "2. BP-1-192.168.0.241-1:blk_3_3 len=50 Live_repl=3 [DatanodeInfoWithStorage[10.0.0.1:50010,DS-a,DISK], "
+            "DatanodeInfoWithStorage[10.0.0.2:50010,DS-b,DISK], DatanodeInfoWithStorage[10.0.0.3:50010,DS-c,SSD]]",
+            "",
+            "/data/empty.log 0 bytes, replicated: replication=3, 0 block(s):  OK",
+            "",
+            "Status: HEALTHY",
+        ]
+
+        files = list(parse_fsck_lines(output))
+        self.assertEqual(['/data/a.log', '/data/empty.log'], [path for path, _, _ in files])
+        self.assertEqual([{'offset': 0, 'length': 200, 'ips': ['192.168.2.32', '192.168.3.9']},
+                          {'offset': 200, 'length': 100, 'ips': ['192.168.2.14']},
+                          {'offset': 300, 'length': 50, 'ips': ['10.0.0.1', '10.0.0.2', '10.0.0.3']}], files[0][2])
+        self.assertEqual((0, []), files[1][1:])
+
+
+class TestBlockLocationIndex(unittest.TestCase):
+    def setUp(self):
+        self.cluster = SimulatedCluster(block_size=1024, seed=5)
+        self.simulator = ClusterSimulator(self.cluster)
+        self.content = bytes(1024 * 1000 + 10)
+        self.path = '/user/smoketest/hdfs_smoketest/blocks.txt'
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def _start(self):
+        self.simulator.start()
+        self.environment = patch.dict(os.environ, self.simulator.environment())
+        self.environment.start()
+        self.addCleanup(self.environment.stop)
+        self.cluster.create(self.path, self.content)
+        return hdfs_api.HdfsApi(request_timeout=5)
+
+    def _expected_blocks(self, path):
+        return [{'offset': block['offset'], 'length': block['length'], 'hosts': block['locations']}
+                for block in self.cluster.get_blocks(path)]
+
+    def test_blocks_from_block_locations_api(self):
+        hdfs = self._start()
+
+        blocks = hdfs.block_locations.get_blocks(self.path)
+        self.assertEqual(1001, len(blocks))
+        self.assertEqual(self._expected_blocks(self.path), blocks)
+        self.assertEqual(self.cluster.get_blocks(self.path)[0]['locations'][0],
+                         hdfs.get_host_location_of_first_block(self.path))
+        self.assertEqual(0, self.simulator.calls['fsck'])
+
+    def test_blocks_from_fsck(self):
+        self.simulator.block_locations_api = False
+        hdfs = self._start()
+        ips = {ip: host for host, ip in self.cluster.hosts.items()}
+        hdfs.resolver = HostResolver(lookup=ips.get)
+
+        # fsck without -racks prints DatanodeInfoWithStorage[...] locations, all replicas of every block are found
+        self.assertIn('DatanodeInfoWithStorage[', self.simulator.fsck_report(self.path, racks=False))
+        self.assertEqual(self._expected_blocks(self.path), hdfs.block_locations.get_blocks(self.path))
+        self.assertEqual(3, len(hdfs.block_locations.get_blocks(self.path)[0]['hosts']))
+        self.assertEqual(1, self.simulator.calls['fsck'])
+        # Every address is resolved once
+        self.assertEqual(len(self.cluster.get_hosts('DATANODE')), hdfs.resolver.lookups)
+
+    def test_cached_until_rewritten(self):
+        hdfs = self._start()
+        hdfs.block_locations.get_blocks(self.path)
+        hdfs.block_locations.get_blocks(self.path)
+        namenode_calls = self.simulator.calls['namenode']
+
+        self.cluster.create(self.path, b'rewritten', overwrite=True)
+        self.assertEqual(self._expected_blocks(self.path), hdfs.block_locations.get_blocks(self.path))
+        # The status of the file and its new block locations
+        self.assertEqual(namenode_calls + 2, self.simulator.calls['namenode'])
+
+    def test_hosts_of_directory_with_fsck(self):
+        self.simulator.block_locations_api = False
+        hdfs = self._start()
+        hdfs.block_locations.use_block_locations_api = False
+        self.cluster.create('/user/smoketest/hdfs_smoketest/other.txt', bytes(3000))
+        hdfs.resolver.preload(self.cluster.hosts)
+
+        hosts = hdfs.block_locations.get_hosts('/user/smoketest/hdfs_smoketest')
+        expected = {}
+        for path in (self.path, '/user/smoketest/hdfs_smoketest/other.txt'):
+            for block in self.cluster.get_blocks(path):
+                for host in block['locations']:
+                    expected[host] = expected.get(host, 0) + 1
+        self.assertEqual(expected, hosts)
+        # One fsck call for all files in the directory
+        self.assertEqual(1, self.simulator.calls['fsck'])
@@ -0,0 +1,68 @@
+import unittest
+
+import ambari.cache as cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTtlCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = cache.TtlCache({'topology': 300, 'state': 2}, max_size=3, clock=self.clock)
+        self.loads = 0
+
+    def _loader(self, value):
+        def load():
+            self.loads += 1
+            return value
+        return load
+
+    def test_hit_within_ttl(self):
+        self.assertEqual({'a': 1}, self.cache.get('topology', 'key', self._loader({'a': 1})))
+        self.assertEqual({'a': 1}, self.cache.get('topology', 'key', self._loader({'a': 2})))
+        self.assertEqual(1, self.loads)
+        self.assertDictEqual({'hits': 1, 'misses': 1, 'size': 1}, self.cache.stats())
+
+    def test_expired_entry_is_reloaded(self):
+        self.cache.get('state', 'key', self._loader('STARTED'))
+        self.clock.now = 3
+        self.assertEqual('INSTALLED', self.cache.get('state', 'key', self._loader('INSTALLED')))
+        self.assertEqual(2, self.loads)
+
+    def test_kind_without_ttl_is_not_cached(self):
+        self.cache.get('metrics', 'key', self._loader(1))
+        self.cache.get('metrics', 'key', self._loader(1))
+        self.assertEqual(2, self.loads)
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_returned_values_are_copies(self):
+        value = self.cache.get('topology', 'key', self._loader({'host_components': [1, 2]}))
+        value['host_components'] = []
+        self.assertEqual({'host_components': [1, 2]}, self.cache.get('topology', 'key', self._loader(None)))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for key in ['a', 'b', 'c']:
+            self.cache.get('topology', key, self._loader(key))
+        self.cache.get('topology', 'a', self._loader('a'))
+        self.cache.get('topology', 'd', self._loader('d'))
+        self.assertEqual(4, self.loads)
+        self.cache.get('topology', 'a', self._loader('a'))
+        self.assertEqual(4, self.loads)
+        self.cache.get('topology', 'b', self._loader('b'))
+        self.assertEqual(5, self.loads)
+
+    def test_invalidate_kind(self):
+        self.cache.get('topology', 'key', self._loader('topology'))
+        self.cache.get('state', 'key', self._loader('state'))
+        self.cache.invalidate('state')
+        self.cache.get('topology', 'key', self._loader('topology'))
+        self.cache.get('state', 'key', self._loader('state'))
+        self.assertEqual(3, self.loads)
+        self.cache.invalidate()
+        self.assertEqual(0, self.cache.stats()['size'])
@@ -0,0 +1,69 @@
+import hashlib
+import struct
+import unittest
+from unittest.mock import patch
+
+import hdfs.checksum as checksum
+from hdfs.payload import Payload
+from simulator.cluster import SimulatedCluster
+
+
+class TestChunkCrcs(unittest.TestCase):
+    def test_crc32c_check_value(self):
+        self.assertEqual(0xE3069283, checksum.crc32c_python(b'123456789'))
+        self.assertEqual(0xE3069283, checksum.crc32c_python(b'56789', checksum.crc32c_python(b'1234')))
+
+    def test_numpy_equals_python(self):
+        data = Payload(7, 512 * 9 + 100).read_range(0, 512 * 9 + 100)
+        expected = b''.join(struct.pack('>I', checksum.crc32c_python(data[offset:offset + 512]))
+                            for offset in range(0, len(data), 512))
+
+        self.assertEqual(expected, checksum.chunk_crcs(data))
+        with patch.object(checksum, 'numpy', None):
+            self.assertEqual(expected, checksum.chunk_crcs(data))
+
+
+class TestFileChecksum(unittest.TestCase):
+    def test_empty_file(self):
+        file_checksum = checksum.FileChecksum(1024)
+
+        # The checksum Hadoop reports for an empty file
+        self.assertEqual('00000000000000000000000070bc8f4b72a86921468bf8e8441dce51', file_checksum.hexdigest())
+        self.assertEqual('MD5-of-0MD5-of-0CRC32', file_checksum.algorithm)
+
+    def test_chunking_does_not_change_the_checksum(self):
+        data = Payload(11, 10000).read_range(0, 10000)
+        file_checksum = checksum.FileChecksum(2048)
+        file_checksum.update(data)
+        chunked_checksum = checksum.FileChecksum(2048)
+        for offset, length in ((0, 1), (1, 700), (701, 2000), (2701, 7299)):
+            chunked_checksum.update(data[offset:offset + length])
+
+        self.assertEqual(file_checksum.hexdigest(), chunked_checksum.hexdigest())
+        self.assertEqual('MD5-of-4MD5-of-512CRC32C', file_checksum.algorithm)
+
+    def test_equals_checksum_of_the_blocks(self):
+        data = Payload(13, 5000).read_range(0, 5000)
+        cluster = SimulatedCluster(block_size=1024, seed=1)
+        cluster.create('/checksummed', data)
+        block_md5s = [hashlib.md5(checksum.chunk_crcs(data[offset:offset + 1024])).digest()
+                      for offset in range(0, len(data), 1024)]
+        file_checksum = checksum.FileChecksum(1024)
+        file_checksum.update(data)
+
+        expected = struct.pack('>iq', 512, 2) + hashlib.md5(b''.join(block_md5s) + bytes(128 - 80)).digest()
+        self.assertEqual(expected.hex(), file_checksum.hexdigest())
+        self.assertEqual(expected.hex(), cluster.get_checksum('/checksummed')['bytes'])
+
+    def test_single_block(self):
+        data = b'smoketest' * 100
+        file_checksum = checksum.FileChecksum(1024)
+        file_checksum.update(data)
+
+        expected = hashlib.md5(hashlib.md5(checksum.chunk_crcs(data)).digest() + bytes(16)).digest()
+        self.assertEqual(struct.pack('>iq', 512, 0) + expected, file_checksum.digest())
+        self.assertEqual('MD5-of-0MD5-of-512CRC32C', file_checksum.algorithm)
+
+    def test_block_size_must_be_multiple_of_bytes_per_crc(self):
+        with self.assertRaises(ValueError):
+            checksum.FileChecksum(1000)
@@ -0,0 +1,42 @@
+import hashlib
+import zlib
+import unittest
+
+import hdfs.digest as digest
+
+
+class TestDigest(unittest.TestCase):
+    def test_registry(self):
+        self.assertTrue({'md5', 'sha1', 'blake2b', 'crc32'} <= set(digest.available_digests()))
+        self.assertEqual(hashlib.blake2b(b'smoke').hexdigest(), self._hexdigest(digest.new_digest('blake2b'), b'smoke'))
+        self.assertEqual('{0:08x}'.format(zlib.crc32(b'smoke')), self._hexdigest(digest.new_digest('crc32'), b'smoke'))
+        with self.assertRaises(digest.UnknownDigestError):
+            digest.new_digest('md4-with-a-twist')
+
+    @staticmethod
+    def _hexdigest(hash_builder, data):
+        hash_builder.update(data)
+        return hash_builder.hexdigest()
+
+    def test_tree_digest_is_independent_of_threads_and_chunks(self):
+        content = bytes(range(256)) * 4000
+        expected = hashlib.sha256(b''.join(hashlib.sha256(content[offset:offset + 10000]).digest()
+                                           for offset in range(0, len(content), 10000))).hexdigest()
+        for threads in (1, 3):
+            for chunk_size in (999, 10000, 65536):
+                tree_digest = digest.TreeDigest('sha256', block_size=10000, threads=threads)
+                for offset in range(0, len(content), chunk_size):
+                    tree_digest.update(content[offset:offset + chunk_size])
+                self.assertEqual(expected, tree_digest.hexdigest())
+
+    def test_tree_digest_with_leaf_digests(self):
+        tree_digest = digest.TreeDigest('md5', block_size=4)
+        tree_digest.set_leaf_digest(1, hashlib.md5(b'5678').digest())
+        tree_digest.set_leaf_digest(0, hashlib.md5(b'1234').digest())
+        self.assertEqual(self._hexdigest(digest.TreeDigest('md5', block_size=4), b'12345678'), tree_digest.hexdigest())
+
+    def test_benchmark(self):
+        results = digest.benchmark(['md5', 'crc32'], size=1024 * 1024, block_size=256 * 1024, threads=2)
+        self.assertEqual([('md5', 'plain'), ('md5', 'tree'), ('crc32', 'plain'), ('crc32', 'tree')],
+                         [(result['digest'], result['mode']) for result in results])
+        self.assertTrue(all(result['mb_per_second'] > 0 for result in results))
@@ -1,13 +1,20 @@
 # flake8: noqa
+import hashlib
+import io
+import os
 import unittest
 from unittest.mock import Mock, patch
 
 import hdfs.hdfs_api as api
+from hdfs.resolver import HostResolver
+from simulator.cluster import SimulatedCluster
+from simulator.server import ClusterSimulator
 
 
 class TestHdfsApi(unittest.TestCase):
     def setUp(self):
         self.hdfs = api.HdfsApi(request_timeout=2)
+        self.path = '/user/tester/subdir/20161221/host.hortonworks.com.log'
         self.correct_output = """
 "FSCK started by tester (auth:KERBEROS_SSL) from /192.168.0.489 for path /user/tester/subdir/20161221/host.hortonworks.com.log at Wed Feb 22 10:19:52 CET 2017
 /user/tester/subdir/20161221/host.hortonworks.com.log 1066336015 bytes, 8 block(s):  OK
@@ -51,43 +58,147 @@ Operation category READ is not supported in state standby
 Fsck on path '/user/tester/subdir/20161221/host.hortonworks.com.log' FAILED"
 """
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_mocking_request(self, mock_request):
         mock_request.return_value = Mock(ok=True, status_code=200, text=self.correct_output)
 
-        hdfs_response = self.hdfs.get_block_info_for_file("/user/tester/subdir/20161221/host.hortonworks.com.log")
+        hdfs_response = self.hdfs.request_namenode('fsck', params={'path': self.path})
         self.assertEqual(self.correct_output, hdfs_response.text)
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_check_response_status(self, mock_request):
         mock_request.return_value = Mock(ok=True, status_code=200, text=self.correct_output)
-        hdfs_response = self.hdfs.get_block_info_for_file("/user/tester/subdir/20161221/host.hortonworks.com.log")
+        hdfs_response = self.hdfs.request_namenode('fsck', params={'path': self.path})
         self.hdfs._check_response_status(hdfs_response)
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_check_response_status_wrong_response_status_code(self, mock_request):
         mock_request.return_value = Mock(ok=True, status_code=403, text=self.empty_output)
 
         with self.assertRaises(api.HdfsRequestError):
-            hdfs_response = self.hdfs.get_block_info_for_file("/user/tester/subdir/20161221/host.hortonworks.com.log")
+            hdfs_response = self.hdfs.request_namenode('fsck', params={'path': self.path})
             self.hdfs._check_response_status(hdfs_response)
 
-    def test_get_first_block_info(self):
-        expected = "0. BP-1605498153-192.168.0.241-1426773903491:blk_1084465072_10763065 len=134217728 repl=3 [/Group1/DC1-X/RACK1/192.168.2.32:1019, /Group1/DC1-X/RACK1/192.168.2.29:1019, /Group1/DC1-X/RACK1/192.168.2.14:1019]"
-        blockinfo = self.hdfs.get_first_block_info("/user/tester/subdir/20161221/host.hortonworks.com.log",
-                                                   self.correct_output)
-        self.assertEqual(expected, blockinfo)
+    def test_get_host_by_ip_is_cached(self):
+        self.hdfs.resolver = HostResolver(lookup={'192.168.2.32': 'dn1.hortonworks.com'}.__getitem__)
+        self.assertEqual('dn1.hortonworks.com', self.hdfs.get_host_by_ip('192.168.2.32'))
+        self.assertEqual('dn1.hortonworks.com', self.hdfs.get_host_by_ip('192.168.2.32'))
+        self.assertEqual(1, self.hdfs.resolver.lookups)
 
-    def test_get_first_block_info_from_empty_response(self):
+    def test_get_host_by_unknown_ip(self):
+        self.hdfs.resolver = HostResolver(lookup=Mock(side_effect=OSError('unknown host')))
+        for _ in range(2):
+            with self.assertRaises(api.HdfsRequestError):
+                self.hdfs.get_host_by_ip('192.168.2.99')
+        # The failed lookup is cached as well
+        self.assertEqual(1, self.hdfs.resolver.lookups)
+
+
+class TestHdfsApiStreaming(unittest.TestCase):
+    def setUp(self):
+        self.cluster = SimulatedCluster(seed=1)
+        self.simulator = ClusterSimulator(self.cluster).start()
+        self.environment = patch.dict(os.environ, self.simulator.environment())
+        self.environment.start()
+        self.hdfs = api.HdfsApi(request_timeout=5, chunk_size=64 * 1024)
+
+    def tearDown(self):
+        self.environment.stop()
+        self.simulator.stop()
+
+    @patch('tempfile.NamedTemporaryFile')
+    def test_create_file_without_temp_file(self, mock_temp_file):
+        path = '/user/smoketest/streamed.txt'
+        md5 = self.hdfs.create_hdfs_file_of_size_in_mb(path, size=1)
+
+        mock_temp_file.assert_not_called()
+        expected = bytes(1024 * 1024)
+        self.assertEqual(hashlib.md5(expected).hexdigest(), md5)
+        self.assertEqual(expected, self.cluster.read(path))
+
+    def test_seeded_and_unseeded_files_are_size_mb(self):
+        self.hdfs.create_hdfs_file_of_size_in_mb('/user/smoketest/zeros.txt', size=1)
+        self.hdfs.create_hdfs_file_of_size_in_mb('/user/smoketest/seeded.txt', size=1, seed=7)
+
+        self.assertEqual(1024 * 1024, len(self.cluster.read('/user/smoketest/zeros.txt')))
+        self.assertEqual(1024 * 1024, len(self.cluster.read('/user/smoketest/seeded.txt')))
+
+    def test_file_checksum_without_reading_the_file(self):
+        path = '/user/smoketest/checksummed.txt'
+        local_checksum = self.hdfs.create_hdfs_file_with_checksum(path, size=1, seed=5, block_size=256 * 1024)
+
+        remote_checksum = self.hdfs.get_file_checksum(path)
+        self.assertEqual(local_checksum, remote_checksum['bytes'])
+        self.assertEqual('MD5-of-512MD5-of-512CRC32C', remote_checksum['algorithm'])
+        self.assertEqual(256 * 1024, self.hdfs.get_file_status(path)['blockSize'])
+        # One DataNode call for the upload and one for the checksum
+        self.assertEqual(2, self.simulator.calls['datanode'])
+
+    def test_create_file_on_standby_namenode(self):
+        self.hdfs.hdfs_host = '127.0.0.1'
         with self.assertRaises(api.HdfsRequestError):
-            self.hdfs.get_first_block_info("/user/tester/subdir/20161221/host.hortonworks.com.log", self.empty_output)
+            self.hdfs.create_hdfs_file_of_size_in_mb('/user/smoketest/streamed.txt', size=1)
+
+    @patch('tempfile.NamedTemporaryFile')
+    def test_read_file_without_temp_file(self, mock_temp_file):
+        path = '/user/smoketest/streamed.txt'
+        self.cluster.create(path, b'smoketest' * 100000)
+
+        self.assertEqual(hashlib.md5(b'smoketest' * 100000).hexdigest(), self.hdfs.get_hdfsfile_and_calc_md5(path))
+        mock_temp_file.assert_not_called()
+        self.assertEqual(900000, self.hdfs.last_read_stats['bytes'])
+        self.assertLessEqual(self.hdfs.last_read_stats['time_to_first_byte'], self.hdfs.last_read_stats['seconds'])
+
+    def test_read_range(self):
+        path = '/user/smoketest/streamed.txt'
+        self.cluster.create(path, b'0123456789')
+        hash_builder = hashlib.md5()
 
-    def test_get_location_of_first_block(self):
-        first_block_info = "0. BP-1605498153-192.168.0.241-1426773903491:blk_1084465072_10763065 len=134217728 repl=3 [/Group1/DC1-X/RACK1/192.168.2.32:1019, /Group1/DC1-X/RACK1/192.168.2.29:1019, /Group1/DC1-X/RACK1/192.168.2.14:1019]"
-        result = self.hdfs.get_location_of_first_block(first_block_info)
-        self.assertEqual("192.168.2.32", result)
+        stats = self.hdfs.stream_from_hdfs(path, hash_builder=hash_builder, offset=2, length=5)
+        self.assertEqual(5, stats['bytes'])
+        self.assertEqual(hashlib.md5(b'23456').hexdigest(), hash_builder.hexdigest())
 
-    def test_get_location_of_first_block_in_unknown_response(self):
-        first_block_info = "0. BP-1605498153-192.168.0.241-1426773903491:blk_1084465072_10763065 len=134217728 repl=3"
+    def test_read_missing_file(self):
         with self.assertRaises(api.HdfsRequestError):
-            self.hdfs.get_location_of_first_block(first_block_info)
+            self.hdfs.get_hdfsfile_and_calc_md5('/user/smoketest/missing.txt')
+
+    def test_user_name_of_webhdfs_and_fsck_calls(self):
+        hdfs = api.HdfsApi(request_timeout=5, user_name='smoketest')
+        path = '/user/smoketest/user.txt'
+        hdfs.stream_to_hdfs(path, [b'data'])
+        hdfs.request_namenode('fsck', params={'path': path})
+        self.assertTrue(len(list(hdfs.iter_fsck_lines(path))) > 0)
+
+        self.assertEqual({'smoketest'}, self.simulator.users['namenode'])
+        self.assertEqual({'smoketest'}, self.simulator.users['fsck'])
+        # With kerberos the user is authenticated by SPNEGO
+        self.assertEqual({}, api.HdfsApi(user_name='smoketest', kerberos=True).user_params)
+
+    def test_parallel_range_read(self):
+        path = '/user/smoketest/ranges.txt'
+        content = bytes(range(256)) * 1000
+        self.cluster.block_size = 64 * 1024
+        self.cluster.create(path, content)
+
+        remote_md5 = self.hdfs.get_hdfsfile_range_digest(path, parallelism=3)
+        self.assertEqual(api.HdfsApi.calculate_digest(io.BytesIO(content), range_size=64 * 1024), remote_md5)
+        self.assertEqual(4, self.hdfs.last_read_stats['ranges'])
+        self.assertEqual(4, self.simulator.calls['datanode'])
+
+
+class TestSharedSession(unittest.TestCase):
+    def test_hdfs_apis_of_a_namenode_share_the_session(self):
+        first = api.HdfsApi(active_nn_host='nn1.shared')
+        second = api.HdfsApi(active_nn_host='nn1.shared')
+        other = api.HdfsApi(active_nn_host='nn2.shared')
+
+        self.assertIs(first.session, second.session)
+        self.assertIsNot(first.session, other.session)
+        self.assertEqual({}, first.request_extra_opts)
+
+    def test_kerberos_authentication_is_shared(self):
+        first = api.HdfsApi(active_nn_host='nn1.shared', kerberos=True)
+        second = api.HdfsApi(active_nn_host='nn1.shared', kerberos=True)
+
+        self.assertIs(first.request_extra_opts['auth'], second.request_extra_opts['auth'])
+        self.assertIsNot(first.session, api.HdfsApi(active_nn_host='nn1.shared').session)
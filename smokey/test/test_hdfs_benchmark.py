@@ -0,0 +1,40 @@
+import unittest
+from unittest.mock import MagicMock
+
+from hdfs.hdfs_benchmark import HdfsBenchmark, PHASES
+
+
+class TestHdfsBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.hdfs = MagicMock()
+        self.hdfs.hdfs_host = 'namenode'
+        self.hdfs.stream_from_hdfs.return_value = {'bytes': 2 * 1024 * 1024}
+
+    def test_run_case_runs_every_phase_per_file_and_round(self):
+        benchmark = HdfsBenchmark(self.hdfs, directory='/bench/', repetitions=2, seed=10)
+        result = benchmark.run_case(2, 3)
+
+        self.assertEqual(6, self.hdfs.create_hdfs_file_of_size_in_mb.call_count)
+        self.assertEqual(6, self.hdfs.cleanup_remote_file.call_count)
+        self.assertEqual({'/bench/benchmark_2mb_0.bin', '/bench/benchmark_2mb_1.bin', '/bench/benchmark_2mb_2.bin'},
+                         {call[0][0] for call in self.hdfs.get_file_checksum.call_args_list})
+        self.assertEqual({10, 11, 12},
+                         {call[1]['seed'] for call in self.hdfs.create_hdfs_file_of_size_in_mb.call_args_list})
+        self.assertEqual(sorted(PHASES), sorted(result['phases']))
+        self.assertEqual(6, result['phases']['read']['operations'])
+        self.assertEqual(12 * 1024 * 1024, result['phases']['write']['bytes'])
+        self.assertEqual(12 * 1024 * 1024, result['phases']['read']['bytes'])
+
+    def test_failed_operations_are_counted(self):
+        self.hdfs.get_file_checksum.side_effect = [Exception('standby'), {}]
+        result = HdfsBenchmark(self.hdfs, repetitions=1).run_case(1, 2)
+        self.assertEqual(1, result['phases']['checksum']['errors'])
+        self.assertEqual(1, result['phases']['checksum']['operations'])
+        self.assertEqual(0, result['phases']['delete']['errors'])
+
+    def test_run_covers_all_combinations(self):
+        results = HdfsBenchmark(self.hdfs, sizes=[1, 2], parallelism=[1, 4], repetitions=1).run(label='before')
+        self.assertEqual('before', results['label'])
+        self.assertEqual('namenode', results['namenode'])
+        self.assertEqual([(1, 1), (1, 4), (2, 1), (2, 4)],
+                         [(case['size_mb'], case['parallelism']) for case in results['results']])
@@ -0,0 +1,192 @@
+import logging
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import ambari.api as ambari_api
+import core.verification as verification
+from core.schedule import get_interval
+import hdfs.hdfs_api as hdfs_api
+import hdfs.hdfs_verifiers as hdfs_verifiers
+from hdfs.digest import TreeDigest
+from simulator.cluster import SimulatedCluster
+from simulator.server import ClusterSimulator
+
+
+class TestHdfsVerifiers(unittest.TestCase):
+    def setUp(self):
+        self.cluster = SimulatedCluster(block_size=256 * 1024, seed=3)
+        self.simulator = ClusterSimulator(self.cluster).start()
+        self.environment = patch.dict(os.environ, self.simulator.environment())
+        self.environment.start()
+        self.ambari = ambari_api.Api(request_timeout=5)
+
+    def tearDown(self):
+        self.ambari.close()
+        self.environment.stop()
+        self.simulator.stop()
+
+    def test_hdfs_verifier_with_parallel_reads(self):
+        verifier = hdfs_verifiers.HdfsVerifier(logger=logging, filesize=1, ambari=self.ambari,
+                                               range_size=256 * 1024, deep=True)
+        verifier.verify()
+        # One DataNode call for the upload and one per range
+        self.assertEqual(5, self.simulator.calls['datanode'])
+
+    def test_hdfs_verifier_with_checksum(self):
+        verifier = hdfs_verifiers.HdfsVerifier(logger=logging, filesize=1, ambari=self.ambari, block_size=256 * 1024)
+        verifier.verify()
+        # One DataNode call for the upload and one for the checksum, the file is not read back
+        self.assertEqual(2, self.simulator.calls['datanode'])
+
+    def test_hdfs_verifier_reuses_its_hdfs_api(self):
+        verifier = hdfs_verifiers.HdfsVerifier(logger=logging, filesize=1, ambari=self.ambari, block_size=256 * 1024)
+        verifier.verify()
+        hdfs = verifier.hdfs
+        ambari_calls = self.simulator.calls['ambari']
+        verifier.verify()
+
+        self.assertIs(hdfs, verifier.hdfs)
+        # The active NameNode is only looked up in Ambari once
+        self.assertEqual(ambari_calls, self.simulator.calls['ambari'])
+
+    def test_hdfs_verifier_with_corrupted_file(self):
+        create = self.cluster.create
+
+        def create_corrupted(path, data, **kwargs):
+            create(path, data[:-1] + b'x', **kwargs)
+
+        verifier = hdfs_verifiers.HdfsVerifier(logger=logging, filesize=1, ambari=self.ambari, block_size=256 * 1024)
+        with patch.object(self.cluster, 'create', side_effect=create_corrupted):
+            with self.assertRaises(verification.VerificationError):
+                verifier.verify()
+
+    def test_load_verifier(self):
+        verifier = hdfs_verifiers.HdfsLoadVerifier(logger=logging, ambari=self.ambari, writers=3, readers=2, filesize=1,
+                                                   operations=2, block_size=256 * 1024, min_mb_per_second=0.1,
+                                                   max_latency=30)
+        verifier.verify()
+        read_files = dict(verifier.read_files)
+        verifier.verify()
+
+        self.assertEqual(read_files, verifier.read_files)
+        self.assertEqual(6, verifier.last_stats['write']['operations'])
+        self.assertEqual(4, verifier.last_stats['read']['operations'])
+        self.assertEqual(4 * 1024 * 1024, verifier.last_stats['read']['bytes'])
+        self.assertEqual(0, verifier.last_stats['errors'])
+        # The read files are kept for the next verification, the written files are removed
+        self.assertEqual(sorted(read_files), sorted(path for path in self.cluster.files if 'load_verifier' in path))
+        verifier.close()
+        self.assertEqual([], [path for path in self.cluster.files if 'load_verifier' in path])
+        self.assertIsNone(verifier.read_files)
+
+    def test_load_verifier_with_corrupted_files(self):
+        create = self.cluster.create
+
+        def create_corrupted(path, data, **kwargs):
+            create(path, data[:-1] + b'x', **kwargs)
+
+        verifier = hdfs_verifiers.HdfsLoadVerifier(logger=logging, ambari=self.ambari, writers=2, readers=1, filesize=1,
+                                                   operations=1, block_size=256 * 1024)
+        verifier.verify()
+        with patch.object(self.cluster, 'create', side_effect=create_corrupted):
+            with self.assertRaisesRegex(verification.VerificationError, '2 operations failed'):
+                verifier.verify()
+        self.assertEqual(2, verifier.last_stats['write']['errors'])
+        self.assertEqual(0, verifier.last_stats['read']['errors'])
+
+    def test_load_verifier_bounds(self):
+        with patch.dict(os.environ, {'HDFS_LOAD_VERIFIER_MIN_MB_PER_SECOND': '1000000',
+                                     'HDFS_LOAD_VERIFIER_MAX_LATENCY': '0.000001'}):
+            verifier = hdfs_verifiers.HdfsLoadVerifier(logger=logging, ambari=self.ambari, writers=1, readers=1,
+                                                       filesize=1, operations=1, block_size=256 * 1024)
+        with self.assertRaises(verification.VerificationError) as context:
+            verifier.verify()
+        self.assertIn('throughput', str(context.exception))
+        self.assertIn('p99 latency', str(context.exception))
+
+    def test_metadata_verifier(self):
+        verifier = hdfs_verifiers.HdfsMetadataVerifier(logger=logging, ambari=self.ambari, batch_size=5, threads=3)
+        verifier.verify()
+
+        self.assertEqual(hdfs_verifiers.HdfsMetadataVerifier.OPERATIONS, list(verifier.last_stats))
+        # A batch is probed less often than every second
+        self.assertEqual(10, get_interval(verifier))
+        for stats in verifier.last_stats.values():
+            self.assertEqual(5, stats['operations'])
+            self.assertEqual(0, stats['errors'])
+            self.assertIsNotNone(stats['latency']['p95'])
+        self.assertFalse(any('metadata_verifier' in path for path in list(self.cluster.files) +
+                             list(self.cluster.directories)))
+
+    def test_metadata_verifier_with_failing_rename(self):
+        verifier = hdfs_verifiers.HdfsMetadataVerifier(logger=logging, ambari=self.ambari, batch_size=4, max_errors=3)
+        with patch.object(self.cluster, 'rename', return_value=False):
+            with self.assertRaisesRegex(verification.VerificationError, '4 operations failed'):
+                verifier.verify()
+        self.assertEqual(4, verifier.last_stats['RENAME']['errors'])
+        self.assertEqual(0, verifier.last_stats['DELETE']['errors'])
+
+    def test_metadata_verifier_latency_bound(self):
+        with patch.dict(os.environ, {'HDFS_METADATA_VERIFIER_MAX_LATENCY': '0.000001'}):
+            verifier = hdfs_verifiers.HdfsMetadataVerifier(logger=logging, ambari=self.ambari, batch_size=2)
+        with self.assertRaisesRegex(verification.VerificationError, 'MKDIRS p99 latency'):
+            verifier.verify()
+
+    def test_append_verifier(self):
+        verifier = hdfs_verifiers.HdfsAppendVerifier(logger=logging, ambari=self.ambari, interval=0.02)
+        # The append interval does not change how often the verifier is scheduled
+        self.assertEqual(30, get_interval(verifier))
+        verifier.verify()
+        time.sleep(0.2)
+        verifier.verify()
+
+        records = self.cluster.read(verifier.filename).split(b'\n')[:-1]
+        self.assertGreater(len(records), 2)
+        self.assertEqual(list(range(len(records))), [int(record) for record in records])
+        verifier.close()
+        self.assertNotIn(verifier.filename, self.cluster.files)
+
+    def test_append_verifier_with_stalled_appends(self):
+        verifier = hdfs_verifiers.HdfsAppendVerifier(logger=logging, ambari=self.ambari, interval=0.02, max_stall=0.05)
+        verifier.verify()
+        with patch.object(self.cluster, 'append', side_effect=hdfs_api.HdfsRequestError('pipeline')):
+            time.sleep(0.2)
+            with self.assertRaisesRegex(verification.VerificationError, 'stalled'):
+                verifier.verify()
+        verifier.close()
+
+    def test_datanode_verifier_with_known_range_md5(self):
+        content = b'known content' * 100000
+        self.cluster.create('/user/smoketest/hdfs_smoketest/hdfs_dn_test_file_with_known_md5.txt', content)
+        range_md5 = TreeDigest('md5', block_size=256 * 1024)
+        range_md5.update(content)
+
+        verifier = hdfs_verifiers.HdfsDatanodeVerifier(logger=logging, known_digest=range_md5.hexdigest(),
+                                                       range_size=256 * 1024)
+        verifier.verify()
+        verifier.known_digest = TreeDigest('md5', block_size=256 * 1024).hexdigest()
+        with self.assertRaises(verification.VerificationError):
+            verifier.verify()
+
+    def test_datanode_verifier_with_payload_seed(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5)
+        hdfs.create_hdfs_file_of_size_in_mb('/user/smoketest/hdfs_smoketest/hdfs_dn_test_file_with_known_md5.txt',
+                                            size=1, seed=99)
+
+        hdfs_verifiers.HdfsDatanodeVerifier(logger=logging, payload_seed=99, payload_size=1024 * 1024,
+                                            read_parallelism=1).verify()
+        hdfs_verifiers.HdfsDatanodeVerifier(logger=logging, payload_seed=99, payload_size=1024 * 1024,
+                                            range_size=256 * 1024).verify()
+        with self.assertRaises(verification.VerificationError):
+            hdfs_verifiers.HdfsDatanodeVerifier(logger=logging, payload_seed=98, payload_size=1024 * 1024,
+                                                read_parallelism=1).verify()
+
+    def test_hdfs_verifier_with_threaded_tree_digest(self):
+        verifier = hdfs_verifiers.HdfsVerifier(logger=logging, filesize=1, ambari=self.ambari, read_parallelism=1,
+                                               range_size=256 * 1024, digest='blake2b', hash_threads=2,
+                                               deep=True)
+        verifier.verify()
+        # Sequential read, one DataNode call for the upload and one for the read
+        self.assertEqual(2, self.simulator.calls['datanode'])
@@ -0,0 +1,34 @@
+import hashlib
+import struct
+import unittest
+
+import hdfs.payload as payload
+
+
+class TestPayload(unittest.TestCase):
+    def test_splitmix64_sequence(self):
+        # First outputs of SplitMix64 seeded with 0
+        words = struct.unpack('<2Q', payload.Payload(0, 16).read_range(0, 16))
+        self.assertEqual((0xE220A8397B1DCDAF, 0x6E789E6AA1B965F4), words)
+
+    def test_numpy_and_python_generate_the_same_bytes(self):
+        vectorized = payload.Payload(12345, 300001)
+        pure_python = payload.Payload(12345, 300001, use_numpy=False)
+        self.assertEqual(pure_python.read_range(0, 300001), vectorized.read_range(0, 300001))
+        self.assertEqual(pure_python.read_range(299990, 100), vectorized.read_range(299990, 100))
+
+    def test_ranges_and_chunks_match_the_content(self):
+        generated = payload.Payload(7, 100003, chunk_size=4099)
+        content = generated.read_range(0, 100003)
+        self.assertEqual(100003, len(content))
+        self.assertEqual(content, b''.join(generated.chunks()))
+        self.assertEqual(content[5003:5103], generated.read_range(5003, 100))
+        self.assertEqual(content[77:5077], b''.join(generated.chunks(77, 5000)))
+        self.assertEqual(b'', generated.read_range(100003, 10))
+
+    def test_digest_depends_on_seed_and_size_only(self):
+        self.assertEqual(hashlib.md5(payload.Payload(1, 5000).read_range(0, 5000)).hexdigest(),
+                         payload.Payload(1, 5000, chunk_size=64).digest())
+        self.assertNotEqual(payload.Payload(1, 5000).digest(), payload.Payload(2, 5000).digest())
+        self.assertEqual(hashlib.sha1(payload.Payload(1, 5000).read_range(0, 5000)).hexdigest(),
+                         payload.Payload(1, 5000).digest(hashlib.sha1()))
@@ -0,0 +1,64 @@
+import socket
+import threading
+import unittest
+
+from hdfs.resolver import HostResolver
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHostResolver(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.names = {'10.0.0.1': 'node0001', '10.0.0.2': 'node0002'}
+        self.resolver = HostResolver(ttl=100, negative_ttl=10, lookup=self.lookup, clock=self.clock)
+
+    def lookup(self, ip):
+        if ip not in self.names:
+            raise socket.herror(1, "Unknown host")
+        return self.names[ip]
+
+    def test_resolve_is_cached_until_ttl(self):
+        self.assertEqual('node0001', self.resolver.resolve('10.0.0.1'))
+        self.names['10.0.0.1'] = 'renamed'
+        self.assertEqual('node0001', self.resolver.resolve('10.0.0.1'))
+        self.assertEqual(1, self.resolver.lookups)
+
+        self.clock.now = 101
+        self.assertEqual('renamed', self.resolver.resolve('10.0.0.1'))
+
+    def test_unknown_address_is_cached_until_negative_ttl(self):
+        self.assertIsNone(self.resolver.resolve('10.0.0.9'))
+        self.assertEqual({}, self.resolver.resolve_all(['10.0.0.9']))
+        self.assertEqual(1, self.resolver.lookups)
+
+        self.names['10.0.0.9'] = 'node0009'
+        self.clock.now = 11
+        self.assertEqual('node0009', self.resolver.resolve('10.0.0.9'))
+
+    def test_preload_makes_lookups_unnecessary(self):
+        self.resolver.preload({'node0003': '10.0.0.3', 'localhost': '127.0.0.1', '127.0.0.1': '127.0.0.1'})
+
+        self.assertEqual({'10.0.0.3': 'node0003', '127.0.0.1': '127.0.0.1'},
+                         self.resolver.resolve_all(['10.0.0.3', '127.0.0.1']))
+        self.assertEqual(0, self.resolver.lookups)
+
+    def test_resolve_all_concurrently(self):
+        # The lookups only pass the barrier when four of them run at the same time
+        barrier = threading.Barrier(4, timeout=5)
+
+        def lookup(ip):
+            barrier.wait()
+            return 'host-' + ip
+
+        resolver = HostResolver(lookup=lookup, threads=4)
+        hosts = resolver.resolve_all(['10.0.0.{0}'.format(i % 4) for i in range(1000)])
+
+        self.assertEqual({'10.0.0.{0}'.format(i): 'host-10.0.0.{0}'.format(i) for i in range(4)}, hosts)
+        self.assertEqual(4, resolver.lookups)
@@ -0,0 +1,104 @@
+import logging
+import os
+import unittest
+from unittest.mock import patch
+
+import core.base_smoketest as base_smoketest
+import core.verification as verification
+from core.schedule import VerificationScheduler, get_interval
+
+
+class TimedVerifier(verification.Verifier):
+    def __init__(self, tier, seconds, interval=None, error=None):
+        super().__init__(logging)
+        self.tier = tier
+        self.seconds = seconds
+        self.schedule_interval = interval
+        self.error = error
+        self.count = 0
+
+    def verify(self):
+        self.count += 1
+        if self.error is not None:
+            raise self.error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def run(self, verifiers, durations):
+        for verifier in verifiers:
+            verifier.verify()
+            self.now += verifier.seconds
+            durations[verifier] = verifier.seconds
+
+
+class TestVerificationScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def schedule(self, verifiers, window, durations=None):
+        return VerificationScheduler(verifiers, window, run=self.clock.run, durations=durations, clock=self.clock,
+                                     sleep=self.clock.sleep).run()
+
+    def test_interval_by_tier(self):
+        self.assertEqual(1, get_interval(TimedVerifier(verification.TIER_PROBE, 0)))
+        self.assertEqual(30, get_interval(TimedVerifier(verification.TIER_IO, 0)))
+        self.assertIsNone(get_interval(TimedVerifier(verification.TIER_JOB, 0)))
+        self.assertEqual(5, get_interval(TimedVerifier(verification.TIER_JOB, 0, interval=5)))
+
+    def test_tiers_are_packed_into_the_window(self):
+        probe = TimedVerifier(verification.TIER_PROBE, 0.1)
+        io = TimedVerifier(verification.TIER_IO, 2)
+        job = TimedVerifier(verification.TIER_JOB, 10)
+        counts = self.schedule([probe, io, job], 60)
+
+        self.assertEqual({probe: probe.count, io: 2, job: 1}, counts)
+        # Every second except while the job and the first io verification ran
+        self.assertGreater(probe.count, 40)
+        self.assertLessEqual(self.clock.now, 60 + io.seconds)
+        self.assertTrue(all(seconds >= 0 for seconds in self.clock.sleeps))
+
+    def test_verification_that_does_not_fit_is_not_started(self):
+        io = TimedVerifier(verification.TIER_IO, 25)
+        self.assertEqual({io: 1}, self.schedule([io], 40))
+        self.assertLessEqual(self.clock.now, 40)
+
+    def test_every_verifier_runs_once(self):
+        io = TimedVerifier(verification.TIER_IO, 25)
+        job = TimedVerifier(verification.TIER_JOB, 100)
+        self.assertEqual({io: 1, job: 1}, self.schedule([io, job], 10, durations={job: 100}))
+
+    def test_interval_must_be_positive(self):
+        for interval in (0, -1):
+            with self.assertRaisesRegex(ValueError, 'not positive'):
+                self.schedule([TimedVerifier(verification.TIER_PROBE, 0.1, interval=interval)], 60)
+
+    def test_failure_stops_the_schedule(self):
+        probe = TimedVerifier(verification.TIER_PROBE, 0.1, error=verification.VerificationError('down'))
+        with self.assertRaisesRegex(verification.VerificationError, 'down'):
+            self.schedule([probe], 60)
+
+
+class TestBaseSmokeTestSchedule(unittest.TestCase):
+    def test_verification_window(self):
+        with patch.dict(os.environ, {'SMOKETEST_VERIFICATION_WINDOW': '0.3'}):
+            smoketest = base_smoketest.BaseSmokeTest('TEST', stop_realization_timeout=0)
+        probe = TimedVerifier(verification.TIER_PROBE, 0, interval=0.05)
+        job = TimedVerifier(verification.TIER_JOB, 0)
+        smoketest.verifiers = [probe, job]
+        smoketest.do_verifications('', 'host')
+
+        # Once in the window and once in the final check
+        self.assertEqual(2, job.count)
+        self.assertGreater(probe.count, 3)
+        self.assertIn(job, smoketest.verifier_durations)
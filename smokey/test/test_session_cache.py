@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import ambari.api as api
+import ambari.session_cache as session_cache
+
+
+class TestSessionCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='smokey-session-cache-')
+        self.now = 1000
+        self.cache = session_cache.SessionCache(self.directory, max_age=60, clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get(self):
+        self.assertIsNone(self.cache.get('sandbox', 8080, 'raj_ops'))
+        self.cache.put('sandbox', 8080, 'raj_ops', 'KRISUUID12345678')
+        self.assertEqual('KRISUUID12345678', self.cache.get('sandbox', 8080, 'raj_ops'))
+        self.assertIsNone(self.cache.get('sandbox', 8080, 'admin'))
+
+    def test_expired_session(self):
+        self.cache.put('sandbox', 8080, 'raj_ops', 'KRISUUID12345678')
+        self.now += 61
+        self.assertIsNone(self.cache.get('sandbox', 8080, 'raj_ops'))
+
+    def test_invalidate_only_removes_the_refused_session(self):
+        self.cache.put('sandbox', 8080, 'raj_ops', 'NEWER')
+        self.cache.invalidate('sandbox', 8080, 'raj_ops', 'KRISUUID12345678')
+        self.assertEqual('NEWER', self.cache.get('sandbox', 8080, 'raj_ops'))
+        self.cache.invalidate('sandbox', 8080, 'raj_ops', 'NEWER')
+        self.assertIsNone(self.cache.get('sandbox', 8080, 'raj_ops'))
+
+    @patch('requests.Session.request')
+    def test_api_reuses_cached_session(self, mock_request):
+        mock_request.return_value = Mock(ok=True, status_code=200, cookies={'AMBARISESSIONID': 'KRISUUID12345678'})
+        mock_request.return_value.json.return_value = {}
+
+        api.Api(session_cache_dir=self.directory).get_service_info('HDFS')
+        self.assertEqual(2, mock_request.call_count)
+
+        second = api.Api(session_cache_dir=self.directory)
+        second.get_service_info('HDFS')
+        self.assertEqual(3, mock_request.call_count)
+        self.assertEqual('KRISUUID12345678', second.ambari_session)
+
+    @patch('requests.Session.request')
+    def test_api_authenticates_again_when_cached_session_is_refused(self, mock_request):
+        cache = session_cache.SessionCache(self.directory)
+        cache.put('sandbox', 8080, 'raj_ops', 'EXPIRED')
+        refused = Mock(ok=False, status_code=403, cookies={})
+        accepted = Mock(ok=True, status_code=200, cookies={'AMBARISESSIONID': 'KRISUUID12345678'})
+        accepted.json.return_value = {}
+        mock_request.side_effect = [refused, accepted, accepted]
+
+        ambari = api.Api(session_cache_dir=self.directory)
+        ambari.get_service_info('HDFS')
+        self.assertEqual('KRISUUID12345678', ambari.ambari_session)
+        self.assertIn('auth', mock_request.call_args_list[1][1])
+        self.assertEqual('AMBARISESSIONID=KRISUUID12345678', mock_request.call_args_list[2][1]['headers']['Cookie'])
+        self.assertEqual('KRISUUID12345678', cache.get('sandbox', 8080, 'raj_ops'))
@@ -0,0 +1,228 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import requests
+
+import ambari.api as api
+import core.base as base
+import hdfs.datanode_smoketest as datanode_smoketest
+import hdfs.hdfs_api as hdfs_api
+from hdfs.hdfs_benchmark import HdfsBenchmark
+import yarn.yarn_resourcemanager_smoketest as yarn_smoketest
+import zookeeper.namenode_failover_verifier as failover_verifier
+from simulator.cluster import SimulatedCluster
+from simulator.server import ClusterSimulator
+
+
+class SimulatorTestCase(unittest.TestCase):
+    host_count = 10
+    failure_rates = None
+
+    def setUp(self):
+        self.cluster = SimulatedCluster(host_count=self.host_count, transition_time=0.2, block_size=1024 * 1024,
+                                        seed=42)
+        self.simulator = ClusterSimulator(self.cluster, failure_rates=self.failure_rates, seed=42).start()
+        self.environment = patch.dict(os.environ, self.simulator.environment())
+        self.environment.start()
+        self.ambari = api.Api(request_timeout=5, polling_timeout=10)
+
+    def tearDown(self):
+        self.ambari.close()
+        self.environment.stop()
+        self.simulator.stop()
+
+    def _host_component(self, service, component, host):
+        for host_component in self.ambari.get_component_info(service, component)['host_components']:
+            if host_component['HostRoles']['host_name'] == host:
+                return host_component
+
+
+class TestSimulatedAmbari(SimulatorTestCase):
+    def test_component_info_and_snapshot(self):
+        info = self.ambari.get_component_info('HDFS', 'DATANODE')
+        self.assertEqual(10, len(info['host_components']))
+        snapshot = self.ambari.get_cluster_snapshot()
+        self.assertTrue(snapshot.all_started('HDFS', 'DATANODE'))
+
+    def test_host_addresses(self):
+        addresses = self.ambari.get_host_addresses()
+        self.assertEqual(self.cluster.hosts, addresses)
+        self.assertEqual('10.0.0.1', addresses['node0001.simulated'])
+
+    def test_stopping_active_namenode_fails_over(self):
+        self.assertEqual('localhost', self.ambari.get_specific_nn_host(state='active'))
+        info = self._host_component('HDFS', 'NAMENODE', 'localhost')
+
+        self.ambari.change_host_component_state_and_wait(info['href'], state='INSTALLED')
+        self.assertEqual('127.0.0.1', self.ambari.get_specific_nn_host(state='active'))
+        self.assertFalse(self.ambari.check_if_all_components_started('HDFS', 'NAMENODE'))
+
+        self.ambari.change_host_component_state_and_wait(info['href'], state='STARTED')
+        self.assertEqual({'localhost': 'STANDBY', '127.0.0.1': 'ACTIVE'},
+                         self.ambari.get_component_host_hastate('HDFS', 'NAMENODE'))
+
+    def test_bulk_state_change(self):
+        request = self.ambari.change_host_components_state(['DATANODE', 'NODEMANAGER'],
+                                                           ['node0001.simulated', 'node0002.simulated'],
+                                                           state='INSTALLED')
+        request.result()
+        self.assertEqual(4, len(request.get_tasks()))
+        self.assertEqual('INSTALLED', self.cluster.get_state('NODEMANAGER', 'node0002.simulated'))
+        self.assertEqual((8, 10), self.cluster.get_component_counts('DATANODE'))
+
+    def test_expired_session_is_refused(self):
+        self.ambari.get_component_state('HDFS', 'DATANODE')
+        self.simulator.expire_sessions()
+        with self.assertRaises(api.AmbariRequestError):
+            self.ambari.get_service_info('HDFS')
+
+
+class TestSimulatedAmbariFailures(SimulatorTestCase):
+    failure_rates = {'ambari_request': 1.0}
+
+    def test_failed_request(self):
+        info = self._host_component('HDFS', 'DATANODE', 'node0003.simulated')
+        with self.assertRaises(api.AmbariRequestError):
+            self.ambari.change_host_component_state_and_wait(info['href'], state='INSTALLED')
+        self.assertEqual('STARTED', self.cluster.get_state('DATANODE', 'node0003.simulated'))
+
+
+class TestSimulatedLargeCluster(SimulatorTestCase):
+    host_count = 5000
+
+    def test_snapshot_of_large_cluster(self):
+        snapshot = self.ambari.get_cluster_snapshot()
+        self.assertEqual(5000, snapshot.get_component_state('YARN', 'NODEMANAGER')['ServiceComponentInfo']
+                         ['total_count'])
+        self.assertEqual('node5000.simulated',
+                         self._host_component('HDFS', 'DATANODE', 'node5000.simulated')['HostRoles']
+                         ['host_name'])
+
+
+class TestSimulatedHdfs(SimulatorTestCase):
+    def test_write_read_and_fsck(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='localhost')
+        path = '/user/smoketest/hdfs_smoketest/simulated.txt'
+        md5 = hdfs.create_hdfs_file_of_size_in_mb(path, size=2)
+        self.assertEqual(md5, hdfs.get_hdfsfile_and_calc_md5(path))
+        self.assertEqual(2 * 1024 * 1024, hdfs.request_webhdfs_status(path)['FileStatus']['length'])
+
+        self.assertIn(hdfs.get_host_location_of_first_block(path), self.cluster.get_hosts('DATANODE'))
+
+        hdfs.cleanup_remote_file(path)
+        self.assertNotIn(path, self.cluster.files)
+
+    def test_make_directory_and_rename(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='localhost')
+        self.assertTrue(hdfs.make_directory('/user/smoketest/a/b'))
+        self.assertIn('/user/smoketest/a/b', self.cluster.directories)
+        hdfs.stream_to_hdfs('/user/smoketest/a/b/file', [b'data'])
+        self.assertTrue(hdfs.rename('/user/smoketest/a/b/file', '/user/smoketest/a/renamed'))
+        self.assertEqual(b'data', self.cluster.read('/user/smoketest/a/renamed'))
+        self.assertFalse(hdfs.rename('/user/smoketest/a/b/file', '/user/smoketest/a/other'))
+
+    def test_benchmark(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='localhost')
+        results = HdfsBenchmark(hdfs, sizes=[2], parallelism=[2], repetitions=1, seed=1).run(label='simulated')
+
+        phases = results['results'][0]['phases']
+        self.assertTrue(all(summary['errors'] == 0 for summary in phases.values()))
+        self.assertEqual(4 * 1024 * 1024, phases['write']['bytes'])
+        self.assertEqual(4 * 1024 * 1024, phases['read']['bytes'])
+        self.assertEqual(2, phases['checksum']['operations'])
+        self.assertFalse(any(path.startswith('/user/smoketest/hdfs_benchmark/') for path in self.cluster.files))
+
+    def test_standby_namenode_refuses_operations(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='127.0.0.1')
+        with self.assertRaises(hdfs_api.HdfsRequestError):
+            hdfs.request_webhdfs_status('/')
+
+
+class TestSimulatedNamenodeFailover(SimulatorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(hdfs_api._active_namenodes.clear)
+
+    def test_hdfs_api_fails_over_to_active_namenode(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='127.0.0.1',
+                                namenode_hosts=['localhost', '127.0.0.1'])
+        self.assertEqual('DIRECTORY', hdfs.request_webhdfs_status('/')['FileStatus']['type'])
+        self.assertEqual('localhost', hdfs.hdfs_host)
+        # New HdfsApis of the NameNodes start with the known active NameNode
+        self.assertEqual('localhost', hdfs_api.HdfsApi(active_nn_host='127.0.0.1',
+                                                       namenode_hosts=['localhost', '127.0.0.1']).hdfs_host)
+
+        info = self._host_component('HDFS', 'NAMENODE', 'localhost')
+        self.ambari.change_host_component_state_and_wait(info['href'], state='INSTALLED')
+        calls = self.simulator.calls['namenode']
+        self.assertEqual('DIRECTORY', hdfs.request_webhdfs_status('/')['FileStatus']['type'])
+        self.assertEqual('127.0.0.1', hdfs.hdfs_host)
+        # One call on the stopped NameNode, which dropped the connection, and one on the new active NameNode
+        self.assertEqual(calls + 2, self.simulator.calls['namenode'])
+
+    def test_single_namenode_does_not_fail_over(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='127.0.0.1')
+        with self.assertRaises(hdfs_api.HdfsRequestError):
+            hdfs.request_webhdfs_status('/')
+
+    def test_datanode_errors_do_not_fail_over(self):
+        hdfs = hdfs_api.HdfsApi(request_timeout=5, active_nn_host='localhost',
+                                namenode_hosts=['localhost', '127.0.0.1'])
+        path = '/user/smoketest/unreachable.txt'
+        self.cluster.create(path, b'data')
+        request = hdfs.session.request
+
+        def unreachable_datanode(method, url, **kwargs):
+            if 'datanode=true' in url:
+                raise requests.ConnectionError("Connection refused")
+            return request(method, url, **kwargs)
+
+        calls = self.simulator.calls['namenode']
+        with patch.object(hdfs.session, 'request', side_effect=unreachable_datanode):
+            with self.assertRaises(hdfs_api.HdfsRequestError):
+                hdfs.stream_from_hdfs(path)
+            with self.assertRaises(hdfs_api.HdfsRequestError):
+                hdfs.get_file_checksum(path)
+        self.assertEqual('localhost', hdfs.hdfs_host)
+        # Only the redirecting calls on the active NameNode, the standby NameNode is not tried
+        self.assertEqual(calls + 2, self.simulator.calls['namenode'])
+
+    def test_namenode_failover_verifier(self):
+        verifier = failover_verifier.NamenodeFailoverVerifier(logger=self.ambari.logger, filesize=1,
+                                                              ambari=self.ambari, failover_poll_interval=0.1)
+        verifier.verify()
+        self.assertEqual('127.0.0.1', self.cluster.active['NAMENODE'])
+        self.assertEqual('STARTED', self.cluster.get_state('NAMENODE', 'localhost'))
+
+
+class TestSimulatedSmokeTest(SimulatorTestCase):
+    def test_yarn_resourcemanager_smoketest(self):
+        tester = base.SmokeTest('YARN', 'RESOURCEMANAGER', stop_realization_timeout=0, verify_loop_sleep_time=0,
+                                verification_count=2)
+        tester.verifiers = yarn_smoketest.YarnResourceManagerVerifier(logger=tester.logger)
+        with self.assertRaises(SystemExit) as context:
+            tester.run()
+        self.assertEqual(0, context.exception.code)
+        self.assertEqual(2, len(self.cluster.requests))
+        self.assertTrue(all(state == 'STARTED' for (component, host), state in self.cluster.states.items()
+                            if component == 'RESOURCEMANAGER'))
+
+    def test_victim_selection_reads_the_ha_state_from_the_snapshot(self):
+        tester = base.SmokeTest('YARN', 'RESOURCEMANAGER', filter_component_state='ACTIVE')
+        self.assertTrue(tester._all_started())
+        calls = self.simulator.calls['ambari']
+        for _ in range(5):
+            host, location = tester._get_random_component(tester._get_component_info())
+            self.assertEqual('standby', self.cluster.get_ha_state('RESOURCEMANAGER', host))
+        self.assertEqual(calls, self.simulator.calls['ambari'])
+
+    def test_datanode_smoketest_stops_datanode_storing_blocks(self):
+        tester = datanode_smoketest.DatanodeSmokeTest()
+        self.cluster.create(tester.hdfs_filename, bytes(3 * 1024 * 1024))
+        block_hosts = set(host for block in self.cluster.get_blocks(tester.hdfs_filename)
+                          for host in block['locations'])
+
+        host, href = tester._get_random_component(tester._get_component_info())
+        self.assertIn(host, block_hosts)
+        self.assertTrue(href.endswith('/hosts/{0}/host_components/DATANODE'.format(host)))
@@ -0,0 +1,82 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import ambari.api as api
+import ambari.snapshot as snapshot
+
+
+def services_info():
+    return {'items': [
+        {'ServiceInfo': {'service_name': 'HDFS'},
+         'components': [
+             {'ServiceComponentInfo': {'component_name': 'NAMENODE', 'service_name': 'HDFS', 'state': 'STARTED',
+                                       'started_count': 2, 'total_count': 2},
+              'host_components': [
+                  {'HostRoles': {'component_name': 'NAMENODE', 'host_name': 'nn1', 'state': 'STARTED',
+                                 'ha_state': 'ACTIVE'},
+                   'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/nn1/host_components/NAMENODE'},
+                  {'HostRoles': {'component_name': 'NAMENODE', 'host_name': 'nn2', 'state': 'STARTED',
+                                 'ha_state': 'STANDBY'},
+                   'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/nn2/host_components/NAMENODE'}]},
+             {'ServiceComponentInfo': {'component_name': 'DATANODE', 'service_name': 'HDFS', 'state': 'STARTED',
+                                       'started_count': 1, 'total_count': 2},
+              'host_components': [
+                  {'HostRoles': {'component_name': 'DATANODE', 'host_name': 'dn1', 'state': 'STARTED'}},
+                  {'HostRoles': {'component_name': 'DATANODE', 'host_name': 'dn2', 'state': 'INSTALLED'}}]}]},
+        {'ServiceInfo': {'service_name': 'RANGER'},
+         'components': [
+             {'ServiceComponentInfo': {'component_name': 'RANGER_ADMIN', 'service_name': 'RANGER',
+                                       'state': 'INSTALLED', 'started_count': 0, 'total_count': 1},
+              'host_components': [
+                  {'HostRoles': {'component_name': 'RANGER_ADMIN', 'host_name': 'ra1', 'state': 'INSTALLED'}}]}]}
+    ]}
+
+
+class TestClusterSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = snapshot.ClusterSnapshot('Sandbox', services_info())
+
+    def test_services_and_components(self):
+        self.assertEqual(['HDFS', 'RANGER'], self.snapshot.get_services())
+        self.assertEqual(['DATANODE', 'NAMENODE'], self.snapshot.get_service_components('HDFS'))
+
+    def test_all_started(self):
+        self.assertTrue(self.snapshot.all_started('HDFS', 'NAMENODE'))
+        self.assertFalse(self.snapshot.all_started('HDFS', 'DATANODE'))
+        self.assertFalse(self.snapshot.all_started('RANGER', 'RANGER_ADMIN'))
+
+    def test_unknown_component(self):
+        with self.assertRaises(KeyError):
+            self.snapshot.all_started('HBASE', 'HBASE_MASTER')
+
+    def test_component_info_for_victim_selection(self):
+        info = self.snapshot.get_component_info('HDFS', 'DATANODE')
+        self.assertEqual(['Sandbox/hosts/dn1/host_components/DATANODE', 'Sandbox/hosts/dn2/host_components/DATANODE'],
+                         [host['href'] for host in info['host_components']])
+        info = self.snapshot.get_component_info('HDFS', 'NAMENODE')
+        self.assertEqual('http://sandbox:8080/api/v1/clusters/Sandbox/hosts/nn1/host_components/NAMENODE',
+                         info['host_components'][0]['href'])
+
+    def test_host_states(self):
+        self.assertDictEqual({'dn1': 'STARTED', 'dn2': 'INSTALLED'},
+                             self.snapshot.get_host_states('HDFS', 'DATANODE'))
+
+    def test_host_ha_states(self):
+        self.assertDictEqual({'nn1': 'ACTIVE', 'nn2': 'STANDBY'}, self.snapshot.get_host_ha_states('HDFS', 'NAMENODE'))
+        self.assertDictEqual({'dn1': None, 'dn2': None}, self.snapshot.get_host_ha_states('HDFS', 'DATANODE'))
+
+    @patch('requests.Session.request')
+    def test_snapshot_with_one_call(self, mock_request):
+        document = json.dumps(services_info()).encode()
+        mock_request.return_value = Mock(ok=True, status_code=200)
+        mock_request.return_value.iter_content.side_effect = lambda chunk_size: iter([document])
+        ambari = api.Api(request_timeout=2, polling_timeout=5)
+        ambari.ambari_session = 'KRISUUID12345678'
+
+        cluster = ambari.get_cluster_snapshot()
+        self.assertTrue(cluster.all_started('HDFS', 'NAMENODE'))
+        self.assertFalse(cluster.all_started('RANGER', 'RANGER_ADMIN'))
+        self.assertEqual(1, mock_request.call_count)
+        self.assertIn('Sandbox/services?fields=ServiceInfo/service_name,components/ServiceComponentInfo/state',
+                      mock_request.call_args[0][1])
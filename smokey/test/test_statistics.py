@@ -0,0 +1,32 @@
+import unittest
+
+from hdfs.statistics import percentile, summarize_phase
+
+
+class TestPercentile(unittest.TestCase):
+    def test_interpolates_between_ranks(self):
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(1.0, percentile(values, 0))
+        self.assertEqual(3.0, percentile(values, 50))
+        self.assertAlmostEqual(4.96, percentile(values, 99))
+        self.assertEqual(5.0, percentile(values, 100))
+
+    def test_single_and_no_values(self):
+        self.assertEqual(7.0, percentile([7.0], 95))
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize_phase(self):
+        summary = summarize_phase([0.3, 0.1, 0.2], 6 * 1024 * 1024, 2.0, 1)
+        self.assertEqual(3, summary['operations'])
+        self.assertEqual(1, summary['errors'])
+        self.assertEqual(3.0, summary['mb_per_second'])
+        self.assertEqual(1.5, summary['operations_per_second'])
+        self.assertEqual(0.1, summary['latency']['min'])
+        self.assertEqual(0.2, summary['latency']['p50'])
+        self.assertEqual(0.3, summary['latency']['max'])
+
+    def test_summarize_phase_without_operations(self):
+        summary = summarize_phase([], 0, 0.0, 2)
+        self.assertEqual(0, summary['operations'])
+        self.assertEqual(0.0, summary['mb_per_second'])
+        self.assertIsNone(summary['latency']['p99'])
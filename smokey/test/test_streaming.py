@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import ambari.api as api
+import ambari.streaming as streaming
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def setUp(self):
+        self.host_components = [{'HostRoles': {'component_name': 'DATANODE', 'host_name': 'dn{0}'.format(i)},
+                                 'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/dn{0}/host_components/'
+                                         'DATANODE'.format(i)} for i in range(50)]
+        self.document = json.dumps({'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/services/HDFS/components/'
+                                            'DATANODE?fields=host_components',
+                                    'ServiceComponentInfo': {'component_name': 'DATANODE', 'service_name': 'HDFS'},
+                                    'host_components': self.host_components}, indent=2).encode()
+
+    @staticmethod
+    def _chunks(data, size):
+        return (data[i:i + size] for i in range(0, len(data), size))
+
+    def test_items_in_one_chunk(self):
+        items = list(streaming.iter_json_array([self.document], 'host_components'))
+        self.assertEqual(self.host_components, items)
+
+    def test_items_split_over_small_chunks(self):
+        for size in [1, 7, 100]:
+            items = list(streaming.iter_json_array(self._chunks(self.document, size), 'host_components'))
+            self.assertEqual(self.host_components, items)
+
+    def test_numbers_split_over_chunks(self):
+        chunks = [b'{"values": [12', b'34, 5.', b'25e', b'2, tr', b'ue, 7', b'8]}']
+        self.assertEqual([1234, 525.0, True, 78], list(streaming.iter_json_array(chunks, 'values')))
+
+    def test_multibyte_characters_split_over_chunks(self):
+        document = json.dumps({'host_components': [{'name': 'höst'}, {'name': 'é'}]},
+                              ensure_ascii=False).encode()
+        items = list(streaming.iter_json_array(self._chunks(document, 1), 'host_components'))
+        self.assertEqual([{'name': 'höst'}, {'name': 'é'}], items)
+
+    def test_items_are_yielded_before_the_document_ends(self):
+        chunks = iter([self.document[:1000]])
+        items = streaming.iter_json_array(chunks, 'host_components')
+        self.assertEqual(self.host_components[0], next(items))
+
+    def test_empty_and_missing_array(self):
+        self.assertEqual([], list(streaming.iter_json_array([b'{"host_components": []}'], 'host_components')))
+        self.assertEqual([], list(streaming.iter_json_array([b'{"items": [1, 2]}'], 'host_components')))
+
+    def test_truncated_document(self):
+        with self.assertRaises(streaming.StreamingJsonError):
+            list(streaming.iter_json_array([self.document[:-200]], 'host_components'))
+
+
+class TestAmbariStreaming(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_component_info_streams_the_response(self, mock_request):
+        host_components = [{'HostRoles': {'component_name': 'DATANODE', 'host_name': 'dn{0}'.format(i)},
+                            'href': 'http://sandbox:8080/api/v1/clusters/Sandbox/hosts/dn{0}/host_components/'
+                                    'DATANODE'.format(i)} for i in range(1000)]
+        document = json.dumps({'host_components': host_components}).encode()
+        response = Mock(ok=True, status_code=200)
+        response.iter_content.side_effect = lambda chunk_size: (document[i:i + chunk_size]
+                                                                for i in range(0, len(document), chunk_size))
+        mock_request.return_value = response
+        ambari = api.Api(request_timeout=2, polling_timeout=5)
+        ambari.ambari_session = 'KRISUUID12345678'
+
+        self.assertEqual({'host_components': host_components}, ambari.get_component_info('HDFS', 'DATANODE'))
+        self.assertTrue(mock_request.call_args[1]['stream'])
+        response.close.assert_called_once_with()
+        response.json.assert_not_called()
+        # The parsed host components are cached as topology
+        ambari.get_component_info('HDFS', 'DATANODE')
+        self.assertEqual(1, mock_request.call_count)
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import core.base_smoketest as base_smoketest
+import core.verification as verification
+
+
+class RecordingVerifier(verification.Verifier):
+    def __init__(self, name, log, seconds=0.0, error=None, exclusive_tags=(), timeout=None, barrier=None):
+        super().__init__(logging)
+        self.name = name
+        self.log = log
+        self.seconds = seconds
+        self.error = error
+        self.exclusive_tags = frozenset(exclusive_tags)
+        self.timeout = timeout
+        self.barrier = barrier
+
+    def verify(self):
+        self.log.append(('start', self.name))
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        time.sleep(self.seconds)
+        self.log.append(('end', self.name))
+        if self.error is not None:
+            raise self.error
+
+
+class TestRunVerifiers(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+
+    def test_verifiers_run_concurrently(self):
+        barrier = threading.Barrier(3)
+        verifiers = [RecordingVerifier(name, self.log, barrier=barrier) for name in 'abc']
+        verification.run_verifiers(verifiers, parallelism=3)
+        self.assertEqual(6, len(self.log))
+        self.assertFalse(barrier.broken)
+
+    def test_parallelism_is_bounded(self):
+        verifiers = [RecordingVerifier(name, self.log, seconds=0.05) for name in 'abcd']
+        verification.run_verifiers(verifiers, parallelism=2)
+        running = 0
+        for event, name in self.log:
+            running += 1 if event == 'start' else -1
+            self.assertLessEqual(running, 2)
+
+    def test_exclusive_verifiers_do_not_overlap(self):
+        verifiers = [RecordingVerifier('teragen1', self.log, seconds=0.05, exclusive_tags=['teragen']),
+                     RecordingVerifier('teragen2', self.log, seconds=0.05, exclusive_tags=['teragen']),
+                     RecordingVerifier('other', self.log, seconds=0.05)]
+        verification.run_verifiers(verifiers, parallelism=3)
+        teragen = [entry for entry in self.log if entry[1].startswith('teragen')]
+        self.assertEqual([('start', 'teragen1'), ('end', 'teragen1'), ('start', 'teragen2'), ('end', 'teragen2')],
+                         teragen)
+        # The other verifier does not wait for the exclusive ones
+        self.assertLess(self.log.index(('start', 'other')), self.log.index(('end', 'teragen1')))
+
+    def test_errors_are_aggregated(self):
+        verifiers = [RecordingVerifier('a', self.log, error=verification.VerificationError('broken')),
+                     RecordingVerifier('b', self.log),
+                     RecordingVerifier('c', self.log, error=ValueError('unexpected'))]
+        with self.assertRaises(verification.AggregateVerificationError) as context:
+            verification.run_verifiers(verifiers, parallelism=3)
+        self.assertEqual(['a', 'c'], sorted(verifier.name for verifier, error in context.exception.errors))
+        self.assertIn('broken', str(context.exception))
+        self.assertIn('unexpected', str(context.exception))
+
+    def test_timeout(self):
+        verifiers = [RecordingVerifier('slow', self.log, seconds=0.5, exclusive_tags=['path']),
+                     RecordingVerifier('blocked', self.log, exclusive_tags=['path']),
+                     RecordingVerifier('own_timeout', self.log, seconds=0.5, timeout=2),
+                     RecordingVerifier('fast', self.log)]
+        start = time.monotonic()
+        with self.assertRaises(verification.AggregateVerificationError) as context:
+            verification.run_verifiers(verifiers, parallelism=4, timeout=0.1)
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(['blocked', 'slow'], sorted(verifier.name for verifier, error in context.exception.errors))
+        self.assertNotIn(('start', 'blocked'), self.log)
+        self.assertIn(('end', 'own_timeout'), self.log)
+
+    def test_timed_out_verifier_does_not_hold_the_next_verifiers_place(self):
+        verifiers = [RecordingVerifier('slow', self.log, seconds=1.0, timeout=0.3),
+                     RecordingVerifier('fast', self.log, seconds=0.1, timeout=0.5)]
+        with self.assertRaises(verification.AggregateVerificationError) as context:
+            verification.run_verifiers(verifiers, parallelism=1)
+
+        self.assertEqual(['slow'], [verifier.name for verifier, error in context.exception.errors])
+        self.assertIn(('end', 'fast'), self.log)
+
+    def test_abandoned_verifiers_are_carried_over(self):
+        abandoned = {}
+        slow = RecordingVerifier('slow', self.log, seconds=0.5, exclusive_tags=['path'])
+        with self.assertRaises(verification.AggregateVerificationError):
+            verification.run_verifiers([slow], timeout=0.1, abandoned=abandoned)
+        self.assertEqual([slow], list(abandoned))
+
+        verifiers = [slow, RecordingVerifier('blocked', self.log, exclusive_tags=['path']),
+                     RecordingVerifier('free', self.log)]
+        with self.assertRaises(verification.AggregateVerificationError) as context:
+            verification.run_verifiers(verifiers, timeout=0.1, abandoned=abandoned)
+        self.assertEqual(['blocked', 'slow'], sorted(verifier.name for verifier, error in context.exception.errors))
+        self.assertEqual(1, self.log.count(('start', 'slow')))
+        self.assertNotIn(('start', 'blocked'), self.log)
+        self.assertIn(('end', 'free'), self.log)
+
+        # Once it has finished the verifier runs again
+        abandoned[slow].result(timeout=5)
+        slow.seconds = 0.0
+        verification.run_verifiers(verifiers, timeout=1, abandoned=abandoned)
+        self.assertEqual({}, abandoned)
+        self.assertEqual(2, self.log.count(('start', 'slow')))
+
+
+class TestBaseSmokeTestVerification(unittest.TestCase):
+    def test_sequential_by_default(self):
+        log = []
+        smoketest = base_smoketest.BaseSmokeTest('TEST')
+        smoketest.verifiers = [RecordingVerifier('a', log, error=verification.VerificationError('broken')),
+                               RecordingVerifier('b', log)]
+        with self.assertRaisesRegex(verification.VerificationError, 'broken'):
+            smoketest._verify()
+        self.assertEqual([('start', 'a'), ('end', 'a')], log)
+
+    def test_verifiers_are_closed_when_the_smoketest_ends(self):
+        smoketest = base_smoketest.BaseSmokeTest('TEST')
+        smoketest.verifiers = [RecordingVerifier('a', []), RecordingVerifier('b', [])]
+        smoketest.verifiers[0].close = Mock(side_effect=OSError('unreachable'))
+        smoketest.verifiers[1].close = Mock()
+        with self.assertRaises(SystemExit):
+            smoketest.run()
+        smoketest.verifiers[0].close.assert_called_once_with()
+        smoketest.verifiers[1].close.assert_called_once_with()
+
+    def test_lone_verifier_times_out_and_is_not_rerun_while_abandoned(self):
+        log = []
+        with patch.dict(os.environ, {'SMOKETEST_VERIFIER_TIMEOUT': '0.1'}):
+            smoketest = base_smoketest.BaseSmokeTest('TEST')
+        slow = RecordingVerifier('slow', log, seconds=0.5)
+        smoketest.verifiers = slow
+        start = time.monotonic()
+        with self.assertRaisesRegex(verification.VerificationError, 'timed out'):
+            smoketest._verify()
+        self.assertLess(time.monotonic() - start, 0.4)
+
+        with self.assertRaisesRegex(verification.VerificationError, 'still runs'):
+            smoketest._verify()
+        self.assertEqual(1, log.count(('start', 'slow')))
+        self.assertIn(slow, smoketest.abandoned_verifiers)
+
+    def test_concurrent_with_parallelism(self):
+        log = []
+        with patch.dict(os.environ, {'SMOKETEST_VERIFIER_PARALLELISM': '2', 'SMOKETEST_VERIFIER_TIMEOUT': '5'}):
+            smoketest = base_smoketest.BaseSmokeTest('TEST')
+        self.assertEqual(5.0, smoketest.verifier_timeout)
+        barrier = threading.Barrier(2)
+        smoketest.verifiers = [RecordingVerifier('a', log, barrier=barrier),
+                               RecordingVerifier('b', log, barrier=barrier)]
+        smoketest._verify()
+        self.assertEqual(4, len(log))
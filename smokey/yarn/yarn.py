@@ -1,4 +1,5 @@
 import logging
+import os
 import requests
 
 import ambari.api as ambari_api
@@ -12,13 +13,15 @@ class Yarn:
     def __init__(self, request_timeout=10, logger=logging):
         self.timeout = request_timeout
         self.logger = logger
+        self.yarn_resourcemanager_port = os.environ.get('YARN_RESOURCEMANAGER_PORT', 8088)
 
         self.ambari = ambari_api.Api(logger=self.logger)
 
         yarn_resourcemanager_ambari_info = self.ambari.get_component_info('YARN', 'RESOURCEMANAGER')
         yarn_resourcemanager_hosts = [host['HostRoles']['host_name'] for host in
                                       yarn_resourcemanager_ambari_info['host_components']]
-        self.yarn_resourcemanager_urls = ["http://{0}:8088".format(host) for host in yarn_resourcemanager_hosts]
+        self.yarn_resourcemanager_urls = ["http://{0}:{1}".format(host, self.yarn_resourcemanager_port)
+                                          for host in yarn_resourcemanager_hosts]
 
     def check_yarn_resourcemanager_status(self):
         """
@@ -5,6 +5,7 @@ import yarn.yarn as yarn
 
 
 class YarnResourceManagerVerifier(verification.Verifier):
+    tier = verification.TIER_PROBE
 
     def __init__(self, logger):
         super().__init__(logger)
@@ -1,35 +1,64 @@
 import time
-from hdfs.hdfs_verifiers import HdfsVerifier
-from hdfs.hdfs_api import HdfsApi
-from core import base
+
+import requests
+
+from core import verification
+from hdfs.hdfs_verifiers import HdfsVerifier, create_ha_hdfs_api
+from hdfs.hdfs_api import HdfsRequestError
 
 
 class NamenodeFailoverVerifier(HdfsVerifier):
-    def __init__(self, logger, filename='hdfs_verifier_file.txt', filesize=324, ambari=None):
-        super().__init__(logger)
-        self.ambari = ambari
+    # Every verification stops and starts a NameNode
+    tier = verification.TIER_JOB
+
+    def __init__(self, logger, filename='hdfs_verifier_file.txt', filesize=324, ambari=None, failover_timeout=120,
+                 failover_poll_interval=2):
+        """
+        :param failover_timeout: Seconds the other NameNode may take to become active
+        :param failover_poll_interval: Seconds between the attempts to reach the new active NameNode
+        """
+        super().__init__(logger, filename=filename, filesize=filesize, ambari=ambari)
         self.service = "HDFS"
         self.component = "NAMENODE"
+        self.failover_timeout = failover_timeout
+        self.failover_poll_interval = failover_poll_interval
 
     def verify(self):
         self.logger.info("Verify HDFS status by writing a file and checking the md5sum")
-        active_nn = self.ambari.get_specific_nn_host(state='active')
+        hdfs = create_ha_hdfs_api(self.ambari, self.logger)
+        active_nn = hdfs.hdfs_host
         host, component_path = self.get_component_path(active_nn)
         self.logger.info("Stopping the {0} on {1}".format(self.component, host))
         self.ambari.change_host_component_state_and_wait(component_path, state='INSTALLED')
-        time.sleep(120)
-        new_active_nn = self.ambari.get_specific_nn_host(state='active')
-        hdfs = HdfsApi(logger=self.logger, active_nn_host=new_active_nn)
+        new_active_nn = self.wait_for_failover(hdfs)
+        self.logger.info("NameNode {0} took over from {1}".format(new_active_nn, active_nn))
         md5 = hdfs.create_hdfs_file_of_size_in_mb(self.filename, size=self.filesize)
         remote_md5 = hdfs.get_hdfsfile_and_calc_md5(self.filename)
         hdfs.cleanup_remote_file(self.filename)
         if md5 != remote_md5:
-            raise base.VerificationError(
+            raise verification.VerificationError(
                 "local md5 {0} did not match remote md5 {1} for file {2}".format(md5, remote_md5, self.filename))
         self.logger.info("Starting the previously stopped {0}".format(self.component))
         self.ambari.change_host_component_state_and_wait(component_path, state='STARTED')
         self.logger.info("Started the {0}".format(self.component))
 
+    def wait_for_failover(self, hdfs):
+        """
+        Wait until a NameNode answers as active, instead of sleeping for the worst case failover time
+
+        :return: The host of the active NameNode
+        """
+        deadline = time.monotonic() + self.failover_timeout
+        while True:
+            try:
+                hdfs.request_webhdfs_status('/')
+                return hdfs.hdfs_host
+            except (HdfsRequestError, requests.ConnectionError) as e:
+                if time.monotonic() >= deadline:
+                    raise verification.VerificationError("No NameNode became active within {0}s: {1}".format(
+                        self.failover_timeout, e))
+                time.sleep(self.failover_poll_interval)
+
     def get_component_path(self, active_nn):
         """
         Get a specific datanode host and path from AMBARI
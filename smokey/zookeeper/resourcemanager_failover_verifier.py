@@ -1,10 +1,14 @@
 from yarn.yarn_resourcemanager_smoketest import YarnResourceManagerVerifier
 from yarn import yarn
 from core import base
+from core import verification
 from ambari import api
 
 
 class ResourceManagerFailoverVerifier(YarnResourceManagerVerifier):
+    # Every verification stops and starts a ResourceManager
+    tier = verification.TIER_JOB
+
     def __init__(self, logger):
         super().__init__(logger)
         self.component_state = "ACTIVE"